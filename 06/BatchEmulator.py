@@ -0,0 +1,210 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import array
+import typing
+import numpy
+from CPUEmulator import CPUEmulator, RAM_SIZE, ADDRESS_MASK, SIGN_BIT, \
+    DEST_A, DEST_D, DEST_M, JUMP_NEGATIVE, JUMP_ZERO, JUMP_POSITIVE, \
+    load_program
+from BlockCompiler import BlockCompiler
+from HackBinary import WORD_TYPECODE
+
+# Below this many lanes per instruction, NumPy's overhead outweighs the
+# vectorizing
+MIN_GROUP = 128
+# Below this share of the running lanes per instruction, the lanes waiting
+# at other PCs cost more than the vectorizing saves
+MIN_GROUP_SHARE = 0.5
+LANE_BURST = 10_000
+
+
+class BatchEmulator:
+    """Runs many independent Hack machines with the same ROM in lockstep.
+    Every register is a NumPy array with one lane per machine, and the RAM
+    is a lanes x 32K array. Each step applies one instruction to every lane
+    at the most common PC at once, so lanes that stay together, such as one
+    test with many inputs, cost a single vectorized instruction per step.
+    Lanes at other PCs are masked out and wait until the others reach them,
+    and once no PC has min_group lanes, or half of the running lanes, every
+    lane runs alone through the block compiler for a while. Programs whose
+    lanes diverge, like Mult or Sort on random inputs, therefore spend most
+    of their time in separate block-compiled runs and gain little over
+    separate emulators running the block compiler; the lockstep only pays
+    off while most lanes share a PC.
+    """
+
+    def __init__(self, program: typing.Sequence[int], lanes: int,
+                 extended: bool = True, min_group: int = MIN_GROUP) -> None:
+        """Creates the machines with zeroed registers and RAM.
+
+        Args:
+            program (typing.Sequence[int]): the ROM contents.
+            lanes (int): how many machines to run.
+            extended (bool): run shift instructions like CpuMul does.
+            min_group (int): when no PC has this many lanes, or half of the
+                running lanes, the lanes run one at a time for a while
+                instead.
+        """
+        # The decoded ROM, whose ALU functions work on arrays as well
+        self.decoded = CPUEmulator(program, extended)
+        self.compiler = BlockCompiler(self.decoded)
+        self.min_group = min_group
+        self.lanes = lanes
+        self.ram = numpy.zeros((lanes, RAM_SIZE), dtype=numpy.uint16)
+        self.a = numpy.zeros(lanes, dtype=numpy.int64)
+        self.d = numpy.zeros(lanes, dtype=numpy.int64)
+        self.pc = numpy.zeros(lanes, dtype=numpy.int64)
+        self.cycles = numpy.zeros(lanes, dtype=numpy.int64)
+        self.halted = numpy.zeros(lanes, dtype=bool)
+
+    @staticmethod
+    def from_file(path: str, lanes: int, extended: bool = True) \
+            -> "BatchEmulator":
+        """
+        Args:
+            path (str): an .asm, .hack or packed program.
+            lanes (int): how many machines to run.
+            extended (bool): run shift instructions like CpuMul does.
+
+        Returns:
+            BatchEmulator: the machines, with the program in their ROM.
+        """
+        return BatchEmulator(load_program(path)[0], lanes, extended)
+
+    def reset(self) -> None:
+        """Restarts the program on every lane."""
+        self.pc[:] = 0
+        self.halted[:] = False
+
+    def lane(self, index: int) -> CPUEmulator:
+        """
+        Args:
+            index (int): a lane.
+
+        Returns:
+            CPUEmulator: a copy of the lane's machine.
+        """
+        emulator = CPUEmulator(self.decoded.rom[:self.decoded.program_size],
+                               self.decoded.extended)
+        emulator.ram = array.array(WORD_TYPECODE)
+        emulator.ram.frombytes(self.ram[index].tobytes())
+        emulator.a = int(self.a[index])
+        emulator.d = int(self.d[index])
+        emulator.pc = int(self.pc[index])
+        emulator.cycles = int(self.cycles[index])
+        emulator.halted = bool(self.halted[index])
+        return emulator
+
+    def run_lane(self, lane: int, max_cycles: int) -> None:
+        """Runs a single lane with the block compiler.
+
+        Args:
+            lane (int): the lane to run.
+            max_cycles (int): the most instructions to execute.
+        """
+        machine = self.decoded
+        # A memoryview of the lane's RAM row indexes like the array it
+        # replaces, without copying the row in and out
+        machine.ram = memoryview(self.ram[lane])
+        machine.a, machine.d = int(self.a[lane]), int(self.d[lane])
+        machine.pc = int(self.pc[lane])
+        machine.halted = False
+        self.cycles[lane] += self.compiler.run(int(max_cycles))
+        self.a[lane], self.d[lane], self.pc[lane] = machine.a, machine.d, \
+            machine.pc
+        self.halted[lane] = machine.halted
+
+    def execute(self, pc: int, lanes: numpy.ndarray) -> None:
+        """Executes the instruction at a ROM address on some lanes.
+
+        Args:
+            pc (int): the instruction's address.
+            lanes (numpy.ndarray): the indices of the lanes at that address.
+        """
+        decoded = self.decoded
+        if not decoded.is_c[pc]:
+            self.a[lanes] = decoded.operands[pc]
+            self.pc[lanes] = (pc + 1) & ADDRESS_MASK
+            return
+        a = self.a[lanes]
+        address = a & ADDRESS_MASK
+        m = self.ram[lanes, address].astype(numpy.int64)
+        out = decoded.alus[pc](self.d[lanes], a, m)
+        if not isinstance(out, numpy.ndarray):
+            # Constant operations don't depend on any lane
+            out = numpy.full(len(lanes), out, dtype=numpy.int64)
+        jump = decoded.jumps[pc]
+        if jump == JUMP_NEGATIVE | JUMP_ZERO | JUMP_POSITIVE:
+            jumped = numpy.ones(len(lanes), dtype=bool)
+        elif jump:
+            negative = out >= SIGN_BIT
+            zero = out == 0
+            jumped = numpy.zeros(len(lanes), dtype=bool)
+            if jump & JUMP_NEGATIVE:
+                jumped |= negative
+            if jump & JUMP_ZERO:
+                jumped |= zero
+            if jump & JUMP_POSITIVE:
+                jumped |= ~negative & ~zero
+        if jump:
+            if decoded.halts[pc]:
+                halting = jumped & (a == pc - 1)
+                if halting.any():
+                    # Halted lanes stay on the jump, as in CPUEmulator.run
+                    self.halted[lanes[halting]] = True
+                    running = ~halting
+                    lanes, a, address, out, jumped = lanes[running], \
+                        a[running], address[running], out[running], \
+                        jumped[running]
+            self.pc[lanes] = numpy.where(jumped, address, (pc + 1) &
+                                         ADDRESS_MASK)
+        else:
+            self.pc[lanes] = (pc + 1) & ADDRESS_MASK
+        dest = decoded.dests[pc]
+        if dest & DEST_M:
+            self.ram[lanes, address] = out
+        if dest & DEST_D:
+            self.d[lanes] = out
+        if dest & DEST_A:
+            self.a[lanes] = out
+
+    def run(self, max_cycles: int) -> int:
+        """Executes up to max_cycles instructions on every lane, stopping
+        lanes whose program ends in an `(END) @END 0;JMP` loop.
+
+        Args:
+            max_cycles (int): the most instructions to execute per lane.
+
+        Returns:
+            int: the number of instructions executed by all lanes.
+        """
+        limits = self.cycles + max_cycles
+        start = int(self.cycles.sum())
+        while True:
+            running = numpy.flatnonzero(~self.halted & (self.cycles < limits))
+            if not len(running):
+                break
+            pcs = self.pc[running]
+            pc = pcs[0]
+            group = running
+            if not (pcs == pc).all():
+                # The biggest group of lanes advances. The others wait until
+                # it reaches their PC and they run together again
+                values, counts = numpy.unique(pcs, return_counts=True)
+                if counts.max() < max(self.min_group,
+                                       MIN_GROUP_SHARE * len(running)):
+                    # Too scattered for vectorizing to pay off
+                    for lane in running:
+                        self.run_lane(lane, min(limits[lane] -
+                                                self.cycles[lane],
+                                                LANE_BURST))
+                    continue
+                pc = values[counts.argmax()]
+                group = running[pcs == pc]
+            self.cycles[group] += 1
+            self.execute(int(pc), group)
+        return int(self.cycles.sum()) - start
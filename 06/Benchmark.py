@@ -0,0 +1,414 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import typing
+from Parser import Parser
+from Code import Code
+from SymbolTable import SymbolTable
+from Main import first_pass, second_pass
+from CPUEmulator import CPUEmulator, load_program
+from BlockCompiler import BlockCompiler
+from BatchEmulator import BatchEmulator
+from Workloads import MULT_PROGRAM, SORT_PROGRAM, mult_inputs, \
+    sort_inputs
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROGRAM = os.path.join(PROJECT_DIR, "pong", "Pong.asm")
+SAMPLE_PROGRAMS = [os.path.join(PROJECT_DIR, sample) for sample in (
+    "add/Add.asm", "max/Max.asm", "rect/Rect.asm", "pong/Pong.asm")]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+REGRESSION_THRESHOLD = 0.10
+ROM_SIZE = 32768
+
+# C-commands weighted roughly like VM translator output
+GENERATED_C_COMMANDS = ["D=M", "D=A", "M=D", "AM=M+1", "AM=M-1", "A=A-1",
+                        "A=M", "M=M+1", "D=D+M", "D=M-D", "M=-1", "M=0",
+                        "D;JNE", "D;JEQ", "D;JGT", "0;JMP", "M=D+M", "D=D-A"]
+
+
+def encode_by_fields(parser: Parser) -> int:
+    """Encodes the current C-command field by field, the way the assembler
+    did before Code.c_command existed. Used as the benchmark baseline.
+    """
+    comp = parser.comp()
+    if ">" in comp or "<" in comp:
+        prefix = Code.shift_prefix
+    else:
+        prefix = Code.regular_prefix
+    return int(prefix + Code.comp(comp) + Code.dest(parser.dest()) +
+               Code.jump(parser.jump()), 2)
+
+
+def benchmark_encoding(input_path: str, repeat: int = 20) \
+        -> typing.Dict[str, float]:
+    """Times encoding every C-command of a program, field by field versus
+    through the Code.c_command cache.
+
+    Args:
+        input_path (str): the .asm program to encode.
+        repeat (int): how many times to encode the program.
+
+    Returns:
+        typing.Dict[str, float]: timings in seconds, the speedup and the
+        cache counters.
+    """
+    with open(input_path, 'r') as input_file:
+        parser = Parser(input_file)
+    commands = [line for line in parser.lines
+                if line[0] != "@" and line[0] != "("]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            parser.current_command = command
+            encode_by_fields(parser)
+    by_fields = time.perf_counter() - start
+
+    Code.c_command.cache_clear()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            Code.c_command(command)
+    cached = time.perf_counter() - start
+    info = Code.c_command.cache_info()
+
+    return {"commands": len(commands) * repeat, "by_fields": by_fields,
+            "cached": cached, "speedup": by_fields / cached,
+            "hits": info.hits, "misses": info.misses}
+
+
+def generate_program(instructions: int, label_density: float = 0.05,
+                     variables: int = 100, seed: int = 0) -> str:
+    """Generates a random but valid Hack program.
+
+    Args:
+        instructions (int): the number of A and C commands.
+        label_density (float): labels per instruction.
+        variables (int): the number of distinct variables referenced.
+        seed (int): the random seed, so runs are repeatable.
+
+    Returns:
+        str: the program's source.
+    """
+    rng = random.Random(seed)
+    labels = int(instructions * label_density)
+    label_positions = set(rng.sample(range(instructions), labels))
+    # Programs past the 32K ROM still assemble, but only labels inside it
+    # have addresses that fit in an A-instruction
+    addressable = sum(1 for position in label_positions
+                      if position < ROM_SIZE)
+    lines = [f"// generated: {instructions} instructions, {labels} labels, "
+             f"{variables} variables"]
+    label_index = 0
+    for i in range(instructions):
+        if i in label_positions:
+            lines.append(f"(L{label_index})")
+            label_index += 1
+        if rng.random() < 0.5:
+            roll = rng.random()
+            if addressable and roll < 0.3:
+                lines.append(f"@L{rng.randrange(addressable)}")
+            elif variables and roll < 0.6:
+                lines.append(f"@v{rng.randrange(variables)}")
+            elif roll < 0.8:
+                lines.append(f"@{rng.randrange(ROM_SIZE)}")
+            else:
+                lines.append("@SP")
+        else:
+            lines.append(rng.choice(GENERATED_C_COMMANDS))
+    return "\n".join(lines) + "\n"
+
+
+def peak_rss_kb() -> int:
+    """
+    Returns:
+        int: this process' peak resident set size, in KB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_assembly(name: str, source: str, repeat: int) \
+        -> typing.Dict[str, typing.Any]:
+    """Times parsing and both assembler passes on a program, keeping the
+    best of several runs. Meant to run in a fresh process so the peak RSS
+    belongs to this program alone.
+
+    Args:
+        name (str): how the program is reported.
+        source (str): the program's source.
+        repeat (int): the number of runs.
+
+    Returns:
+        typing.Dict[str, typing.Any]: the case's measurements.
+    """
+    lines = source.count("\n")
+    parse_time = first_time = second_time = float("inf")
+    for _ in range(repeat):
+        Code.c_command.cache_clear()
+        start = time.perf_counter()
+        parser = Parser(io.StringIO(source))
+        parsed = time.perf_counter()
+        symbol_table = SymbolTable()
+        first_pass(parser, symbol_table)
+        first_done = time.perf_counter()
+        parser.init_between_passes()
+        words = second_pass(parser, symbol_table)
+        second_done = time.perf_counter()
+        parse_time = min(parse_time, parsed - start)
+        first_time = min(first_time, first_done - parsed)
+        second_time = min(second_time, second_done - first_done)
+    total = parse_time + first_time + second_time
+    return {"name": name, "lines": lines, "instructions": len(words),
+            "symbols": len(symbol_table.table),
+            "parse_s": parse_time, "first_pass_s": first_time,
+            "second_pass_s": second_time, "total_s": total,
+            "lines_per_s": lines / total, "peak_rss_kb": peak_rss_kb()}
+
+
+def run_suite(sizes: typing.List[int], label_density: float,
+              variables: int, repeat: int) \
+        -> typing.List[typing.Dict[str, typing.Any]]:
+    """Benchmarks the sample programs and generated programs of the given
+    sizes, each in a fresh process forked from a small server process.
+
+    Returns:
+        typing.List[typing.Dict[str, typing.Any]]: one result per case.
+    """
+    cases = []
+    for sample in SAMPLE_PROGRAMS:
+        with open(sample, 'r') as input_file:
+            cases.append((os.path.basename(sample), input_file.read()))
+    for size in sizes:
+        cases.append((f"generated-{size}",
+                      generate_program(size, label_density, variables)))
+    results = []
+    for name, source in cases:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("forkserver")) as pool:
+            results.append(pool.submit(
+                measure_assembly, name, source, repeat).result())
+    return results
+
+
+def compare_results(previous: typing.List[typing.Dict[str, typing.Any]],
+                    current: typing.List[typing.Dict[str, typing.Any]]) \
+        -> typing.List[str]:
+    """
+    Returns:
+        typing.List[str]: the cases whose throughput dropped by more than
+        REGRESSION_THRESHOLD since the previous run.
+    """
+    previous_by_name = {result["name"]: result for result in previous}
+    regressions = []
+    for result in current:
+        before = previous_by_name.get(result["name"])
+        if before is None:
+            continue
+        change = result["lines_per_s"] / before["lines_per_s"] - 1
+        print(f"{result['name']:>20}  {change:+7.1%} lines/s")
+        if change < -REGRESSION_THRESHOLD:
+            regressions.append(result["name"])
+    return regressions
+
+
+def benchmark_engine(input_path: str, max_cycles: int,
+                     inputs: typing.Sequence[typing.Dict[int, int]] = ({},)) \
+        -> typing.Dict[str, typing.Any]:
+    """Times running a program on the interpreter and on the block compiler,
+    once for every set of inputs, restarting the same machine each time so
+    compiled blocks are reused.
+
+    Args:
+        input_path (str): the program to run.
+        max_cycles (int): the cycle budget of each run.
+        inputs (typing.Sequence[typing.Dict[int, int]]): the RAM values to
+            set before each run.
+
+    Returns:
+        typing.Dict[str, typing.Any]: the cycles run, timings in seconds, the
+        speedup, the number of blocks compiled and whether both engines
+        ended in the same state.
+    """
+    interpreter = CPUEmulator.from_file(input_path)
+    compiled = CPUEmulator.from_file(input_path)
+    compiler = BlockCompiler(compiled)
+    timings = []
+    for emulator, run in ((interpreter, interpreter.run),
+                          (compiled, compiler.run)):
+        start = time.perf_counter()
+        for values in inputs:
+            emulator.reset()
+            for address, value in values.items():
+                emulator.ram[address] = value
+            run(max_cycles)
+        timings.append(time.perf_counter() - start)
+    blocks = [length for length in compiler.lengths if length]
+    return {"cycles": interpreter.cycles, "interpreted": timings[0],
+            "compiled": timings[1], "speedup": timings[0] / timings[1],
+            "blocks": len(blocks),
+            "block_length": sum(blocks) / max(len(blocks), 1),
+            "identical": interpreter.ram == compiled.ram and
+            (interpreter.a, interpreter.d, interpreter.pc, interpreter.cycles,
+             interpreter.halted) ==
+            (compiled.a, compiled.d, compiled.pc, compiled.cycles,
+             compiled.halted)}
+
+
+def benchmark_batch(input_path: str, max_cycles: int,
+                    inputs: typing.Sequence[typing.Dict[int, int]]) \
+        -> typing.Dict[str, typing.Any]:
+    """Times running a program once per set of inputs on separate
+    emulators versus on one lane each of a BatchEmulator.
+
+    Args:
+        input_path (str): the program to run.
+        max_cycles (int): the cycle budget of each run.
+        inputs (typing.Sequence[typing.Dict[int, int]]): the RAM values of
+            each run.
+
+    Returns:
+        typing.Dict[str, typing.Any]: timings in seconds, the speedup and
+        whether every lane ended like its separate emulator.
+    """
+    words = load_program(input_path)[0]
+    start = time.perf_counter()
+    separate = []
+    for values in inputs:
+        emulator = CPUEmulator(words)
+        for address, value in values.items():
+            emulator.ram[address] = value
+        emulator.run(max_cycles)
+        separate.append(emulator)
+    separate_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = BatchEmulator(words, len(inputs))
+    for lane, values in enumerate(inputs):
+        for address, value in values.items():
+            batch.ram[lane, address] = value
+    batch.run(max_cycles)
+    batch_s = time.perf_counter() - start
+
+    identical = True
+    for index, emulator in enumerate(separate):
+        lane = batch.lane(index)
+        identical &= lane.ram == emulator.ram and \
+            (lane.a, lane.d, lane.pc, lane.cycles, lane.halted) == \
+            (emulator.a, emulator.d, emulator.pc, emulator.cycles,
+             emulator.halted)
+    return {"runs": len(inputs), "separate": separate_s, "batch": batch_s,
+            "speedup": separate_s / batch_s, "identical": identical}
+
+
+def print_encoding(program: str) -> None:
+    result = benchmark_encoding(program)
+    print(f"{os.path.basename(program)}: {result['commands']} C-commands")
+    print(f"  field by field  {result['by_fields']:.3f}s")
+    print(f"  cached          {result['cached']:.3f}s "
+          f"({result['speedup']:.1f}x, {result['hits']} hits, "
+          f"{result['misses']} misses)")
+
+
+def print_engine(name: str, result: typing.Dict[str, typing.Any]) -> None:
+    print(f"{name}: {result['cycles']} cycles, {result['blocks']} blocks of "
+          f"{result['block_length']:.1f} instructions on average")
+    print(f"  interpreter     {result['interpreted']:.3f}s "
+          f"({result['cycles'] / result['interpreted'] / 1e6:.2f}M/s)")
+    print(f"  block compiler  {result['compiled']:.3f}s "
+          f"({result['cycles'] / result['compiled'] / 1e6:.2f}M/s, "
+          f"{result['speedup']:.1f}x)")
+    if not result["identical"]:
+        print("  the engines ended in different states")
+
+
+def print_batch(name: str, result: typing.Dict[str, typing.Any]) -> None:
+    print(f"{name}: {result['runs']} runs")
+    print(f"  separate        {result['separate']:.3f}s "
+          f"({result['separate'] / result['runs'] * 1e3:.2f}ms per run)")
+    print(f"  batch           {result['batch']:.3f}s "
+          f"({result['batch'] / result['runs'] * 1e3:.2f}ms per run, "
+          f"{result['speedup']:.1f}x)")
+    if not result["identical"]:
+        print("  the lanes ended in different states")
+
+
+def print_suite(results: typing.List[typing.Dict[str, typing.Any]]) -> None:
+    print(f"{'case':>20} {'lines':>9} {'parse':>8} {'pass 1':>8} "
+          f"{'pass 2':>8} {'lines/s':>10} {'peak RSS':>10}")
+    for result in results:
+        print(f"{result['name']:>20} {result['lines']:>9} "
+              f"{result['parse_s']:>7.3f}s {result['first_pass_s']:>7.3f}s "
+              f"{result['second_pass_s']:>7.3f}s "
+              f"{result['lines_per_s']:>10.0f} "
+              f"{result['peak_rss_kb'] // 1024:>7} MB")
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="Benchmark")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    encoding = commands.add_parser(
+        "encoding", help="field by field versus cached C-command encoding")
+    encoding.add_argument("program", nargs="?", default=DEFAULT_PROGRAM)
+    suite = commands.add_parser(
+        "suite", help="assembler throughput on sample and generated programs")
+    suite.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES,
+                       help="generated program sizes, in instructions")
+    suite.add_argument("--label-density", type=float, default=0.05)
+    suite.add_argument("--variables", type=int, default=100)
+    suite.add_argument("--repeat", type=int, default=3)
+    suite.add_argument("--output", help="save the results to this JSON file")
+    suite.add_argument("--compare", metavar="JSON",
+                       help="report changes against an earlier --output")
+    engine = commands.add_parser(
+        "engine", help="interpreter versus block compiler on Pong and Mult")
+    engine.add_argument("--cycles", type=int, default=3_000_000,
+                        help="how long to run Pong")
+    engine.add_argument("--runs", type=int, default=2_000,
+                        help="how many products Mult computes")
+    batch = commands.add_parser(
+        "batch", help="separate emulators versus lockstep lanes")
+    batch.add_argument("--runs", type=int, default=500,
+                       help="how many inputs each program runs with")
+    args = arg_parser.parse_args()
+
+    if args.command == "encoding":
+        print_encoding(args.program)
+    elif args.command == "engine":
+        print_engine("Pong", benchmark_engine(DEFAULT_PROGRAM, args.cycles))
+        print_engine("Mult", benchmark_engine(MULT_PROGRAM, 100_000,
+                                              mult_inputs(args.runs)))
+    elif args.command == "batch":
+        print_batch("Mult", benchmark_batch(MULT_PROGRAM, 5_000,
+                                            mult_inputs(args.runs)))
+        print_batch("Sort", benchmark_batch(SORT_PROGRAM, 30_000,
+                                            sort_inputs(args.runs)))
+    else:
+        results = run_suite(args.sizes, args.label_density, args.variables,
+                            args.repeat)
+        print_suite(results)
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump({"time": time.time(),
+                           "python": platform.python_version(),
+                           "results": results}, output_file, indent=2)
+        if args.compare:
+            with open(args.compare, 'r') as previous_file:
+                previous = json.load(previous_file)["results"]
+            regressions = compare_results(previous, results)
+            if regressions:
+                sys.exit(f"Regressions: {', '.join(regressions)}")
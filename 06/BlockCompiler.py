@@ -0,0 +1,219 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+from CPUEmulator import CPUEmulator, ROM_SIZE, ADDRESS_MASK, SIGN_BIT, \
+    C_BIT, DEST_A, DEST_D, DEST_M, alu_expression
+
+MAX_BLOCK_LENGTH = 256
+# Returned instead of a ROM address when a block ends the program
+HALTED = -1
+# The condition under which each jump field jumps, given the ALU output
+JUMP_CONDITIONS = {0b001: f"0 < out < {SIGN_BIT}", 0b010: "out == 0",
+                   0b011: f"out < {SIGN_BIT}", 0b100: f"out >= {SIGN_BIT}",
+                   0b101: "out != 0", 0b110: f"out == 0 or out >= {SIGN_BIT}"}
+A_NAME = re.compile(r"\ba\b")
+M_NAME = re.compile(r"\bm\b")
+
+
+class BlockCompiler:
+    """Runs a CPUEmulator's program as compiled Python. The ROM is split
+    into basic blocks at labels, jump targets and after jumps; each block is
+    translated into a Python function that keeps A and D in locals, folds
+    known A values into its RAM accesses and returns the next ROM address.
+    Blocks are compiled the first time they are entered, and the code
+    objects are shared by every block with the same source.
+    """
+    code_cache = dict()
+
+    def __init__(self, emulator: CPUEmulator) -> None:
+        """Prepares to run the emulator's program. The emulator's registers,
+        RAM and cycle counter are used and updated in place.
+
+        Args:
+            emulator (CPUEmulator): the machine to run.
+        """
+        self.emulator = emulator
+        self.leaders = self.find_leaders()
+        self.functions = [None] * ROM_SIZE
+        self.lengths = [0] * ROM_SIZE
+
+    def find_leaders(self) -> typing.Set[int]:
+        """
+        Returns:
+            typing.Set[int]: the addresses that start a block: the program's
+            labels, the targets loaded right before a jump, and the
+            instructions following a jump.
+        """
+        emulator = self.emulator
+        leaders = {0}
+        if emulator.symbol_table is not None:
+            leaders.update(address for address in
+                           emulator.symbol_table.labels.values()
+                           if address < ROM_SIZE)
+        for address in range(emulator.program_size):
+            if not emulator.is_c[address] or not emulator.jumps[address]:
+                continue
+            leaders.add(address + 1)
+            if address and not emulator.is_c[address - 1]:
+                leaders.add(emulator.operands[address - 1] & ADDRESS_MASK)
+        return leaders
+
+    def block_source(self, start: int) -> typing.Tuple[str, int]:
+        """Translates the block starting at an address.
+
+        Args:
+            start (int): the block's first ROM address.
+
+        Returns:
+            typing.Tuple[str, int]: the source of a function named block,
+            taking (ram, a, d) and returning (next address, a, d), and the
+            number of instructions in the block.
+        """
+        emulator = self.emulator
+        lines = ["def block(ram, a, d):"]
+        if start >= emulator.program_size:
+            # Unused ROM is all @0, so running through it only clears A.
+            # Ending on a multiple of the block length lets blocks share code
+            end = min((start // MAX_BLOCK_LENGTH + 1) * MAX_BLOCK_LENGTH,
+                      ROM_SIZE)
+            lines.append(f"    return {end & ADDRESS_MASK}, 0, d")
+            return "\n".join(lines) + "\n", end - start
+        known_a = None
+        address = start
+        while True:
+            word = emulator.rom[address]
+            if not word & C_BIT:
+                known_a = word
+                lines.append(f"    a = {word}")
+            else:
+                expression = alu_expression(word, emulator.extended)
+                if known_a is None:
+                    memory = f"ram[a & {ADDRESS_MASK}]"
+                    target = f"a & {ADDRESS_MASK}"
+                else:
+                    expression = A_NAME.sub(str(known_a), expression)
+                    memory = f"ram[{known_a & ADDRESS_MASK}]"
+                    target = str(known_a & ADDRESS_MASK)
+                expression = M_NAME.sub(memory, expression)
+                dest = emulator.dests[address]
+                jump = emulator.jumps[address]
+                if jump and dest & DEST_A and known_a is None:
+                    # Jumps go to A as it was before this instruction
+                    lines.append(f"    target = {target}")
+                    target = "target"
+                targets = []
+                if dest & DEST_M:
+                    targets.append(memory)
+                if dest & DEST_D:
+                    targets.append("d")
+                if dest & DEST_A:
+                    targets.append("a")
+                    known_a = None
+                if jump and jump != 0b111:
+                    targets.append("out")
+                if targets:
+                    # Chained assignment evaluates the ALU once and stores
+                    # left to right, so RAM[A] is written before A changes
+                    lines.append(f"    {' = '.join(targets)} = {expression}")
+                if jump:
+                    if emulator.halts[address] and target == str(address - 1):
+                        lines.append(f"    return {HALTED}, a, d")
+                        return "\n".join(lines) + "\n", address - start + 1
+                    if emulator.halts[address] and known_a is None:
+                        lines.append(f"    if {target} == {address - 1}:")
+                        lines.append(f"        return {HALTED}, a, d")
+                    if jump == 0b111:
+                        lines.append(f"    return {target}, a, d")
+                    else:
+                        lines.append(f"    if {JUMP_CONDITIONS[jump]}:")
+                        lines.append(f"        return {target}, a, d")
+                        lines.append(f"    return {address + 1}, a, d")
+                    return "\n".join(lines) + "\n", address - start + 1
+            address += 1
+            length = address - start
+            if address == ROM_SIZE or address in self.leaders or \
+                    length == MAX_BLOCK_LENGTH:
+                lines.append(f"    return {address & ADDRESS_MASK}, a, d")
+                return "\n".join(lines) + "\n", length
+
+    def compile_block(self, start: int) -> typing.Callable:
+        """Compiles the block starting at an address, reusing the code
+        object of an identical block when there is one.
+
+        Args:
+            start (int): the block's first ROM address.
+
+        Returns:
+            typing.Callable: the block's function.
+        """
+        source, length = self.block_source(start)
+        code = BlockCompiler.code_cache.get(source)
+        if code is None:
+            code = compile(source, f"<block {start}>", "exec")
+            BlockCompiler.code_cache[source] = code
+        namespace = dict()
+        exec(code, namespace)
+        self.functions[start] = namespace["block"]
+        self.lengths[start] = length
+        return namespace["block"]
+
+    def run(self, max_cycles: int, stop_at: int = HALTED) -> int:
+        """Executes instructions until max_cycles have run or the program
+        ends in an `(END) @END 0;JMP` loop, like CPUEmulator.run. Whole
+        blocks run while they fit in the budget; the remaining instructions
+        are interpreted so the cycle count is exact.
+
+        Args:
+            max_cycles (int): the most instructions to execute.
+            stop_at (int): also stop before executing this ROM address,
+                such as a label.
+
+        Returns:
+            int: the number of instructions executed.
+        """
+        if stop_at != HALTED and stop_at not in self.leaders:
+            # Blocks run past addresses they don't start at, so the stop
+            # becomes a leader and the blocks are compiled again
+            self.leaders.add(stop_at)
+            self.functions = [None] * ROM_SIZE
+        emulator = self.emulator
+        functions = self.functions
+        lengths = self.lengths
+        ram = emulator.ram
+        a, d, pc = emulator.a, emulator.d, emulator.pc
+        cycles = 0
+        while True:
+            if pc == stop_at:
+                emulator.a, emulator.d, emulator.pc = a, d, pc
+                emulator.cycles += cycles
+                return cycles
+            function = functions[pc]
+            if function is None:
+                function = self.compile_block(pc)
+            length = lengths[pc]
+            if cycles + length > max_cycles:
+                break
+            next_pc, a, d = function(ram, a, d)
+            cycles += length
+            if next_pc == HALTED:
+                # Stop on the jump itself, as the interpreter does
+                emulator.pc = pc + length - 1
+                emulator.a, emulator.d = a, d
+                emulator.halted = True
+                emulator.cycles += cycles
+                return cycles
+            pc = next_pc
+        emulator.a, emulator.d, emulator.pc = a, d, pc
+        emulator.cycles += cycles
+        if stop_at == HALTED:
+            return cycles + emulator.run(max_cycles - cycles)
+        while cycles < max_cycles and emulator.pc != stop_at and \
+                not emulator.halted:
+            emulator.step()
+            cycles += 1
+        return cycles
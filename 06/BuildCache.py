@@ -0,0 +1,149 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import Optimizer
+from Code import Code
+from SymbolTable import SymbolTable
+
+# Bump when the assembler's output changes for reasons the tables below
+# don't capture.
+CACHE_FORMAT = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                 "hack-assembler")
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def assembler_version() -> str:
+    """
+    Returns:
+        str: a digest of everything besides the input that decides what the
+        assembler outputs: the Code tables and the predefined symbols.
+    """
+    tables = {"format": CACHE_FORMAT,
+              "prefixes": [Code.regular_prefix, Code.shift_prefix],
+              "dest": Code.dest_dic, "comp": Code.comp_dic,
+              "jump": Code.jump_dic, "symbols": SymbolTable.init_table,
+              "next_free": SymbolTable.init_next_free}
+    return hashlib.sha256(
+        json.dumps(tables, sort_keys=True).encode()).hexdigest()
+
+
+def optimizer_version() -> str:
+    """
+    Returns:
+        str: a digest of the peephole optimizer's source, which holds its
+        rules, so optimized outputs aren't reused once a rule changes.
+    """
+    return hashlib.sha256(inspect.getsource(Optimizer).encode()).hexdigest()
+
+
+class BuildCache:
+    """A directory of assembled programs keyed by the content of their
+    source. Entries are evicted least recently used first once the
+    directory grows past its size limit.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        """Creates the cache directory if it doesn't exist yet.
+
+        Args:
+            cache_dir (str): where the cached outputs are stored.
+            max_bytes (int): the size limit of the cache directory.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = assembler_version()
+        self.optimizer_version = optimizer_version()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, input_path: str, extension: str,
+            optimized: bool = False) -> str:
+        """
+        Args:
+            input_path (str): the .asm file to be assembled.
+            extension (str): the output format, ".hack" or ".hackbin".
+            optimized (bool): whether the peephole optimizer runs.
+
+        Returns:
+            str: the cache key of the assembled file.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.version}{extension}{optimized}".encode())
+        if optimized:
+            digest.update(self.optimizer_version.encode())
+        with open(input_path, 'rb') as input_file:
+            for block in iter(lambda: input_file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest() + extension
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Copies a cached output into place, if there is one.
+
+        Args:
+            key (str): the key returned by key().
+            output_path (str): where the output should be written.
+
+        Returns:
+            bool: True on a cache hit, False otherwise.
+        """
+        entry_path = os.path.join(self.cache_dir, key)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(entry_path, tmp_path)
+        except FileNotFoundError:
+            return False
+        os.replace(tmp_path, output_path)
+        # The modification time doubles as the LRU timestamp
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def store(self, key: str, output_path: str) -> None:
+        """Adds a freshly assembled output to the cache and evicts old
+        entries if the cache is now over its size limit.
+
+        Args:
+            key (str): the key returned by key().
+            output_path (str): the assembled output.
+        """
+        entry_path = os.path.join(self.cache_dir, key)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, entry_path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache fits within
+        its size limit.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Removed by another process sharing the cache
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
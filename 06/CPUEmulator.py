@@ -0,0 +1,308 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import array
+import os
+import time
+import typing
+from Code import Code
+from SymbolTable import SymbolTable
+from HackBinary import WORD_TYPECODE, read_hack
+
+RAM_SIZE = 32768
+ROM_SIZE = 32768
+SCREEN = 16384
+KBD = 24576
+WORD_MASK = 0xFFFF
+ADDRESS_MASK = 0x7FFF
+SIGN_BIT = 0x8000
+C_BIT = 0x8000
+# Bits of a C-instruction
+A_BIT = 1 << 12
+DEST_A = 0b100
+DEST_D = 0b010
+DEST_M = 0b001
+# Which jump bit fires for a negative, zero or positive ALU output
+JUMP_NEGATIVE = 0b100
+JUMP_ZERO = 0b010
+JUMP_POSITIVE = 0b001
+
+
+def regular_expression(comp: int) -> str:
+    """
+    Args:
+        comp (int): the a-bit and the six ALU control bits
+            (a zx nx zy ny f no) of a C-instruction.
+
+    Returns:
+        str: a Python expression over the locals d, a and m computing the
+        ALU output, before masking to 16 bits.
+    """
+    for mnemonic, bits in Code.comp_dic.items():
+        if int(bits, 2) == comp and ">" not in mnemonic and \
+                "<" not in mnemonic:
+            # The regular mnemonics are Python expressions already
+            return mnemonic.lower().replace("!", "~")
+    # Any other control bits, following the ALU's definition
+    x = "d"
+    y = "m" if comp & 0b1000000 else "a"
+    if comp & 0b100000:
+        x = "0"
+    if comp & 0b10000:
+        x = f"~{x}"
+    if comp & 0b1000:
+        y = "0"
+    if comp & 0b100:
+        y = f"~{y}"
+    out = f"({x} + {y})" if comp & 0b10 else f"({x} & {y})"
+    if comp & 0b1:
+        out = f"~{out}"
+    return out
+
+
+def alu_expression(word: int, extended: bool = True) -> str:
+    """
+    Args:
+        word (int): a C-instruction.
+        extended (bool): follow CpuMul and ExtendAlu (shifts when bit 14 is
+            0) rather than the regular CPU, which ignores bits 13 and 14.
+
+    Returns:
+        str: a Python expression over the locals d, a and m (the D register,
+        the A register and RAM[A]) giving the instruction's 16-bit ALU
+        output.
+    """
+    if not extended or (word >> 13) & 0b11 == 0b11:
+        expression = regular_expression((word >> 6) & 0b1111111)
+        if expression in ("0", "1", "d", "a", "m"):
+            # Already a 16-bit value
+            return expression
+        return f"({expression}) & {WORD_MASK}"
+    # ExtendAlu: bit 10 picks x (D) over y (A or M)
+    value = "d" if word & (1 << 10) else ("m" if word & A_BIT else "a")
+    if word & (1 << 14):
+        # Bit 14 set with bit 13 clear passes the chosen input through
+        return value
+    # Bit 11 picks a left shift over a right one; both keep the sign bit
+    if word & (1 << 11):
+        return f"(({value} << 1) & {ADDRESS_MASK}) | ({value} & {SIGN_BIT})"
+    return f"({value} >> 1) | ({value} & {SIGN_BIT})"
+
+
+def load_program(path: str) -> typing.Tuple[array.array,
+                                             typing.Optional[SymbolTable]]:
+    """
+    Args:
+        path (str): an .asm, .hack or packed program.
+
+    Returns:
+        typing.Tuple[array.array, typing.Optional[SymbolTable]]: the
+        program's words, and its symbol table if it was assembled here.
+    """
+    if path.lower().endswith(".asm"):
+        from Main import assemble
+        with open(path, 'r') as source_file:
+            return assemble(source_file)
+    return read_hack(path), None
+
+
+class CPUEmulator:
+    """Runs Hack machine code. The ROM is decoded once into parallel arrays
+    of instruction fields, with every distinct ALU operation compiled to a
+    Python function, so executing an instruction is a few array lookups.
+
+    The CPU follows 05/CPU.hdl, or 05/CpuMul.hdl with its ExtendAlu shift
+    instructions when extended is set. The RAM is the 32K words addressed
+    by addressM, with the screen and keyboard memory maps inside it.
+    """
+    alu_cache = dict()
+
+    def __init__(self, program: typing.Sequence[int] = (),
+                 extended: bool = True) -> None:
+        """Creates a machine with zeroed registers and RAM.
+
+        Args:
+            program (typing.Sequence[int]): the ROM contents.
+            extended (bool): run shift instructions like CpuMul does.
+        """
+        self.extended = extended
+        self.ram = array.array(WORD_TYPECODE, bytes(2 * RAM_SIZE))
+        self.a = 0
+        self.d = 0
+        self.pc = 0
+        self.cycles = 0
+        self.halted = False
+        self.symbol_table = None
+        self.load(program)
+
+    @staticmethod
+    def from_file(path: str, extended: bool = True) -> "CPUEmulator":
+        """
+        Args:
+            path (str): an .asm, .hack or packed program. Assembly sources
+                are assembled first, keeping their symbol table.
+            extended (bool): run shift instructions like CpuMul does.
+
+        Returns:
+            CPUEmulator: a machine with the program in its ROM.
+        """
+        words, symbol_table = load_program(path)
+        emulator = CPUEmulator(words, extended)
+        emulator.symbol_table = symbol_table
+        return emulator
+
+    def alu(self, word: int) -> typing.Callable[[int, int, int], int]:
+        """
+        Args:
+            word (int): a C-instruction.
+
+        Returns:
+            typing.Callable[[int, int, int], int]: its ALU operation, as a
+            function of D, A and RAM[A]. Shared by all instructions with the
+            same operation.
+        """
+        expression = alu_expression(word, self.extended)
+        if expression not in CPUEmulator.alu_cache:
+            CPUEmulator.alu_cache[expression] = eval(
+                f"lambda d, a, m: {expression}")
+        return CPUEmulator.alu_cache[expression]
+
+    def load(self, program: typing.Sequence[int]) -> None:
+        """Loads a program into the ROM and decodes it. Unused ROM words are
+        zero, i.e. @0.
+
+        Args:
+            program (typing.Sequence[int]): the ROM contents.
+        """
+        if len(program) > ROM_SIZE:
+            raise ValueError(f"program has {len(program)} instructions, the "
+                             f"ROM holds {ROM_SIZE}")
+        self.rom = array.array(WORD_TYPECODE, program)
+        self.rom.frombytes(bytes(2 * (ROM_SIZE - len(program))))
+        self.program_size = len(program)
+        self.is_c = bytearray(ROM_SIZE)
+        self.operands = array.array(WORD_TYPECODE, self.rom)
+        self.alus = [None] * ROM_SIZE
+        self.dests = bytearray(ROM_SIZE)
+        self.jumps = bytearray(ROM_SIZE)
+        # Jumps that form an `(END) @END 0;JMP` loop, which ends the program
+        self.halts = bytearray(ROM_SIZE)
+        for address in range(len(program)):
+            word = self.rom[address]
+            if not word & C_BIT:
+                continue
+            self.is_c[address] = 1
+            self.alus[address] = self.alu(word)
+            self.dests[address] = (word >> 3) & 0b111
+            self.jumps[address] = word & 0b111
+            if address and self.jumps[address] == 0b111 and \
+                    not self.dests[address] and \
+                    self.rom[address - 1] == address - 1:
+                self.halts[address] = 1
+
+    def reset(self) -> None:
+        """Restarts the program, like setting the CPU's reset input."""
+        self.pc = 0
+        self.halted = False
+
+    def set_key(self, key: int) -> None:
+        """
+        Args:
+            key (int): the code of the pressed key, or 0 for none.
+        """
+        self.ram[KBD] = key
+
+    def step(self) -> None:
+        """Executes a single instruction."""
+        self.run(1)
+
+    def run(self, max_cycles: int) -> int:
+        """Executes instructions until max_cycles have run or the program
+        ends in an `(END) @END 0;JMP` loop.
+
+        Args:
+            max_cycles (int): the most instructions to execute.
+
+        Returns:
+            int: the number of instructions executed.
+        """
+        is_c = self.is_c
+        operands = self.operands
+        alus = self.alus
+        dests = self.dests
+        jumps = self.jumps
+        halts = self.halts
+        ram = self.ram
+        a, d, pc = self.a, self.d, self.pc
+        cycles = 0
+        while cycles < max_cycles:
+            cycles += 1
+            if not is_c[pc]:
+                a = operands[pc]
+                pc = (pc + 1) & ADDRESS_MASK
+                continue
+            out = alus[pc](d, a, ram[a & ADDRESS_MASK])
+            jump = jumps[pc]
+            if jump and jump & (JUMP_ZERO if out == 0 else JUMP_NEGATIVE
+                                if out & SIGN_BIT else JUMP_POSITIVE):
+                if halts[pc] and a == pc - 1:
+                    self.halted = True
+                    break
+                next_pc = a & ADDRESS_MASK
+            else:
+                next_pc = (pc + 1) & ADDRESS_MASK
+            dest = dests[pc]
+            if dest:
+                if dest & DEST_M:
+                    ram[a & ADDRESS_MASK] = out
+                if dest & DEST_D:
+                    d = out
+                if dest & DEST_A:
+                    a = out
+            pc = next_pc
+        self.a, self.d, self.pc = a, d, pc
+        self.cycles += cycles
+        return cycles
+
+
+def parse_assignment(text: str) -> typing.Tuple[int, int]:
+    address, _, value = text.partition("=")
+    return int(address), int(value) & WORD_MASK
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="CPUEmulator")
+    arg_parser.add_argument("program", help="an .asm, .hack or packed program")
+    arg_parser.add_argument("--max-cycles", type=int, default=10_000_000)
+    arg_parser.add_argument("--regular", action="store_true",
+                            help="run like CPU.hdl, without shift support")
+    arg_parser.add_argument("--restore", metavar="SNAPSHOT",
+                            help="start from a snapshot taken by Snapshot.py")
+    arg_parser.add_argument("--set", nargs="*", default=[],
+                            metavar="ADDRESS=VALUE",
+                            help="RAM values to set before running")
+    arg_parser.add_argument("--show", nargs="*", type=int, default=[],
+                            metavar="ADDRESS",
+                            help="RAM addresses to print after running")
+    args = arg_parser.parse_args()
+
+    emulator = CPUEmulator.from_file(os.path.abspath(args.program),
+                                     not args.regular)
+    if args.restore:
+        from Snapshot import restore_snapshot
+        restore_snapshot(emulator, args.restore)
+    for assignment in args.set:
+        address, value = parse_assignment(assignment)
+        emulator.ram[address] = value
+    start = time.perf_counter()
+    cycles = emulator.run(args.max_cycles)
+    seconds = time.perf_counter() - start
+    state = "halted" if emulator.halted else "stopped"
+    print(f"{state} after {cycles} cycles in {seconds:.3f}s "
+          f"({cycles / max(seconds, 1e-9) / 1e6:.2f}M instructions/s)")
+    for address in args.show:
+        print(f"RAM[{address}] = {emulator.ram[address]}")
@@ -4,10 +4,15 @@ https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
 and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
 Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import functools
+
+C_COMMAND_CACHE_SIZE = 4096
 
 
 class Code:
     """Translates Hack assembly language mnemonics into binary codes."""
+    regular_prefix = "111"
+    shift_prefix = "101"
     dest_dic = {"": "000", "M": "001", "D": "010", "MD": "011", "A": "100",
                 "AM": "101", "AD": "110", "ADM": "111"}
     jump_dic = {"": "000", "JGT": "001", "JEQ": "010", "JGE": "011", "JLT":
@@ -60,3 +65,25 @@ class Code:
         """
         # Your code goes here!
         return Code.jump_dic[mnemonic]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=C_COMMAND_CACHE_SIZE)
+    def c_command(command: str) -> int:
+        """Encodes a whole C-command. Compiled programs repeat the same few
+        hundred commands over and over, so results are memoized in a bounded
+        LRU cache; Code.c_command.cache_info() reports its hits and misses.
+
+        Args:
+            command (str): a C-command without white space, e.g. "AM=M-1".
+
+        Returns:
+            int: the 16-bit instruction word.
+        """
+        dest, _, comp_jump = command.rpartition("=")
+        comp, _, jump = comp_jump.partition(";")
+        if ">" in comp or "<" in comp:
+            prefix = Code.shift_prefix
+        else:
+            prefix = Code.regular_prefix
+        return int(prefix + Code.comp_dic[comp] + Code.dest_dic[dest] +
+                   Code.jump_dic[jump], 2)
@@ -0,0 +1,163 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import collections
+import sys
+import typing
+from Code import Code
+from SymbolTable import SymbolTable
+from HackBinary import read_hack
+
+WORD_COUNT = 1 << 16
+A_LIMIT = 1 << 15
+JUMP_MASK = 0b111
+
+
+class Disassembler:
+    """Translates Hack machine code back into assembly. Every possible word
+    is decoded once into a shared table, so disassembling a program is a
+    single table lookup per instruction.
+    """
+    decode_table = None
+
+    def __init__(self, symbol_table: typing.Optional[SymbolTable] = None) \
+            -> None:
+        """Prepares the decode table and, if given, the symbol names.
+
+        Args:
+            symbol_table (typing.Optional[SymbolTable]): the table the
+                assembler built. Labels are restored before the instructions
+                they mark and in A-commands that feed a jump; variables are
+                restored in the remaining A-commands.
+        """
+        if Disassembler.decode_table is None:
+            Disassembler.decode_table = Disassembler.build_decode_table()
+        self.labels_at = collections.defaultdict(list)
+        self.label_names = dict()
+        self.variable_names = dict()
+        if symbol_table is not None:
+            for symbol, address in symbol_table.labels.items():
+                self.labels_at[address].append(symbol)
+                self.label_names.setdefault(address, symbol)
+            for symbol, address in symbol_table.variables().items():
+                self.variable_names.setdefault(address, symbol)
+
+    @staticmethod
+    def build_decode_table() -> typing.List[typing.Optional[str]]:
+        """
+        Returns:
+            typing.List[typing.Optional[str]]: the assembly of every 16-bit
+            word, indexed by the word, or None for words that aren't valid
+            instructions.
+        """
+        dest = {int(bits, 2): mnemonic
+                for mnemonic, bits in Code.dest_dic.items()}
+        jump = {int(bits, 2): mnemonic
+                for mnemonic, bits in Code.jump_dic.items()}
+        # The shift mnemonics reuse regular comp bits, so the two prefixes
+        # are inverted separately
+        comp = {Code.regular_prefix: {}, Code.shift_prefix: {}}
+        for mnemonic, bits in Code.comp_dic.items():
+            if ">" in mnemonic or "<" in mnemonic:
+                comp[Code.shift_prefix][int(bits, 2)] = mnemonic
+            else:
+                comp[Code.regular_prefix][int(bits, 2)] = mnemonic
+
+        table = ["@" + str(word) for word in range(A_LIMIT)]
+        for word in range(A_LIMIT, WORD_COUNT):
+            prefix = format(word >> 13, "03b")
+            comp_mnemonic = comp.get(prefix, {}).get((word >> 6) & 0b1111111)
+            if comp_mnemonic is None:
+                table.append(None)
+                continue
+            dest_mnemonic = dest[(word >> 3) & 0b111]
+            jump_mnemonic = jump[word & JUMP_MASK]
+            command = comp_mnemonic
+            if dest_mnemonic:
+                command = dest_mnemonic + "=" + command
+            if jump_mnemonic:
+                command += ";" + jump_mnemonic
+            table.append(command)
+        return table
+
+    def disassemble(self, words: typing.Sequence[int]) -> typing.List[str]:
+        """
+        Args:
+            words (typing.Sequence[int]): the machine code.
+
+        Returns:
+            typing.List[str]: the assembly, one command per line.
+
+        Raises:
+            ValueError: if a word isn't a valid instruction. Words with the
+                top bit set don't fit in an A-command, so no assembly would
+                assemble back to them.
+        """
+        table = Disassembler.decode_table
+        commands = [table[word] for word in words]
+        if None in commands:
+            address = commands.index(None)
+            raise ValueError(f"the word at {address}, "
+                             f"{words[address]:016b}, isn't an instruction")
+        if not self.labels_at and not self.variable_names:
+            return commands
+
+        lines = []
+        last = len(words) - 1
+        # The assembler allocates variables in order of first use, so a
+        # variable's name is only restored once every variable below it has
+        # been named; earlier uses stay numeric and re-assembly is exact
+        pending = sorted(self.variable_names)
+        named = set()
+        for address, word in enumerate(words):
+            for label in self.labels_at.get(address, ()):
+                lines.append(f"({label})")
+            if word < A_LIMIT:
+                feeds_jump = address < last and \
+                    words[address + 1] >= A_LIMIT and \
+                    words[address + 1] & JUMP_MASK
+                if feeds_jump and word in self.label_names:
+                    lines.append("@" + self.label_names[word])
+                    continue
+                if not feeds_jump and pending and word == pending[0]:
+                    named.add(pending.pop(0))
+                if not feeds_jump and word in named:
+                    lines.append("@" + self.variable_names[word])
+                    continue
+            lines.append(commands[address])
+        # Labels may also mark the address just past the last instruction
+        for label in self.labels_at.get(len(words), ()):
+            lines.append(f"({label})")
+        return lines
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="Disassembler")
+    arg_parser.add_argument("program", help="a .hack or packed program")
+    arg_parser.add_argument(
+        "--symbols", metavar="ASM",
+        help="the program's source, to restore label and variable names")
+    arg_parser.add_argument(
+        "--output", help="write the assembly here instead of printing it")
+    args = arg_parser.parse_args()
+
+    symbol_table = None
+    if args.symbols:
+        from Main import assemble
+        with open(args.symbols, 'r') as source_file:
+            symbol_table = assemble(source_file)[1]
+    try:
+        lines = Disassembler(symbol_table).disassemble(
+            read_hack(args.program))
+    except ValueError as error:
+        sys.exit(f"Can't disassemble {args.program}: {error}")
+    text = "".join(line + "\n" for line in lines)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(text)
+    else:
+        print(text, end="")
@@ -0,0 +1,365 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import time
+import typing
+from CPUEmulator import CPUEmulator, RAM_SIZE, WORD_MASK, ADDRESS_MASK, \
+    SIGN_BIT, DEST_A, DEST_D, DEST_M, JUMP_NEGATIVE, JUMP_ZERO, \
+    JUMP_POSITIVE, alu_expression
+from BlockCompiler import BlockCompiler, HALTED, M_NAME
+
+# Cycles run between looking for a loop to skip
+CHECK_INTERVAL = 20_000
+# The longest loop iteration that is recorded, in cycles
+MAX_PERIOD = 50_000
+# How many enclosing loops are tried after a loop is skipped to its exit
+MAX_NESTING = 4
+# The iteration count of a loop whose branches never change
+UNBOUNDED = 1 << 62
+# Words of RAM compared at once when looking for changed addresses
+CHUNK_SIZE = 256
+# A value as a function of the iteration number i: (base + step * i) mod 2^16
+Affine = typing.Tuple[int, int]
+
+
+def steady_iterations(value: Affine) -> int:
+    """
+    Args:
+        value (Affine): an ALU output over the iterations of a loop.
+
+    Returns:
+        int: for how many iterations, starting at the first, it stays zero,
+        positive or negative, so a jump on it goes the same way.
+    """
+    base, step = value
+    if not step:
+        return UNBOUNDED
+    if not base:
+        return 1
+    if step < SIGN_BIT:
+        last = SIGN_BIT - 1 if base < SIGN_BIT else WORD_MASK
+        return (last - base) // step + 1
+    first = 1 if base < SIGN_BIT else SIGN_BIT
+    return (base - first) // (WORD_MASK + 1 - step) + 1
+
+
+def jumps_on(jump: int, out: int) -> bool:
+    """
+    Args:
+        jump (int): the jump bits of a C-instruction.
+        out (int): its ALU output.
+
+    Returns:
+        bool: whether it jumps.
+    """
+    return bool(jump & (JUMP_ZERO if out == 0 else JUMP_NEGATIVE
+                        if out & SIGN_BIT else JUMP_POSITIVE))
+
+
+class FastForward:
+    """Runs a program with the block compiler, skipping busy-wait loops such
+    as the OS's Keyboard.keyPressed polling and Sys.wait delay loops.
+
+    Every CHECK_INTERVAL cycles, the blocks run between two visits to the
+    same address are recorded. The RAM and registers that changed between
+    the visits are taken as counters, and the recorded iteration is run
+    symbolically, each value an affine function of the iteration number. If
+    the iteration moves every counter by the same step again, reads and
+    writes fixed addresses, and no jump in it changes direction before some
+    iteration, then all iterations up to that one take the same path and
+    their end state is computed directly. A loop that changes nothing, such
+    as a loop polling the keyboard, never exits by itself and is skipped to
+    the end of the run, so callers that change the keyboard stop runs there.
+    Skipped cycles are counted as executed.
+    """
+
+    def __init__(self, emulator: CPUEmulator,
+                 check_interval: int = CHECK_INTERVAL,
+                 max_period: int = MAX_PERIOD) -> None:
+        """Prepares to run the emulator's program. The emulator's registers,
+        RAM and cycle counter are used and updated in place.
+
+        Args:
+            emulator (CPUEmulator): the machine to run.
+            check_interval (int): cycles run between looking for loops.
+            max_period (int): the longest loop iteration to skip, in cycles.
+        """
+        self.emulator = emulator
+        self.compiler = BlockCompiler(emulator)
+        self.check_interval = check_interval
+        self.max_period = max_period
+        self.reads_memory = dict()
+        self.skipped_cycles = 0
+        self.skips = 0
+
+    def run(self, max_cycles: int) -> int:
+        """Executes instructions until max_cycles have run or the program
+        ends in an `(END) @END 0;JMP` loop, like CPUEmulator.run, skipping
+        the loops it can.
+
+        Args:
+            max_cycles (int): the most instructions to execute.
+
+        Returns:
+            int: the number of instructions executed, including skipped ones.
+        """
+        emulator = self.emulator
+        cycles = 0
+        while True:
+            cycles += self.compiler.run(min(self.check_interval,
+                                            max_cycles - cycles))
+            if cycles < max_cycles and not emulator.halted:
+                cycles += self.fast_forward(max_cycles - cycles)
+            if cycles >= max_cycles or emulator.halted:
+                return cycles
+
+    def trace(self, max_cycles: int, stop: typing.Callable[[int], bool]
+              ) -> typing.Tuple[int, typing.List[int]]:
+        """Runs whole blocks until stop is true for the next one's address,
+        the next block doesn't fit in max_cycles or the program halts.
+
+        Args:
+            max_cycles (int): the most instructions to execute.
+            stop (typing.Callable[[int], bool]): checked after each block.
+
+        Returns:
+            typing.Tuple[int, typing.List[int]]: the number of instructions
+            executed and the addresses of the blocks that ran.
+        """
+        emulator = self.emulator
+        compiler = self.compiler
+        functions = compiler.functions
+        lengths = compiler.lengths
+        ram = emulator.ram
+        a, d, pc = emulator.a, emulator.d, emulator.pc
+        blocks = []
+        cycles = 0
+        while True:
+            function = functions[pc]
+            if function is None:
+                function = compiler.compile_block(pc)
+            length = lengths[pc]
+            if cycles + length > max_cycles:
+                break
+            next_pc, a, d = function(ram, a, d)
+            cycles += length
+            blocks.append(pc)
+            if next_pc == HALTED:
+                pc = pc + length - 1
+                emulator.halted = True
+                break
+            pc = next_pc
+            if stop(pc):
+                break
+        emulator.a, emulator.d, emulator.pc = a, d, pc
+        emulator.cycles += cycles
+        return cycles, blocks
+
+    def fast_forward(self, max_cycles: int) -> int:
+        """Records the loop being run and skips as many of its iterations as
+        is safe. When it is skipped to its exit, the loops enclosing it are
+        tried next, so nested delay loops are skipped together.
+
+        Args:
+            max_cycles (int): the most instructions to execute or skip.
+
+        Returns:
+            int: the number of instructions executed and skipped.
+        """
+        emulator = self.emulator
+        used = 0
+        for _ in range(MAX_NESTING):
+            # Start on a block boundary, which a loop can come back to
+            cycles, _ = self.trace(max_cycles - used, lambda pc: True)
+            used += cycles
+            if emulator.halted:
+                return used
+            head = emulator.pc
+            a, d, ram = emulator.a, emulator.d, emulator.ram[:]
+            cycles, blocks = self.trace(
+                min(max_cycles - used, self.max_period),
+                lambda pc: pc == head)
+            used += cycles
+            if emulator.halted or emulator.pc != head or not blocks:
+                return used
+            period = cycles
+            deltas = self.deltas(a, d, ram)
+            iterations = self.iterations(blocks, deltas)
+            skipped = min(iterations, (max_cycles - used) // period)
+            if not skipped:
+                return used
+            self.skip(deltas, skipped)
+            emulator.cycles += skipped * period
+            self.skipped_cycles += skipped * period
+            self.skips += 1
+            used += skipped * period
+            if skipped != iterations:
+                return used
+            # Run to the loop's exit, in case it's inside a longer loop
+            inside = set(blocks)
+            cycles, _ = self.trace(min(max_cycles - used, 2 * period),
+                                   lambda pc: pc not in inside)
+            used += cycles
+            if emulator.halted or emulator.pc in inside:
+                return used
+        return used
+
+    def deltas(self, a: int, d: int, ram) -> typing.Dict[str, int]:
+        """
+        Args:
+            a (int): A at the previous visit to the loop's head.
+            d (int): D at the previous visit.
+            ram (array.array): the RAM at the previous visit.
+
+        Returns:
+            typing.Dict[str, int]: how much A, D and each RAM address that
+            changed since then have moved, mod 2^16, by "a", "d" or address.
+        """
+        emulator = self.emulator
+        current = emulator.ram
+        deltas = {"a": (emulator.a - a) & WORD_MASK,
+                  "d": (emulator.d - d) & WORD_MASK}
+        if current == ram:
+            return deltas
+        for start in range(0, RAM_SIZE, CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            if current[start:end] == ram[start:end]:
+                continue
+            for address in range(start, end):
+                if current[address] != ram[address]:
+                    deltas[address] = (current[address] - ram[address]) & \
+                        WORD_MASK
+        return deltas
+
+    def alu_is_affine(self, word: int) -> bool:
+        """
+        Args:
+            word (int): a C-instruction.
+
+        Returns:
+            bool: True if its ALU output is an affine function of D, A and M
+            mod 2^16: an addition, a negation or a constant, and not an And
+            of two variables or a shift.
+        """
+        if self.emulator.extended and (word >> 13) & 0b11 != 0b11:
+            return bool(word & (1 << 14))
+        comp = (word >> 6) & 0b111111
+        # f chooses addition, zx and zy turn an And into a constant or a copy
+        return bool(comp & 0b10 or comp & 0b100000 or comp & 0b1000)
+
+    def iterations(self, blocks: typing.List[int],
+                   deltas: typing.Dict[str, int]) -> int:
+        """Runs an iteration of the recorded loop symbolically from the
+        current state, with every counter moving by its delta per iteration.
+
+        Args:
+            blocks (typing.List[int]): the blocks of an iteration, starting
+                at the loop's head.
+            deltas (typing.Dict[str, int]): as returned by deltas.
+
+        Returns:
+            int: how many iterations from here on are known to take the
+            recorded path and move every counter by its delta, or 0.
+        """
+        emulator = self.emulator
+        lengths = self.compiler.lengths
+        ram = emulator.ram
+        a = (emulator.a, deltas["a"])
+        d = (emulator.d, deltas["d"])
+        written = dict()
+        iterations = UNBOUNDED
+        for index, start in enumerate(blocks):
+            next_pc = blocks[index + 1] if index + 1 < len(blocks) \
+                else blocks[0]
+            for address in range(start, start + lengths[start]):
+                if not emulator.is_c[address]:
+                    a = (emulator.operands[address], 0)
+                    continue
+                word = emulator.rom[address]
+                if word not in self.reads_memory:
+                    self.reads_memory[word] = bool(M_NAME.search(
+                        alu_expression(word, emulator.extended)))
+                dest = emulator.dests[address]
+                jump = emulator.jumps[address]
+                location = a[0] & ADDRESS_MASK
+                if a[1] and (self.reads_memory[word] or dest & DEST_M or jump):
+                    # Only fixed addresses can be followed
+                    return 0
+                m = (0, 0)
+                if self.reads_memory[word]:
+                    m = written.get(location, (ram[location],
+                                               deltas.get(location, 0)))
+                alu = emulator.alus[address]
+                out = (alu(d[0], a[0], m[0]), 0)
+                if a[1] or d[1] or m[1]:
+                    if not self.alu_is_affine(word):
+                        return 0
+                    step = alu((d[0] + d[1]) & WORD_MASK,
+                               (a[0] + a[1]) & WORD_MASK,
+                               (m[0] + m[1]) & WORD_MASK)
+                    out = (out[0], (step - out[0]) & WORD_MASK)
+                if jump and location != (address + 1) & ADDRESS_MASK:
+                    taken = next_pc == location
+                    if jumps_on(jump, out[0]) != taken:
+                        return 0
+                    iterations = min(iterations, steady_iterations(out))
+                if dest & DEST_M:
+                    written[location] = out
+                if dest & DEST_D:
+                    d = out
+                if dest & DEST_A:
+                    a = out
+        # The iteration must end where the next one starts
+        if a != ((emulator.a + deltas["a"]) & WORD_MASK, deltas["a"]) or \
+                d != ((emulator.d + deltas["d"]) & WORD_MASK, deltas["d"]):
+            return 0
+        for address, delta in deltas.items():
+            if address not in ("a", "d") and address not in written:
+                return 0
+        for address, value in written.items():
+            delta = deltas.get(address, 0)
+            if value != ((ram[address] + delta) & WORD_MASK, delta):
+                return 0
+        return iterations
+
+    def skip(self, deltas: typing.Dict[str, int], iterations: int) -> None:
+        """Moves the machine's counters forward by whole iterations.
+
+        Args:
+            deltas (typing.Dict[str, int]): as returned by deltas.
+            iterations (int): how many iterations to skip.
+        """
+        emulator = self.emulator
+        for address, delta in deltas.items():
+            if address == "a":
+                emulator.a = (emulator.a + iterations * delta) & WORD_MASK
+            elif address == "d":
+                emulator.d = (emulator.d + iterations * delta) & WORD_MASK
+            else:
+                emulator.ram[address] = \
+                    (emulator.ram[address] + iterations * delta) & WORD_MASK
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="FastForward")
+    arg_parser.add_argument("program", help="an .asm, .hack or packed program")
+    arg_parser.add_argument("--max-cycles", type=int, default=100_000_000)
+    arg_parser.add_argument("--regular", action="store_true",
+                            help="run like CPU.hdl, without shift support")
+    args = arg_parser.parse_args()
+
+    emulator = CPUEmulator.from_file(os.path.abspath(args.program),
+                                     not args.regular)
+    fast_forward = FastForward(emulator)
+    start = time.perf_counter()
+    cycles = fast_forward.run(args.max_cycles)
+    seconds = time.perf_counter() - start
+    state = "halted" if emulator.halted else "stopped"
+    print(f"{state} after {cycles} cycles in {seconds:.3f}s, "
+          f"{fast_forward.skipped_cycles} of them skipped in "
+          f"{fast_forward.skips} loops")
@@ -0,0 +1,324 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import struct
+import sys
+import typing
+import zlib
+import numpy
+from CPUEmulator import CPUEmulator, SCREEN, KBD
+from BlockCompiler import BlockCompiler
+
+SCREEN_ROWS = 256
+SCREEN_COLUMNS = 512
+ROW_WORDS = SCREEN_COLUMNS // 16
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+GIF_SIGNATURES = (b"GIF87a", b"GIF89a")
+GIF_EXTENSION = 0x21
+GIF_IMAGE = 0x2C
+GIF_TRAILER = 0x3B
+MAX_LZW_BITS = 12
+# Reference pixels darker than this are black
+INK_THRESHOLD = 128
+DEFAULT_TOLERANCE = 0.05
+
+
+def ram_array(emulator: CPUEmulator) -> numpy.ndarray:
+    """
+    Args:
+        emulator (CPUEmulator): a machine.
+
+    Returns:
+        numpy.ndarray: its RAM as a uint16 array sharing the emulator's
+        memory, so writes through either are seen by both.
+    """
+    return numpy.frombuffer(emulator.ram, dtype=numpy.uint16)
+
+
+def screen_words(emulator: CPUEmulator) -> numpy.ndarray:
+    """
+    Args:
+        emulator (CPUEmulator): a machine.
+
+    Returns:
+        numpy.ndarray: a 256x32 view of the screen memory map.
+    """
+    return ram_array(emulator)[SCREEN:KBD].reshape(SCREEN_ROWS, ROW_WORDS)
+
+
+def screen_bits(emulator: CPUEmulator) -> numpy.ndarray:
+    """
+    Args:
+        emulator (CPUEmulator): a machine.
+
+    Returns:
+        numpy.ndarray: the screen as a 256x512 uint8 array, 1 for black.
+        Bit 0 of each word is the leftmost of its 16 pixels.
+    """
+    # Little-endian bytes hold each word's bits 0-7 first, then 8-15
+    words = screen_words(emulator).astype("<u2", copy=False)
+    return numpy.unpackbits(words.view(numpy.uint8), axis=1,
+                            bitorder="little")
+
+
+def write_pbm(bits: numpy.ndarray, path: str) -> None:
+    """Writes a binary (P4) PBM image.
+
+    Args:
+        bits (numpy.ndarray): the pixels, 1 for black.
+        path (str): the image to write.
+    """
+    rows, columns = bits.shape
+    with open(path, 'wb') as image_file:
+        image_file.write(f"P4\n{columns} {rows}\n".encode())
+        image_file.write(numpy.packbits(bits, axis=1).tobytes())
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + \
+        struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(bits: numpy.ndarray, path: str) -> None:
+    """Writes a 1-bit grayscale PNG image.
+
+    Args:
+        bits (numpy.ndarray): the pixels, 1 for black.
+        path (str): the image to write.
+    """
+    rows, columns = bits.shape
+    # In grayscale 1 is white; each row starts with filter type 0
+    packed = numpy.packbits(1 - bits, axis=1)
+    scanlines = numpy.hstack([numpy.zeros((rows, 1), numpy.uint8), packed])
+    header = struct.pack(">IIBBBBB", columns, rows, 1, 0, 0, 0, 0)
+    with open(path, 'wb') as image_file:
+        image_file.write(PNG_SIGNATURE + png_chunk(b"IHDR", header) +
+                         png_chunk(b"IDAT", zlib.compress(scanlines.tobytes()))
+                         + png_chunk(b"IEND", b""))
+
+
+def write_frame(bits: numpy.ndarray, path: str) -> None:
+    """Writes a PNG, or a PBM if the path ends with .pbm."""
+    if path.lower().endswith(".pbm"):
+        write_pbm(bits, path)
+    else:
+        write_png(bits, path)
+
+
+def gif_blocks(data: bytes, position: int) -> typing.Tuple[bytes, int]:
+    """
+    Args:
+        data (bytes): a GIF file.
+        position (int): where a sequence of data sub-blocks starts.
+
+    Returns:
+        typing.Tuple[bytes, int]: the sub-blocks joined, and the position
+        after their terminator.
+    """
+    blocks = []
+    while data[position]:
+        size = data[position]
+        blocks.append(data[position + 1:position + 1 + size])
+        position += 1 + size
+    return b"".join(blocks), position + 1
+
+
+def lzw_decode(data: bytes, minimum_size: int, pixels: int) -> bytearray:
+    """
+    Args:
+        data (bytes): a GIF image's LZW-compressed color indices.
+        minimum_size (int): its minimum code size.
+        pixels (int): how many indices it holds.
+
+    Returns:
+        bytearray: the color indices.
+    """
+    clear = 1 << minimum_size
+    end = clear + 1
+    table = [bytes([index]) for index in range(clear)] + [b"", b""]
+    size = minimum_size + 1
+    output = bytearray()
+    previous = None
+    buffer = bits = 0
+    for byte in data:
+        buffer |= byte << bits
+        bits += 8
+        while bits >= size:
+            code = buffer & ((1 << size) - 1)
+            buffer >>= size
+            bits -= size
+            if code == clear:
+                del table[end + 1:]
+                size = minimum_size + 1
+                previous = None
+                continue
+            if code == end:
+                return output[:pixels]
+            if code < len(table):
+                entry = table[code]
+                if previous is not None:
+                    table.append(previous + entry[:1])
+            elif previous is not None:
+                entry = previous + previous[:1]
+                table.append(entry)
+            else:
+                raise ValueError("the GIF's image data is corrupt")
+            output += entry
+            previous = entry
+            if len(table) == 1 << size and size < MAX_LZW_BITS:
+                size += 1
+    return output[:pixels]
+
+
+def read_gif(path: str) -> numpy.ndarray:
+    """Decodes the first image of a GIF file, without Pillow.
+
+    Args:
+        path (str): the GIF file.
+
+    Returns:
+        numpy.ndarray: the image's brightness, 0 (black) to 255, with the
+        image drawn over the background color of its logical screen.
+    """
+    with open(path, 'rb') as image_file:
+        data = image_file.read()
+    if data[:6] not in GIF_SIGNATURES:
+        raise ValueError(f"{path} isn't a GIF image")
+    width, height, flags, background = struct.unpack("<HHBB", data[6:12])
+    position = 13
+    palette = None
+    if flags & 0x80:
+        colors = 2 << (flags & 0x07)
+        palette = data[position:position + 3 * colors]
+        position += 3 * colors
+    while data[position] != GIF_TRAILER:
+        kind = data[position]
+        if kind == GIF_EXTENSION:
+            _, position = gif_blocks(data, position + 2)
+            continue
+        if kind != GIF_IMAGE:
+            raise ValueError(f"{path} has an unknown block {kind:#x}")
+        left, top, columns, rows, image_flags = struct.unpack(
+            "<HHHHB", data[position + 1:position + 10])
+        position += 10
+        if image_flags & 0x80:
+            colors = 2 << (image_flags & 0x07)
+            palette = data[position:position + 3 * colors]
+            position += 3 * colors
+        if palette is None:
+            raise ValueError(f"{path} has no color table")
+        minimum_size = data[position]
+        compressed, position = gif_blocks(data, position + 1)
+        indices = numpy.frombuffer(
+            lzw_decode(compressed, minimum_size, rows * columns),
+            dtype=numpy.uint8).reshape(rows, columns)
+        if image_flags & 0x40:
+            # Interlaced rows are stored every 8th from 0, every 8th from
+            # 4, every 4th from 2, then every 2nd from 1
+            order = numpy.concatenate([numpy.arange(start, rows, step)
+                                       for start, step in ((0, 8), (4, 8),
+                                                           (2, 4), (1, 2))])
+            interlaced = indices
+            indices = numpy.empty_like(interlaced)
+            indices[order] = interlaced
+        rgb = numpy.frombuffer(palette, dtype=numpy.uint8).reshape(-1, 3)
+        gray = (rgb.astype(numpy.uint32) @ numpy.array([299, 587, 114]) //
+                1000).astype(numpy.uint8)
+        image = numpy.full((height, width), gray[background]
+                           if background < len(gray) else 255, numpy.uint8)
+        image[top:top + rows, left:left + columns] = gray[indices]
+        return image
+    raise ValueError(f"{path} has no image")
+
+
+def resize_nearest(bits: numpy.ndarray, rows: int, columns: int) \
+        -> numpy.ndarray:
+    """
+    Args:
+        bits (numpy.ndarray): an image.
+        rows (int): the height to scale it to.
+        columns (int): the width to scale it to.
+
+    Returns:
+        numpy.ndarray: the image scaled, each pixel taken from the nearest
+        pixel of the original.
+    """
+    source_rows, source_columns = bits.shape
+    row_indices = (numpy.arange(rows) * 2 + 1) * source_rows // (2 * rows)
+    column_indices = (numpy.arange(columns) * 2 + 1) * source_columns // \
+        (2 * columns)
+    return bits[row_indices][:, column_indices]
+
+
+def ink_box(bits: numpy.ndarray) -> typing.Optional[numpy.ndarray]:
+    """
+    Returns:
+        typing.Optional[numpy.ndarray]: the smallest part of the image
+        holding all of its black pixels, or None if it has none.
+    """
+    rows = numpy.flatnonzero(bits.any(axis=1))
+    columns = numpy.flatnonzero(bits.any(axis=0))
+    if not len(rows):
+        return None
+    return bits[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+
+
+def compare_to_reference(bits: numpy.ndarray, reference_path: str) -> float:
+    """Compares the screen to a reference screenshot, such as the GIFs in
+    12/*Test. The screenshots are scaled and framed differently from the
+    screen, so both images are cropped to their black pixels and the screen
+    is resized to the reference's crop before counting differing pixels.
+
+    Args:
+        bits (numpy.ndarray): the screen, as returned by screen_bits.
+        reference_path (str): the reference image.
+
+    Returns:
+        float: the fraction of differing pixels, from 0 (the same) to 1.
+    """
+    reference = ink_box(read_gif(reference_path) < INK_THRESHOLD)
+    screen = ink_box(bits.astype(bool))
+    if reference is None or screen is None:
+        return 0.0 if reference is None and screen is None else 1.0
+    screen = resize_nearest(screen, *reference.shape)
+    return float(numpy.count_nonzero(screen != reference)) / screen.size
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="Framebuffer")
+    arg_parser.add_argument("program", help="an .asm, .hack or packed program")
+    arg_parser.add_argument("--max-cycles", type=int, default=10_000_000)
+    arg_parser.add_argument("--output", default="screen.png",
+                            help="the frame to write, .png or .pbm")
+    arg_parser.add_argument("--every", type=int, metavar="CYCLES",
+                            help="also write a numbered frame this often")
+    arg_parser.add_argument("--compare", metavar="IMAGE",
+                            help="compare the last frame to a screenshot")
+    arg_parser.add_argument("--tolerance", type=float,
+                            default=DEFAULT_TOLERANCE,
+                            help="the largest fraction of differing pixels")
+    args = arg_parser.parse_args()
+
+    emulator = CPUEmulator.from_file(os.path.abspath(args.program))
+    compiler = BlockCompiler(emulator)
+    base, extension = os.path.splitext(args.output)
+    frame = 0
+    while emulator.cycles < args.max_cycles and not emulator.halted:
+        budget = args.max_cycles - emulator.cycles
+        compiler.run(min(budget, args.every) if args.every else budget)
+        if args.every:
+            write_frame(screen_bits(emulator), f"{base}.{frame:05}{extension}")
+            frame += 1
+    bits = screen_bits(emulator)
+    write_frame(bits, args.output)
+    print(f"{emulator.cycles} cycles, wrote {args.output}")
+    if args.compare:
+        difference = compare_to_reference(bits, args.compare)
+        print(f"{difference:.1%} of pixels differ from {args.compare}")
+        if difference > args.tolerance:
+            sys.exit(1)
@@ -0,0 +1,102 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import array
+import itertools
+import mmap
+import sys
+import typing
+
+BINARY_EXTENSION = ".hackbin"
+WORD_TYPECODE = "H"
+WORD_SIZE = 2
+STREAM_CHUNK_WORDS = 1 << 16
+
+
+def _to_little_endian(words: array.array) -> array.array:
+    if sys.byteorder == "little":
+        return words
+    swapped = array.array(WORD_TYPECODE, words)
+    swapped.byteswap()
+    return swapped
+
+
+def write_binary(words: array.array, output_path: str,
+                 use_mmap: bool = False) -> None:
+    """Writes the instruction words as packed little-endian uint16 values.
+
+    Args:
+        words (array.array): the assembled program, one word per instruction.
+        output_path (str): the file to write.
+        use_mmap (bool): write through a memory-mapped file instead of a
+            single write call.
+    """
+    data = _to_little_endian(words)
+    size = len(data) * WORD_SIZE
+    if not use_mmap or not size:
+        # mmap can't map an empty file, so empty programs always go here
+        with open(output_path, 'wb') as output_file:
+            output_file.write(data.tobytes())
+        return
+    with open(output_path, 'w+b') as output_file:
+        output_file.truncate(size)
+        with mmap.mmap(output_file.fileno(), size) as mapped:
+            mapped[:] = memoryview(data).cast("B")
+
+
+def write_binary_stream(words: typing.Iterable[int],
+                        output_path: str) -> None:
+    """Writes instruction words as they are produced, a chunk at a time.
+
+    Args:
+        words (typing.Iterable[int]): the assembled program.
+        output_path (str): the file to write.
+    """
+    words = iter(words)
+    with open(output_path, 'wb') as output_file:
+        while True:
+            chunk = array.array(
+                WORD_TYPECODE, itertools.islice(words, STREAM_CHUNK_WORDS))
+            if not chunk:
+                return
+            output_file.write(_to_little_endian(chunk).tobytes())
+
+
+def read_binary(input_path: str) -> array.array:
+    """Reads a program written by write_binary.
+
+    Args:
+        input_path (str): the packed program to read.
+
+    Returns:
+        array.array: the instruction words.
+    """
+    words = array.array(WORD_TYPECODE)
+    with open(input_path, 'rb') as input_file:
+        data = input_file.read()
+    if len(data) % WORD_SIZE:
+        raise ValueError(f"{input_path} is not a whole number of words")
+    words.frombytes(data)
+    if sys.byteorder != "little":
+        words.byteswap()
+    return words
+
+
+def read_hack(input_path: str) -> array.array:
+    """Reads a program in either output format of the assembler: text
+    .hack files or packed BINARY_EXTENSION files.
+
+    Args:
+        input_path (str): the program to read.
+
+    Returns:
+        array.array: the instruction words.
+    """
+    if input_path.lower().endswith(BINARY_EXTENSION):
+        return read_binary(input_path)
+    with open(input_path, 'r') as input_file:
+        return array.array(WORD_TYPECODE, (
+            int(line, 2) for line in input_file if line.strip()))
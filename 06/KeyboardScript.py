@@ -0,0 +1,278 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import select
+import sys
+import typing
+from CPUEmulator import CPUEmulator, KBD
+from FastForward import FastForward
+
+KEYS_EXTENSION = ".keys"
+# The Hack character set's codes for keys that aren't printable characters
+KEY_CODES = {"newline": 128, "backspace": 129, "left": 130, "up": 131,
+             "right": 132, "down": 133, "home": 134, "end": 135,
+             "pageup": 136, "pagedown": 137, "insert": 138, "delete": 139,
+             "esc": 140, **{f"f{number}": 140 + number
+                            for number in range(1, 13)}}
+KEY_NAMES = {code: name for name, code in KEY_CODES.items()}
+# Terminal input for the keys above, as sent by xterm-like terminals
+TERMINAL_KEYS = {"\r": 128, "\n": 128, "\x7f": 129, "\x08": 129,
+                 "\x1b[D": 130, "\x1b[A": 131, "\x1b[C": 132, "\x1b[B": 133,
+                 "\x1b[H": 134, "\x1b[F": 135, "\x1b[5~": 136, "\x1b[6~": 137,
+                 "\x1b[2~": 138, "\x1b[3~": 139, "\x1b": 140}
+# Cycles run between reading the terminal in a live session
+SLICE_CYCLES = 100_000
+# How long a key typed in a live session is held down, as terminals only
+# report presses; their key repeat keeps a held key down
+HOLD_CYCLES = 1_000_000
+# A keyboard script: the cycle at which each key is pressed, 0 releasing it
+Events = typing.List[typing.Tuple[int, int]]
+
+
+def parse_key(text: str) -> int:
+    """
+    Args:
+        text (str): a key code, a name from KEY_CODES or a single character.
+
+    Returns:
+        int: the key's code.
+    """
+    if text.isdigit():
+        return int(text)
+    if text.lower() in KEY_CODES:
+        return KEY_CODES[text.lower()]
+    if len(text) == 1:
+        return ord(text)
+    raise ValueError(f"unknown key {text}")
+
+
+def key_text(key: int) -> str:
+    """
+    Args:
+        key (int): a key code.
+
+    Returns:
+        str: how parse_key reads it back: its name, the character for
+        printable characters other than digits, or the code.
+    """
+    if key in KEY_NAMES:
+        return KEY_NAMES[key]
+    character = chr(key)
+    if character.isprintable() and not character.isspace() and \
+            not character.isdigit() and character != "#":
+        return character
+    return str(key)
+
+
+def load_script(path: str) -> Events:
+    """Reads a keyboard script: a line of `<cycle> <key>` per key change,
+    with # comments.
+
+    Args:
+        path (str): the script.
+
+    Returns:
+        Events: its key changes, in cycle order.
+    """
+    events = []
+    with open(path, 'r') as script_file:
+        for number, line in enumerate(script_file, 1):
+            words = line.split("#", 1)[0].split()
+            if not words:
+                continue
+            if len(words) != 2 or not words[0].isdigit():
+                raise ValueError(f"{path}:{number}: expected <cycle> <key>")
+            events.append((int(words[0]), parse_key(words[1])))
+    return sorted(events, key=lambda event: event[0])
+
+
+def save_script(path: str, events: Events) -> None:
+    """
+    Args:
+        path (str): the script to write.
+        events (Events): its key changes.
+    """
+    with open(path, 'w') as script_file:
+        script_file.write("# cycle key\n")
+        for cycle, key in events:
+            script_file.write(f"{cycle} {key_text(key)}\n")
+
+
+class KeyboardReplay:
+    """Runs a program while pressing keys from a keyboard script, each at
+    the emulator cycle it's keyed by. Runs stop at every key change, so
+    loops waiting for the keyboard are fast-forwarded to the next one.
+    """
+
+    def __init__(self, emulator: CPUEmulator, events: Events) -> None:
+        """
+        Args:
+            emulator (CPUEmulator): the machine to run.
+            events (Events): the keyboard script.
+        """
+        self.emulator = emulator
+        self.events = events
+        self.engine = FastForward(emulator)
+        self.next_event = 0
+
+    def press_keys(self) -> None:
+        """Presses the keys whose cycle has come, in order."""
+        emulator = self.emulator
+        while self.next_event < len(self.events) and \
+                self.events[self.next_event][0] <= emulator.cycles:
+            emulator.set_key(self.events[self.next_event][1])
+            self.next_event += 1
+
+    def run(self, max_cycles: int) -> int:
+        """Executes instructions until max_cycles have run or the program
+        ends in an `(END) @END 0;JMP` loop, like CPUEmulator.run.
+
+        Args:
+            max_cycles (int): the most instructions to execute.
+
+        Returns:
+            int: the number of instructions executed, including skipped ones.
+        """
+        emulator = self.emulator
+        cycles = 0
+        while True:
+            self.press_keys()
+            budget = max_cycles - cycles
+            if self.next_event < len(self.events):
+                budget = min(budget, self.events[self.next_event][0] -
+                             emulator.cycles)
+            cycles += self.engine.run(budget)
+            if cycles >= max_cycles or emulator.halted:
+                return cycles
+
+
+class KeyboardRecorder:
+    """Records the keys pressed on a running emulator as a keyboard script,
+    keyed by the emulator's cycle count when each key changes.
+    """
+
+    def __init__(self, emulator: CPUEmulator) -> None:
+        """
+        Args:
+            emulator (CPUEmulator): the machine whose keyboard is recorded.
+        """
+        self.emulator = emulator
+        self.events = []
+
+    def set_key(self, key: int) -> None:
+        """
+        Args:
+            key (int): the code of the pressed key, or 0 for none.
+        """
+        if key != self.emulator.ram[KBD]:
+            self.events.append((self.emulator.cycles, key))
+        self.emulator.set_key(key)
+
+
+def read_terminal(terminal: int) -> typing.List[int]:
+    """
+    Args:
+        terminal (int): a terminal's file descriptor, in cbreak mode.
+
+    Returns:
+        typing.List[int]: the codes of the keys typed since the last call.
+    """
+    keys = []
+    text = ""
+    while select.select([terminal], [], [], 0)[0]:
+        text += os.read(terminal, 64).decode(errors="replace")
+    while text:
+        for sequence in sorted(TERMINAL_KEYS, key=len, reverse=True):
+            if text.startswith(sequence):
+                keys.append(TERMINAL_KEYS[sequence])
+                text = text[len(sequence):]
+                break
+        else:
+            keys.append(ord(text[0]))
+            text = text[1:]
+    return keys
+
+
+def record_session(emulator: CPUEmulator, max_cycles: int,
+                   frame: typing.Optional[str] = None) -> Events:
+    """Runs a program with keys typed on the terminal until max_cycles, the
+    program halts or Ctrl-C, recording them.
+
+    Args:
+        emulator (CPUEmulator): the machine to run.
+        max_cycles (int): the most instructions to execute.
+        frame (typing.Optional[str]): a PNG or PBM file to rewrite with the
+            screen after every slice, to watch the session in a viewer.
+
+    Returns:
+        Events: the recorded keyboard script.
+    """
+    import termios
+    import tty
+    if frame is not None:
+        from Framebuffer import screen_bits, write_frame
+    terminal = sys.stdin.fileno()
+    if not os.isatty(terminal):
+        raise ValueError("recording needs a terminal")
+    recorder = KeyboardRecorder(emulator)
+    engine = FastForward(emulator)
+    released_at = None
+    settings = termios.tcgetattr(terminal)
+    tty.setcbreak(terminal)
+    try:
+        while emulator.cycles < max_cycles and not emulator.halted:
+            keys = read_terminal(terminal)
+            if keys:
+                recorder.set_key(keys[-1])
+                released_at = emulator.cycles + HOLD_CYCLES
+            elif released_at is not None and \
+                    emulator.cycles >= released_at:
+                recorder.set_key(0)
+                released_at = None
+            engine.run(min(SLICE_CYCLES, max_cycles - emulator.cycles))
+            if frame is not None:
+                write_frame(screen_bits(emulator), frame)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        termios.tcsetattr(terminal, termios.TCSADRAIN, settings)
+    return recorder.events
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="KeyboardScript")
+    arg_parser.add_argument("program", help="an .asm, .hack or packed program")
+    arg_parser.add_argument("--max-cycles", type=int, default=100_000_000)
+    mode = arg_parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--replay", metavar="SCRIPT",
+                      help="press the keys of a keyboard script")
+    mode.add_argument("--record", metavar="SCRIPT",
+                      help="record keys typed on the terminal")
+    arg_parser.add_argument("--frame", metavar="IMAGE",
+                            help="write the screen here, after the run or "
+                            "continuously while recording")
+    arg_parser.add_argument("--show", nargs="*", type=int, default=[],
+                            metavar="ADDRESS",
+                            help="RAM addresses to print after running")
+    args = arg_parser.parse_args()
+
+    emulator = CPUEmulator.from_file(os.path.abspath(args.program))
+    if args.record:
+        events = record_session(emulator, args.max_cycles, args.frame)
+        save_script(args.record, events)
+        print(f"recorded {len(events)} key changes to {args.record}")
+    else:
+        replay = KeyboardReplay(emulator, load_script(args.replay))
+        replay.run(args.max_cycles)
+        if args.frame:
+            from Framebuffer import screen_bits, write_frame
+            write_frame(screen_bits(emulator), args.frame)
+    state = "halted" if emulator.halted else "stopped"
+    print(f"{state} after {emulator.cycles} cycles")
+    for address in args.show:
+        print(f"RAM[{address}] = {emulator.ram[address]}")
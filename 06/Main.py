@@ -4,104 +4,415 @@ https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
 and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
 Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import array
+import concurrent.futures
 import os
 import sys
+import time
 import typing
 from SymbolTable import SymbolTable
 from Parser import Parser
 from Code import Code
+from Optimizer import Optimizer
+from BuildCache import BuildCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+from HackBinary import BINARY_EXTENSION, WORD_TYPECODE, write_binary, \
+    write_binary_stream
 
 A = "A_COMMAND"
 C = "C_COMMAND"
 L = "L_COMMAND"
-C_REGULAR = "111"
-C_SHIFT = "101"
 NEW_LINE = "\n"
+# A-commands hold 15-bit values; the top bit marks C-commands
+A_LIMIT = 1 << 15
 
 
 def number_to_16bit(num: int) -> str:
     return '{0:016b}'.format(num)
 
 
-def assemble_file(input_file: typing.TextIO,
-                  output_file: typing.TextIO) -> None:
-    """Assembles a single file.
-
+def a_command_word(symbol: str, symbol_table: SymbolTable) -> int:
+    """
     Args:
-        input_file (typing.TextIO): the file to assemble.
-        output_file (typing.TextIO): writes all output to this file.
+        symbol (str): the symbol or decimal Xxx of an @Xxx command.
+        symbol_table (SymbolTable): the program's symbols. A new variable is
+            allocated for a symbol that isn't in the table yet.
+
+    Returns:
+        int: the 16-bit instruction word.
+
+    Raises:
+        ValueError: if Xxx is a number that doesn't fit in 15 bits.
     """
-    # Your code goes here!
-    #
-    # You should use the two-pass implementation suggested in the book:
-    #
-    # *Initialization*
-    # Initialize the symbol table with all the predefined symbols and their
-    # pre-allocated RAM addresses, according to section 6.2.3 of the book.
+    if symbol.isdigit():
+        value = int(symbol)
+        if value >= A_LIMIT:
+            raise ValueError(f"@{symbol} is out of range, A-commands hold "
+                             f"0 to {A_LIMIT - 1}")
+        return value
+    if not symbol_table.contains(symbol):
+        symbol_table.add_entry(symbol, symbol_table.next_free)
+        symbol_table.next_free += 1
+    return symbol_table.get_address(symbol)
 
-    symbol_table = SymbolTable()
-    parser = Parser(input_file=input_file)
 
+def first_pass(parser: Parser, symbol_table: SymbolTable) -> None:
+    """Records the ROM address of every label. Labels don't take up an
+    address, so only A and C commands advance the counter.
+
+    Args:
+        parser (Parser): a parser positioned at the start of the program.
+        symbol_table (SymbolTable): the table to add the labels to.
+    """
+    rom_address = 0
     while parser.has_more_commands():
         if parser.command_type() == L:
             tmp_symbol = parser.symbol()
             if not symbol_table.contains(tmp_symbol):
-                tmp_address = parser.current_line
-                symbol_table.add_entry(tmp_symbol, tmp_address)
-                parser.lines.pop(tmp_address)
-                parser.current_line -= 1
-                parser.end_line -= 1
+                symbol_table.add_label(tmp_symbol, rom_address)
+        else:
+            rom_address += 1
         parser.advance()
 
-    parser.init_between_passes()
+
+def second_pass(parser: Parser, symbol_table: SymbolTable) -> array.array:
+    """Translates every A and C command, allocating variables on the way.
+
+    Args:
+        parser (Parser): a parser positioned at the start of the program.
+        symbol_table (SymbolTable): the table filled by first_pass.
+
+    Returns:
+        array.array: the machine code, one unsigned 16-bit word per
+        instruction.
+    """
+    words = array.array(WORD_TYPECODE)
     while parser.has_more_commands():
         # A command
         if parser.command_type() == A:
-            tmp_symbol = parser.symbol()
-            if not tmp_symbol.isdigit():
-                if symbol_table.contains(tmp_symbol):
-                    output_file.write(number_to_16bit(
-                        symbol_table.get_address(tmp_symbol)) + NEW_LINE)
-                else:
-                    symbol_table.add_entry(tmp_symbol, symbol_table.next_free)
-                    symbol_table.next_free += 1
-                    output_file.write(number_to_16bit(
-                        symbol_table.get_address(tmp_symbol)) + NEW_LINE)
-            else:
-                output_file.write(number_to_16bit(int(tmp_symbol)) + NEW_LINE)
+            words.append(a_command_word(parser.symbol(), symbol_table))
         # C command
         elif parser.command_type() == C:
-            dest = Code.dest(parser.dest())
-            comp = parser.comp()
-            comp_b = Code.comp(comp)
-            jump = Code.jump(parser.jump())
-            if ">" in comp or "<" in comp:
-                output_file.write(C_SHIFT + comp_b + dest + jump + NEW_LINE)
-            else:
-                output_file.write(C_REGULAR + comp_b + dest + jump + NEW_LINE)
-        # L command
-        elif parser.command_type() == L:
-            tmp_address = symbol_table.get_address(parser.symbol())
-            output_file.write(number_to_16bit(tmp_address) + NEW_LINE)
+            words.append(Code.c_command(parser.current_command))
+        # L commands were resolved in the first pass and emit nothing
         parser.advance()
+    return words
+
+
+def assemble(source: typing.Union[str, typing.Iterable[str]],
+             optimizer: typing.Optional[Optimizer] = None) \
+        -> typing.Tuple[array.array, SymbolTable]:
+    """Assembles a program in memory, without touching the file system.
+
+    Args:
+        source (typing.Union[str, typing.Iterable[str]]): the program's
+            source, or an iterable of its lines (an open file works too).
+        optimizer (typing.Optional[Optimizer]): if given, runs over the
+            parsed program before it is encoded.
+
+    Returns:
+        typing.Tuple[array.array, SymbolTable]: the machine code, one
+        unsigned 16-bit word per instruction, and the final symbol table
+        with every label and variable.
+    """
+    # Your code goes here!
+    #
+    # You should use the two-pass implementation suggested in the book:
+    #
+    # *Initialization*
+    # Initialize the symbol table with all the predefined symbols and their
+    # pre-allocated RAM addresses, according to section 6.2.3 of the book.
+
+    if isinstance(source, str):
+        source = source.splitlines()
+    symbol_table = SymbolTable()
+    parser = Parser(input_file=source)
+    if optimizer is not None:
+        parser.lines = optimizer.optimize(parser.lines)
+        parser.end_line = len(parser.lines)
+        parser.init_between_passes()
+    first_pass(parser, symbol_table)
+    parser.init_between_passes()
+    return second_pass(parser, symbol_table), symbol_table
+
+
+def assemble_words(input_file: typing.TextIO,
+                   optimizer: typing.Optional[Optimizer] = None) \
+        -> array.array:
+    """Assembles a single file into instruction words.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble.
+        optimizer (typing.Optional[Optimizer]): if given, runs over the
+            parsed program before it is encoded.
+
+    Returns:
+        array.array: the machine code, one unsigned 16-bit word per
+        instruction.
+    """
+    return assemble(input_file, optimizer)[0]
+
+
+def stream_words(input_file: typing.TextIO) -> typing.Iterator[int]:
+    """Assembles a single file without holding it in memory. Both passes
+    stream the input line by line, so only the symbol table is kept.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble. It is read twice,
+            so it must be seekable.
+
+    Returns:
+        typing.Iterator[int]: the instruction words, in order.
+    """
+    symbol_table = SymbolTable()
+    rom_address = 0
+    for command in Parser.stream_commands(input_file):
+        if command[0] == "(":
+            if not symbol_table.contains(command[1:-1]):
+                symbol_table.add_label(command[1:-1], rom_address)
+        else:
+            rom_address += 1
+
+    input_file.seek(0)
+    for command in Parser.stream_commands(input_file):
+        if command[0] == "@":
+            yield a_command_word(command[1:], symbol_table)
+        elif command[0] != "(":
+            yield Code.c_command(command)
+
+
+def assemble_file(input_file: typing.TextIO,
+                  output_file: typing.TextIO,
+                  optimizer: typing.Optional[Optimizer] = None) -> None:
+    """Assembles a single file.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble.
+        output_file (typing.TextIO): writes all output to this file.
+        optimizer (typing.Optional[Optimizer]): if given, runs over the
+            parsed program before it is encoded.
+    """
+    words = assemble_words(input_file, optimizer)
+    output_file.write("".join(
+        number_to_16bit(word) + NEW_LINE for word in words))
+
+
+def stream_file(input_file: typing.TextIO,
+                output_file: typing.TextIO) -> None:
+    """Assembles a single file like assemble_file, in constant memory.
+
+    Args:
+        input_file (typing.TextIO): the (seekable) file to assemble.
+        output_file (typing.TextIO): writes all output to this file.
+    """
+    for word in stream_words(input_file):
+        output_file.write(number_to_16bit(word) + NEW_LINE)
+
+
+def assemble_path(input_path: str, binary: bool = False,
+                  use_mmap: bool = False, stream: bool = False,
+                  cache: typing.Optional[BuildCache] = None,
+                  optimizer: typing.Optional[Optimizer] = None) \
+        -> typing.Tuple[str, bool]:
+    """Assembles an .asm file into a .hack (or packed binary) file next to
+    it. The output is written to a temporary file and renamed into place,
+    so readers never see a partially written program.
+
+    Args:
+        input_path (str): the .asm file to assemble.
+        binary (bool): write packed words instead of text.
+        use_mmap (bool): write binary output through a memory-mapped file.
+        stream (bool): assemble in constant memory (see stream_words).
+        cache (typing.Optional[BuildCache]): reuse and store outputs here.
+        optimizer (typing.Optional[Optimizer]): if given, runs over the
+            parsed program before it is encoded. Can't be combined with
+            stream.
+
+    Returns:
+        typing.Tuple[str, bool]: the path of the written output, and whether
+        it was copied from the cache, in which case the optimizer didn't
+        run and its statistics are empty.
+    """
+    filename, extension = os.path.splitext(input_path)
+    output_extension = BINARY_EXTENSION if binary else ".hack"
+    output_path = filename + output_extension
+    if cache is not None:
+        key = cache.key(input_path, output_extension, optimizer is not None)
+        if cache.fetch(key, output_path):
+            return output_path, True
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(input_path, 'r') as input_file:
+            if binary and stream:
+                write_binary_stream(stream_words(input_file), tmp_path)
+            elif binary:
+                write_binary(assemble_words(input_file, optimizer), tmp_path,
+                             use_mmap)
+            elif stream:
+                with open(tmp_path, 'w') as output_file:
+                    stream_file(input_file, output_file)
+            else:
+                with open(tmp_path, 'w') as output_file:
+                    assemble_file(input_file, output_file, optimizer)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if cache is not None:
+        cache.store(key, output_path)
+    return output_path, False
+
+
+def timed_assemble_path(input_path: str, binary: bool, use_mmap: bool,
+                        stream: bool, cache: typing.Optional[BuildCache],
+                        optimize: bool) \
+        -> typing.Tuple[str, float, typing.Optional[str],
+                        typing.Optional[int]]:
+    """Runs assemble_path, catching any error so one bad file doesn't abort
+    a batch. Used as the process pool task of assemble_paths.
+
+    Returns:
+        typing.Tuple[str, float, typing.Optional[str],
+        typing.Optional[int]]: the input path, the elapsed seconds, an error
+        message (None on success) and the number of instructions the
+        optimizer removed (None if the output came from the cache).
+    """
+    optimizer = Optimizer() if optimize else None
+    start = time.perf_counter()
+    cached = False
+    try:
+        _, cached = assemble_path(input_path, binary, use_mmap, stream,
+                                  cache, optimizer)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    removed = optimizer.removed if optimizer is not None else 0
+    if cached:
+        removed = None
+    return input_path, time.perf_counter() - start, error, removed
+
+
+def assemble_paths(input_paths: typing.List[str], jobs: int,
+                   binary: bool = False, use_mmap: bool = False,
+                   stream: bool = False,
+                   cache: typing.Optional[BuildCache] = None,
+                   optimize: bool = False) \
+        -> typing.List[typing.Tuple[str, float, typing.Optional[str],
+                                    typing.Optional[int]]]:
+    """Assembles many files on a pool of worker processes.
+
+    Args:
+        input_paths (typing.List[str]): the .asm files to assemble.
+        jobs (int): the number of worker processes.
+        binary (bool): write packed words instead of text.
+        use_mmap (bool): write binary output through a memory-mapped file.
+        stream (bool): assemble in constant memory (see stream_words).
+        cache (typing.Optional[BuildCache]): reuse and store outputs here.
+        optimize (bool): run the peephole optimizer before encoding.
+
+    Returns:
+        typing.List[typing.Tuple[str, float, typing.Optional[str],
+        typing.Optional[int]]]: one (input path, seconds, error,
+        instructions removed) entry per file, in completion order.
+    """
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(timed_assemble_path, input_path, binary,
+                               use_mmap, stream, cache, optimize)
+                   for input_path in input_paths]
+        for future in concurrent.futures.as_completed(futures):
+            results.append(future.result())
+    return results
 
 
 if "__main__" == __name__:
     # Parses the input path and calls assemble_file on each input file
-    if not len(sys.argv) == 2:
-        sys.exit("Invalid usage, please use: Assembler <input path>")
-    argument_path = os.path.abspath(sys.argv[1])
+    arg_parser = argparse.ArgumentParser(prog="Assembler")
+    arg_parser.add_argument("path", help="an .asm file or a directory")
+    arg_parser.add_argument(
+        "--binary", action="store_true",
+        help=f"write packed uint16 words to {BINARY_EXTENSION} files")
+    arg_parser.add_argument(
+        "--mmap", action="store_true",
+        help="write binary output through a memory-mapped file")
+    arg_parser.add_argument(
+        "--stream", action="store_true",
+        help="stream the input twice instead of loading it, keeping only "
+             "the symbol table in memory")
+    arg_parser.add_argument(
+        "--optimize", action="store_true",
+        help="remove redundant instructions before encoding")
+    arg_parser.add_argument(
+        "--cache", action="store_true",
+        help="reuse outputs from the build cache and store new ones there")
+    arg_parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help=f"the build cache directory, with --cache (default: "
+             f"{DEFAULT_CACHE_DIR})")
+    arg_parser.add_argument(
+        "--cache-size", type=int, default=DEFAULT_CACHE_SIZE // (1 << 20),
+        metavar="MB", help="with --cache, evict least recently used entries "
+                           "past this size (default: %(default)s)")
+    arg_parser.add_argument(
+        "--jobs", type=int, metavar="N",
+        help="assemble on N worker processes and print a timing summary")
+    args = arg_parser.parse_args()
+    if args.mmap and not args.binary:
+        sys.exit("Invalid usage, --mmap only applies to --binary output")
+    if args.stream and args.mmap:
+        sys.exit("Invalid usage, --mmap needs the program size up front and "
+                 "can't be combined with --stream")
+    if args.stream and args.optimize:
+        sys.exit("Invalid usage, --optimize needs the whole program and "
+                 "can't be combined with --stream")
+    cache = None
+    if args.cache:
+        cache = BuildCache(args.cache_dir, args.cache_size * (1 << 20))
+    argument_path = os.path.abspath(args.path)
     if os.path.isdir(argument_path):
         files_to_assemble = [
             os.path.join(argument_path, filename)
             for filename in os.listdir(argument_path)]
     else:
         files_to_assemble = [argument_path]
-    for input_path in files_to_assemble:
-        filename, extension = os.path.splitext(input_path)
-        if extension.lower() != ".asm":
-            continue
-        output_path = filename + ".hack"
-        with open(input_path, 'r') as input_file, \
-                open(output_path, 'w') as output_file:
-            assemble_file(input_file, output_file)
+    files_to_assemble = [
+        input_path for input_path in files_to_assemble
+        if os.path.splitext(input_path)[1].lower() == ".asm"]
+    if args.jobs is None:
+        for input_path in files_to_assemble:
+            optimizer = Optimizer() if args.optimize else None
+            try:
+                _, cached = assemble_path(input_path, args.binary,
+                                          args.mmap, args.stream, cache,
+                                          optimizer)
+            except ValueError as error:
+                sys.exit(f"{os.path.basename(input_path)}: {error}")
+            if optimizer is not None and cached:
+                print(f"{os.path.basename(input_path)}: optimized output "
+                      f"from the build cache")
+            elif optimizer is not None:
+                print(f"{os.path.basename(input_path)}: removed "
+                      f"{optimizer.removed} instructions")
+        sys.exit()
+    if args.jobs < 1:
+        sys.exit("Invalid usage, --jobs must be at least 1")
+
+    batch_start = time.perf_counter()
+    results = assemble_paths(files_to_assemble, args.jobs, args.binary,
+                             args.mmap, args.stream, cache, args.optimize)
+    wall_time = time.perf_counter() - batch_start
+    failures = [result for result in results if result[2] is not None]
+    for input_path, seconds, error, removed in sorted(results):
+        status = "FAILED " + error if error else "ok"
+        if args.optimize and not error and removed is None:
+            status += ", optimized output from the build cache"
+        elif args.optimize and not error:
+            status += f", removed {removed} instructions"
+        print(f"{seconds:8.3f}s  {os.path.basename(input_path)}  {status}")
+    cpu_time = sum(result[1] for result in results)
+    print(f"{len(results)} files, {len(failures)} failed, "
+          f"{wall_time:.3f}s wall, {cpu_time:.3f}s summed over "
+          f"{args.jobs} jobs")
+    if failures:
+        sys.exit(1)
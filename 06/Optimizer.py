@@ -0,0 +1,133 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import collections
+import typing
+from SymbolTable import SymbolTable
+
+PUSH_D = ["@SP", "AM=M+1", "A=A-1", "M=D"]
+POP_D = ["@SP", "AM=M-1", "D=M"]
+
+
+class Optimizer:
+    """A peephole optimizer for Hack assembly, run on the parsed commands
+    before they are encoded. It removes instructions whose effect is already
+    in place, such as the redundant loads and spills in VM translator
+    output.
+
+    Every label starts a new window with nothing known about the registers,
+    so code reached by a jump is never affected. Labels stay symbolic and
+    are resolved after optimizing, so jump targets follow the instructions
+    that moved. Programs that jump to numeric ROM addresses are left
+    untouched, since their targets can't be told apart from data constants.
+    The first reference to each variable is always kept, since variables
+    get their RAM addresses in the order they are first referenced.
+    """
+
+    def __init__(self) -> None:
+        """Creates an optimizer with zeroed statistics."""
+        self.removed = 0
+        self.removed_by_rule = collections.Counter()
+
+    @staticmethod
+    def jumps_to_numbers(commands: typing.List[str]) -> bool:
+        """
+        Args:
+            commands (typing.List[str]): the parsed program.
+
+        Returns:
+            bool: True if a numeric A-command is directly followed by a jump.
+        """
+        for command, next_command in zip(commands, commands[1:]):
+            if command[0] == "@" and command[1:].isdigit() and \
+                    next_command[0] not in "@(" and ";" in next_command:
+                return True
+        return False
+
+    def optimize(self, commands: typing.List[str]) -> typing.List[str]:
+        """
+        Args:
+            commands (typing.List[str]): the parsed program, as in
+                Parser.lines.
+
+        Returns:
+            typing.List[str]: the program with redundant instructions
+            removed.
+        """
+        if Optimizer.jumps_to_numbers(commands):
+            return list(commands)
+        optimized = []
+        labels = {command[1:-1] for command in commands if command[0] == "("}
+        # The variables referenced by the optimized program so far, and
+        # whether the last command kept is the first reference to one
+        variables = set()
+        first_reference = False
+        # What is known inside the current window: the symbol A holds, and
+        # whether RAM[A] holds the same value as D
+        a_symbol = None
+        m_equals_d = False
+        for command in commands:
+            if command[0] == "(":
+                a_symbol = None
+                m_equals_d = False
+                optimized.append(command)
+                continue
+
+            if command[0] == "@":
+                if command[1:] == a_symbol:
+                    self._remove("reload")
+                    continue
+                if optimized and optimized[-1][0] == "@" and \
+                        not first_reference:
+                    # The previous load is overwritten before anything used it
+                    optimized.pop()
+                    self._remove("dead-load")
+                optimized.append(command)
+                a_symbol = command[1:]
+                first_reference = not a_symbol.isdigit() and \
+                    a_symbol not in SymbolTable.init_table and \
+                    a_symbol not in labels and a_symbol not in variables
+                variables.add(a_symbol)
+                m_equals_d = False
+                continue
+
+            dest, _, comp_jump = command.rpartition("=")
+            comp, _, jump = comp_jump.partition(";")
+            if not jump and m_equals_d and \
+                    ((dest == "D" and comp == "M") or
+                     (dest == "M" and comp == "D")):
+                self._remove("spill-reload")
+                continue
+            if not jump and dest == "M" and comp == "0" and \
+                    optimized[-7:] == PUSH_D + POP_D:
+                # Pushing D and popping it straight back leaves D and the
+                # stack pointer as they were; only A = SP remains to be done
+                del optimized[-7:]
+                optimized.extend(["@SP", "A=M"])
+                self._remove("push-pop", 6)
+                a_symbol = None
+                m_equals_d = False
+                continue
+            if not jump and dest == "M" and comp == "0" and \
+                    optimized[-3:] == POP_D:
+                # Clears the stack slot that was just popped; nothing reads
+                # above the stack pointer
+                self._remove("pop-clear")
+                continue
+
+            optimized.append(command)
+            if "A" in dest:
+                a_symbol = None
+                m_equals_d = False
+            elif "M" in dest:
+                m_equals_d = "D" in dest or comp == "D"
+            elif "D" in dest:
+                m_equals_d = comp == "M"
+        return optimized
+
+    def _remove(self, rule: str, count: int = 1) -> None:
+        self.removed += count
+        self.removed_by_rule[rule] += count
@@ -14,33 +14,54 @@ class Parser:
     comments.
     """
 
-    def __init__(self, input_file: typing.TextIO) -> None:
+    def __init__(self, input_file: typing.Iterable[str]) -> None:
         """Opens the input file and gets ready to parse it.
 
         Args:
-            input_file (typing.TextIO): input file.
+            input_file (typing.Iterable[str]): input file, or any other
+                iterable of lines.
         """
-        input_lines = input_file.read().splitlines()
         new_lines = list()
-        for line in input_lines:
-            line = line.replace(" ", "")
-            if line[0:2] == "//":
-                continue
-            if not line:
-                continue
-            line = line.split("//")[0]
-            new_lines.append(line)
-
-
+        for line in input_file:
+            line = Parser.clean_line(line)
+            if line:
+                new_lines.append(line)
 
         self.lines = new_lines
         self.current_line = 0
         self.end_line = len(new_lines)
-        self.current_command = new_lines[self.current_line]
+        self.current_command = new_lines[0] if new_lines else ""
+
+    @staticmethod
+    def clean_line(line: str) -> str:
+        """
+        Args:
+            line (str): a raw line of assembly.
+
+        Returns:
+            str: the command on the line without white space and comments,
+            or an empty string if the line holds no command.
+        """
+        return line.split("//")[0].replace(" ", "").strip()
+
+    @staticmethod
+    def stream_commands(input_file: typing.TextIO) -> typing.Iterator[str]:
+        """Reads the input line by line, without keeping it in memory.
+
+        Args:
+            input_file (typing.TextIO): input file.
+
+        Returns:
+            typing.Iterator[str]: the cleaned commands, in order.
+        """
+        for line in input_file:
+            line = Parser.clean_line(line)
+            if line:
+                yield line
 
     def init_between_passes(self) -> None:
         self.current_line = 0
-        self.current_command = self.lines[self.current_line]
+        self.current_command = self.lines[0] if self.lines else ""
         return
 
     def has_more_commands(self) -> bool:
@@ -0,0 +1,254 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import bisect
+import collections
+import os
+import re
+import typing
+from CPUEmulator import CPUEmulator, ROM_SIZE, C_BIT
+from BlockCompiler import BlockCompiler, HALTED
+
+# Return addresses pushed by a VM call: File$ret.N from 08/CodeWriter.py,
+# RET_ADDRESS_CALLN from the course's translator
+RETURN_LABEL = re.compile(r"\$ret\.\d+$|^RET_ADDRESS_CALL\d+$")
+# Frame for code that runs outside any function
+TOP_LEVEL = "(top level)"
+DEFAULT_TOP = 20
+
+
+def is_function_label(label: str) -> bool:
+    """
+    Args:
+        label (str): a label.
+
+    Returns:
+        bool: True if it can name a VM function, i.e. looks like
+        Class.function. Labels inside functions hold a '$' or another dot,
+        and comparison labels such as TRUE.0 end in a number.
+    """
+    class_name, dot, name = label.partition(".")
+    return bool(class_name) and bool(dot) and "." not in name and \
+        "$" not in label and not name.isdigit() and \
+        not RETURN_LABEL.search(label)
+
+
+class Profiler:
+    """Profiles a program assembled from VM translator output, running it
+    with the block compiler. Cycles are counted per ROM address and mapped
+    back to the program's labels, and a call stack of VM functions is kept
+    so cycles can be charged to functions and to whole call chains.
+
+    Calls are found through their return labels: the last function label
+    loaded before a return label is the function that call enters. The
+    function is pushed when its entry is next reached after a call, so
+    loops back to a function's first instruction are not calls, and popped
+    when execution reaches a return label.
+    """
+
+    def __init__(self, emulator: CPUEmulator) -> None:
+        """Prepares to profile the emulator's program.
+
+        Args:
+            emulator (CPUEmulator): a machine whose program was loaded from
+                its .asm source, so its symbol table is known.
+        """
+        if emulator.symbol_table is None:
+            raise ValueError("profiling needs the program's labels, load it "
+                             "from its .asm source")
+        self.emulator = emulator
+        self.compiler = BlockCompiler(emulator)
+        labels = emulator.symbol_table.labels
+        self.label_names = collections.defaultdict(list)
+        for label, address in labels.items():
+            self.label_names[address].append(label)
+        self.label_addresses = sorted(self.label_names)
+        self.returns = {address for label, address in labels.items()
+                        if RETURN_LABEL.search(label)}
+        self.calls_at = dict()
+        self.entries = dict()
+        for address in self.returns:
+            function = self.called_function(address)
+            if function is not None:
+                self.calls_at[address - 1] = function
+                self.entries[labels[function]] = function
+        # Executions of each block, by its first ROM address
+        self.block_counts = collections.Counter()
+        # Executions of single instructions run outside whole blocks
+        self.instruction_counts = collections.Counter()
+        self.self_cycles = collections.Counter()
+        self.calls = collections.Counter()
+        self.stacks = collections.Counter()
+
+    def called_function(self, return_address: int) -> typing.Optional[str]:
+        """
+        Args:
+            return_address (int): the address of a return label.
+
+        Returns:
+            typing.Optional[str]: the function called by the instructions
+            before it, or None if no function label is loaded there.
+        """
+        emulator = self.emulator
+        address = return_address - 1
+        while address >= 0 and (address + 1 == return_address or
+                                address + 1 not in self.label_names):
+            word = emulator.rom[address]
+            if not word & C_BIT:
+                for label in self.label_names.get(word, ()):
+                    if is_function_label(label):
+                        return label
+            address -= 1
+        return None
+
+    def run(self, max_cycles: int) -> int:
+        """Executes instructions until max_cycles have run or the program
+        halts, like CPUEmulator.run, while profiling.
+
+        Args:
+            max_cycles (int): the most instructions to execute.
+
+        Returns:
+            int: the number of instructions executed.
+        """
+        emulator = self.emulator
+        compiler = self.compiler
+        functions = compiler.functions
+        lengths = compiler.lengths
+        entries = self.entries
+        returns = self.returns
+        block_counts = self.block_counts
+        self_cycles = self.self_cycles
+        stacks = self.stacks
+        ram = emulator.ram
+        a, d, pc = emulator.a, emulator.d, emulator.pc
+        # The function names on the call stack, and the collapsed stack
+        # ending at each of them
+        frames = [TOP_LEVEL]
+        paths = [TOP_LEVEL]
+        calling = False
+        cycles = 0
+        while True:
+            if pc in entries and calling:
+                calling = False
+                frames.append(entries[pc])
+                paths.append(f"{paths[-1]};{entries[pc]}")
+                self.calls[entries[pc]] += 1
+            elif pc in returns and len(frames) > 1:
+                frames.pop()
+                paths.pop()
+            function = functions[pc]
+            if function is None:
+                function = compiler.compile_block(pc)
+            length = lengths[pc]
+            if cycles + length > max_cycles:
+                break
+            next_pc, a, d = function(ram, a, d)
+            cycles += length
+            block_counts[pc] += 1
+            self_cycles[frames[-1]] += length
+            stacks[paths[-1]] += length
+            if next_pc == HALTED:
+                emulator.pc = pc + length - 1
+                emulator.a, emulator.d = a, d
+                emulator.halted = True
+                emulator.cycles += cycles
+                return cycles
+            if pc + length - 1 in self.calls_at:
+                calling = True
+            pc = next_pc
+        emulator.a, emulator.d, emulator.pc = a, d, pc
+        emulator.cycles += cycles
+        # The last instructions don't fill a block
+        while cycles < max_cycles and not emulator.halted:
+            self.instruction_counts[emulator.pc] += 1
+            emulator.step()
+            cycles += 1
+            self_cycles[frames[-1]] += 1
+            stacks[paths[-1]] += 1
+        return cycles
+
+    def address_counts(self) -> typing.List[int]:
+        """
+        Returns:
+            typing.List[int]: how many times each ROM address executed.
+        """
+        counts = [0] * ROM_SIZE
+        for start, count in self.block_counts.items():
+            for address in range(start, start + self.compiler.lengths[start]):
+                counts[address] += count
+        for address, count in self.instruction_counts.items():
+            counts[address] += count
+        return counts
+
+    def label_cycles(self) -> typing.List[typing.Tuple[str, int, int]]:
+        """
+        Returns:
+            typing.List[typing.Tuple[str, int, int]]: the label, its address
+            and the cycles spent from it up to the next label, for every
+            label that ran, most cycles first. Code before the first label
+            is listed under TOP_LEVEL.
+        """
+        ranges = collections.Counter()
+        for address, count in enumerate(self.address_counts()):
+            if not count:
+                continue
+            index = bisect.bisect_right(self.label_addresses, address) - 1
+            ranges[self.label_addresses[index] if index >= 0 else -1] += count
+        return sorted(((", ".join(self.label_names[start]) if start >= 0
+                        else TOP_LEVEL, max(start, 0), cycles)
+                       for start, cycles in ranges.items()),
+                      key=lambda entry: -entry[2])
+
+    def report(self, top: int = DEFAULT_TOP) -> typing.List[str]:
+        """
+        Args:
+            top (int): how many functions and label ranges to list.
+
+        Returns:
+            typing.List[str]: the report's lines.
+        """
+        total = max(sum(self.self_cycles.values()), 1)
+        lines = [f"{'self cycles':>14} {'%':>6} {'calls':>9}  function"]
+        for function, cycles in self.self_cycles.most_common(top):
+            lines.append(f"{cycles:>14} {cycles / total:>6.1%} "
+                         f"{self.calls[function]:>9}  {function}")
+        lines.append("")
+        lines.append(f"{'cycles':>14} {'%':>6} {'address':>9}  label")
+        for label, address, cycles in self.label_cycles()[:top]:
+            lines.append(f"{cycles:>14} {cycles / total:>6.1%} "
+                         f"{address:>9}  {label}")
+        return lines
+
+    def write_collapsed(self, path: str) -> None:
+        """Writes the cycles of every call stack in the collapsed format
+        read by flamegraph.pl and speedscope.
+
+        Args:
+            path (str): the file to write.
+        """
+        with open(path, 'w') as output_file:
+            for stack, cycles in sorted(self.stacks.items()):
+                output_file.write(f"{stack} {cycles}\n")
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="Profiler")
+    arg_parser.add_argument("program", help="an .asm program")
+    arg_parser.add_argument("--max-cycles", type=int, default=10_000_000)
+    arg_parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                            help="how many functions and labels to list")
+    arg_parser.add_argument("--collapsed", metavar="PATH",
+                            help="write collapsed stacks for flame graphs")
+    args = arg_parser.parse_args()
+
+    profiler = Profiler(CPUEmulator.from_file(os.path.abspath(args.program)))
+    cycles = profiler.run(args.max_cycles)
+    print(f"{cycles} cycles")
+    print("\n".join(profiler.report(args.top)))
+    if args.collapsed:
+        profiler.write_collapsed(args.collapsed)
@@ -0,0 +1,140 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from CPUEmulator import CPUEmulator, RAM_SIZE
+from BlockCompiler import BlockCompiler
+from HackBinary import WORD_TYPECODE, WORD_SIZE
+
+SNAPSHOT_EXTENSION = ".hacksnap"
+SNAPSHOT_MAGIC = b"HACKSNAP"
+SNAPSHOT_VERSION = 1
+# Magic, version, extended flag, A, D, PC, cycles and the ROM's SHA-256,
+# followed by the RAM as little-endian words
+HEADER = struct.Struct("<8sHHHHHxxQ32s")
+RAM_BYTES = RAM_SIZE * WORD_SIZE
+DEFAULT_MAX_CYCLES = 100_000_000
+
+
+def rom_hash(emulator: CPUEmulator) -> bytes:
+    """
+    Args:
+        emulator (CPUEmulator): a machine.
+
+    Returns:
+        bytes: the SHA-256 of its program, so a snapshot is only restored
+        into the program that took it.
+    """
+    words = emulator.rom[:emulator.program_size]
+    if sys.byteorder != "little":
+        words.byteswap()
+    return hashlib.sha256(words.tobytes()).digest()
+
+
+def save_snapshot(emulator: CPUEmulator, path: str) -> None:
+    """Writes the machine's registers, cycle count and RAM. The file is
+    written next to its final path and renamed into place, so a snapshot
+    that is being rewritten can still be restored.
+
+    Args:
+        emulator (CPUEmulator): the machine.
+        path (str): the snapshot file.
+    """
+    ram = emulator.ram
+    if sys.byteorder != "little":
+        ram = array.array(WORD_TYPECODE, ram)
+        ram.byteswap()
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                         int(emulator.extended), emulator.a, emulator.d,
+                         emulator.pc, emulator.cycles, rom_hash(emulator))
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(header)
+        snapshot_file.write(ram.tobytes())
+    os.replace(temporary_path, path)
+
+
+def restore_snapshot(emulator: CPUEmulator, path: str) -> None:
+    """Restores a snapshot into a machine running the same program. The
+    file is memory-mapped and the RAM is copied straight out of the
+    mapping into the machine's RAM, so views of it stay valid.
+
+    Args:
+        emulator (CPUEmulator): the machine.
+        path (str): the snapshot file.
+    """
+    with open(path, 'rb') as snapshot_file:
+        with mmap.mmap(snapshot_file.fileno(), 0,
+                       access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) != HEADER.size + RAM_BYTES:
+                raise ValueError(f"{path} is not a snapshot")
+            magic, version, extended, a, d, pc, cycles, program_hash = \
+                HEADER.unpack_from(mapped)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a version "
+                                 f"{SNAPSHOT_VERSION} snapshot")
+            if program_hash != rom_hash(emulator):
+                raise ValueError(f"{path} was taken of a different program")
+            if bool(extended) != emulator.extended:
+                raise ValueError(f"{path} was taken with extended="
+                                 f"{bool(extended)}")
+            memoryview(emulator.ram).cast("B")[:] = \
+                memoryview(mapped)[HEADER.size:]
+    if sys.byteorder != "little":
+        emulator.ram.byteswap()
+    emulator.a, emulator.d, emulator.pc = a, d, pc
+    emulator.cycles = cycles
+    emulator.halted = False
+
+
+def run_until(emulator: CPUEmulator, label: str,
+              max_cycles: int = DEFAULT_MAX_CYCLES) -> int:
+    """Runs a program until it reaches one of its labels, such as
+    Main.main once the OS has booted.
+
+    Args:
+        emulator (CPUEmulator): a machine loaded from an .asm program.
+        label (str): where to stop.
+        max_cycles (int): the most instructions to execute.
+
+    Returns:
+        int: the number of instructions executed.
+    """
+    labels = emulator.symbol_table.labels \
+        if emulator.symbol_table is not None else dict()
+    if label not in labels:
+        raise ValueError(f"the program has no label {label}")
+    cycles = BlockCompiler(emulator).run(max_cycles, labels[label])
+    if emulator.pc != labels[label]:
+        raise ValueError(f"{label} wasn't reached in {max_cycles} cycles")
+    return cycles
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="Snapshot")
+    arg_parser.add_argument("program", help="an .asm program")
+    arg_parser.add_argument("--until", default="Main.main",
+                            help="the label to snapshot at")
+    arg_parser.add_argument("--max-cycles", type=int,
+                            default=DEFAULT_MAX_CYCLES)
+    arg_parser.add_argument("--output", help="the snapshot file, by default "
+                            f"the program's name with {SNAPSHOT_EXTENSION}")
+    arg_parser.add_argument("--regular", action="store_true",
+                            help="run like CPU.hdl, without shift support")
+    args = arg_parser.parse_args()
+
+    program = os.path.abspath(args.program)
+    emulator = CPUEmulator.from_file(program, not args.regular)
+    cycles = run_until(emulator, args.until, args.max_cycles)
+    output = args.output or os.path.splitext(program)[0] + SNAPSHOT_EXTENSION
+    save_snapshot(emulator, output)
+    print(f"{args.until} reached after {cycles} cycles, saved {output}")
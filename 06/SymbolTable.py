@@ -4,7 +4,7 @@ https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
 and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
 Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
-
+import typing
 from copy import *
 
 
@@ -28,6 +28,7 @@ class SymbolTable:
         # Your code goes here!
         self.table = copy(SymbolTable.init_table)
         self.next_free = SymbolTable.init_next_free
+        self.labels = dict()
 
     def add_entry(self, symbol: str, address: int) -> None:
         """Adds the pair (symbol, address) to the table.
@@ -39,6 +40,28 @@ class SymbolTable:
         # Your code goes here!
         self.table.update({symbol: address})
 
+    def add_label(self, symbol: str, address: int) -> None:
+        """Adds a label, a symbol for a ROM address, to the table. Labels are
+        also kept apart from variables so tools like the disassembler can
+        tell the two kinds of addresses apart.
+
+        Args:
+            symbol (str): the label.
+            address (int): the ROM address of the instruction it marks.
+        """
+        self.add_entry(symbol, address)
+        self.labels[symbol] = address
+
+    def variables(self) -> typing.Dict[str, int]:
+        """
+        Returns:
+            typing.Dict[str, int]: the symbols that aren't labels or
+            predefined, with their RAM addresses.
+        """
+        return {symbol: address for symbol, address in self.table.items()
+                if symbol not in self.labels and
+                symbol not in SymbolTable.init_table}
+
     def contains(self, symbol: str) -> bool:
         """Does the symbol table contain the given symbol?
 
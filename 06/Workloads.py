@@ -0,0 +1,47 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import random
+import typing
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Project 04 programs and random inputs for them, shared by the benchmarks
+# and the tests
+MULT_PROGRAM = os.path.join(os.path.dirname(PROJECT_DIR), "04", "mult",
+                            "Mult.asm")
+SORT_PROGRAM = os.path.join(os.path.dirname(PROJECT_DIR), "04", "sort",
+                            "Sort.asm")
+
+
+def mult_inputs(count: int, seed: int = 0) \
+        -> typing.List[typing.Dict[int, int]]:
+    """
+    Returns:
+        typing.List[typing.Dict[int, int]]: random R0 and R1 values for
+        04/mult.
+    """
+    generator = random.Random(seed)
+    return [{0: generator.randrange(100), 1: generator.randrange(100)}
+            for _ in range(count)]
+
+
+def sort_inputs(count: int, seed: int = 0) \
+        -> typing.List[typing.Dict[int, int]]:
+    """
+    Returns:
+        typing.List[typing.Dict[int, int]]: random arrays at RAM[2048] for
+        04/sort, of up to 30 values.
+    """
+    generator = random.Random(seed)
+    inputs = []
+    for _ in range(count):
+        length = generator.randrange(31)
+        values = {14: 2048, 15: length}
+        for index in range(length):
+            values[2048 + index] = generator.randrange(-16383, 16384) & 0xFFFF
+        inputs.append(values)
+    return inputs
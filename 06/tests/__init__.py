@@ -0,0 +1,66 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPOSITORY_DIR = os.path.dirname(PROJECT_DIR)
+# The sample programs, as (directory, name) under PROJECT_DIR
+SAMPLE_PROGRAMS = [("add", "Add"), ("max", "Max"), ("max", "MaxL"),
+                   ("rect", "Rect"), ("rect", "RectL"), ("pong", "Pong"),
+                   ("pong", "PongL"), ("shift", "ShiftExamples")]
+# The end of the bootstrap code the project 08 translator always writes
+BOOTSTRAP_END = "($ret.0)\n"
+
+
+def sample_path(directory: str, name: str) -> str:
+    """
+    Args:
+        directory (str): a sample's directory.
+        name (str): the sample's name.
+
+    Returns:
+        str: its .asm file.
+    """
+    return os.path.join(PROJECT_DIR, directory, name + ".asm")
+
+
+def translate_vm(program: str, directory: str) -> str:
+    """Translates a VM program of project 07 or 08 with that project's
+    translator, working on a copy of it.
+
+    Args:
+        program (str): a directory of .vm files under REPOSITORY_DIR, such
+            as "08/FunctionCalls/FibonacciElement".
+        directory (str): an empty directory to copy the program into.
+
+    Returns:
+        str: its assembly, ending in an `(END) @END 0;JMP` loop.
+    """
+    name = os.path.basename(program)
+    shutil.copytree(os.path.join(REPOSITORY_DIR, program),
+                    os.path.join(directory, name))
+    translator = os.path.join(REPOSITORY_DIR, program[:2], "Main.py")
+    # Single file programs sit next to copies named "<name> 2.vm", so only
+    # their own file is translated
+    argument = os.path.join(name, name + ".vm")
+    if not os.path.exists(os.path.join(directory, argument)):
+        argument = name
+    # Each translator has its own Parser, so it runs in a process of its own
+    subprocess.run([sys.executable, translator, argument], check=True,
+                   cwd=directory, capture_output=True)
+    with open(os.path.join(directory, name, name + ".asm"),
+              'r') as output_file:
+        source = output_file.read()
+    if program[:2] == "08" and not os.path.exists(
+            os.path.join(directory, name, "Sys.vm")):
+        # Programs without Sys.init start at their first command, like
+        # their tests do
+        source = source[source.index(BOOTSTRAP_END) + len(BOOTSTRAP_END):]
+    return source + "(END.TEST)\n@END.TEST\n0;JMP\n"
@@ -0,0 +1,100 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from HackBinary import read_binary, read_hack
+from Main import assemble, assemble_path
+from tests import SAMPLE_PROGRAMS, sample_path
+
+# SHA-256 of the .hack files the original two-pass assembler wrote for the
+# samples, before the single counting pass, streaming and binary output
+BASELINE_DIGESTS = {
+    "Add": "1c51582e114023c3ddefa4f9709c50832551fc715ad17e025252c4f15866a51f",
+    "Max": "52cb9849e87d1091d7ea8d50a29d71f4281f4b79f4fe19847d27bfcd72720a7e",
+    "MaxL": "52cb9849e87d1091d7ea8d50a29d71f4281f4b79f4fe19847d27bfcd72720a7e",
+    "Rect": "d230d6afa53ab8733dee3d5b46851d7a71c4091bc859681c3122d504f4b8af2a",
+    "RectL":
+        "d230d6afa53ab8733dee3d5b46851d7a71c4091bc859681c3122d504f4b8af2a",
+    "Pong": "084e6ca751f6d84750fe4ba60310e965b057e05fb5b3e21002d5b3bae91e7530",
+    "PongL":
+        "084e6ca751f6d84750fe4ba60310e965b057e05fb5b3e21002d5b3bae91e7530",
+    "ShiftExamples":
+        "5aff593a7658c2e1b9d44a91b991059392f747b30ff6965cbe97e7a99d9a1514",
+}
+
+
+class AssemblerTest(unittest.TestCase):
+    """Assembles copies of the samples, so their directories stay clean."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def copy(self, directory: str, name: str) -> str:
+        return shutil.copy(sample_path(directory, name), self.directory)
+
+    def digest(self, path: str) -> str:
+        with open(path, 'rb') as output_file:
+            return hashlib.sha256(output_file.read()).hexdigest()
+
+    def test_matches_baseline(self) -> None:
+        for directory, name in SAMPLE_PROGRAMS:
+            with self.subTest(name):
+                output_path = assemble_path(self.copy(directory, name))[0]
+                self.assertEqual(self.digest(output_path),
+                                 BASELINE_DIGESTS[name])
+
+    def test_stream_matches_baseline(self) -> None:
+        for directory, name in SAMPLE_PROGRAMS:
+            with self.subTest(name):
+                input_path = self.copy(directory, name)
+                output_path = assemble_path(input_path, stream=True)[0]
+                self.assertEqual(self.digest(output_path),
+                                 BASELINE_DIGESTS[name])
+                binary_path = assemble_path(input_path, binary=True,
+                                            stream=True)[0]
+                self.assertEqual(read_binary(binary_path),
+                                 read_hack(output_path))
+
+    def test_binary_holds_same_words(self) -> None:
+        for directory, name in SAMPLE_PROGRAMS:
+            for use_mmap in (False, True):
+                with self.subTest(name, use_mmap=use_mmap):
+                    input_path = self.copy(directory, name)
+                    text_path = assemble_path(input_path)[0]
+                    binary_path = assemble_path(input_path, binary=True,
+                                                use_mmap=use_mmap)[0]
+                    self.assertNotEqual(text_path, binary_path)
+                    self.assertEqual(read_binary(binary_path),
+                                     read_hack(text_path))
+                    os.remove(binary_path)
+
+    def test_labels_before_and_after_use(self) -> None:
+        words = assemble("@END\n(LOOP)\n@LOOP\n0;JMP\n(END)\n@END\n")[0]
+        self.assertEqual(list(words), [3, 1, 0b1110101010000111, 3])
+
+    def test_a_command_range(self) -> None:
+        self.assertEqual(list(assemble("@0\n@32767\n")[0]), [0, 32767])
+        for value in (32768, 40000, 70000):
+            with self.subTest(value):
+                with self.assertRaisesRegex(ValueError, f"@{value} "):
+                    assemble(f"@{value}\nD=A\n")
+
+    def test_out_of_range_leaves_no_output(self) -> None:
+        input_path = os.path.join(self.directory, "Big.asm")
+        with open(input_path, 'w') as input_file:
+            input_file.write("@1\n@40000\n")
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                with self.assertRaises(ValueError):
+                    assemble_path(input_path, stream=stream)
+                self.assertEqual(os.listdir(self.directory), ["Big.asm"])
@@ -0,0 +1,110 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from BuildCache import BuildCache
+from Main import assemble_path
+from Optimizer import Optimizer
+from tests import sample_path
+
+
+class BuildCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache = BuildCache(os.path.join(self.directory, "cache"))
+        self.input_path = shutil.copy(sample_path("max", "Max"),
+                                      self.directory)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def entries(self) -> list:
+        return sorted(os.listdir(self.cache.cache_dir))
+
+    def write_entry(self, name: str, size: int, age: int) -> None:
+        path = os.path.join(self.cache.cache_dir, name)
+        with open(path, 'wb') as entry_file:
+            entry_file.write(bytes(size))
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+
+    def test_hit_reuses_entry(self) -> None:
+        output_path, cached = assemble_path(self.input_path,
+                                            cache=self.cache)
+        self.assertFalse(cached)
+        with open(output_path, 'r') as output_file:
+            assembled = output_file.read()
+        self.assertEqual(len(self.entries()), 1)
+        # A hit copies the entry into place instead of assembling
+        entry_path = os.path.join(self.cache.cache_dir, self.entries()[0])
+        with open(entry_path, 'w') as entry_file:
+            entry_file.write("cached\n")
+        self.assertEqual(assemble_path(self.input_path, cache=self.cache),
+                         (output_path, True))
+        with open(output_path, 'r') as output_file:
+            self.assertEqual(output_file.read(), "cached\n")
+        self.assertNotEqual(assembled, "cached\n")
+
+    def test_source_change_misses(self) -> None:
+        assemble_path(self.input_path, cache=self.cache)
+        with open(self.input_path, 'a') as input_file:
+            input_file.write("@0\n")
+        self.assertFalse(assemble_path(self.input_path,
+                                       cache=self.cache)[1])
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_formats_and_optimizing_miss(self) -> None:
+        keys = {self.cache.key(self.input_path, extension, optimized)
+                for extension in (".hack", ".hackbin")
+                for optimized in (False, True)}
+        self.assertEqual(len(keys), 4)
+        self.assertFalse(assemble_path(self.input_path, cache=self.cache,
+                                       optimizer=Optimizer())[1])
+        self.assertTrue(assemble_path(self.input_path, cache=self.cache,
+                                      optimizer=Optimizer())[1])
+
+    def test_optimizer_change_misses(self) -> None:
+        plain = self.cache.key(self.input_path, ".hack")
+        optimized = self.cache.key(self.input_path, ".hack", True)
+        self.cache.optimizer_version = "changed rules"
+        self.assertEqual(self.cache.key(self.input_path, ".hack"), plain)
+        self.assertNotEqual(self.cache.key(self.input_path, ".hack", True),
+                            optimized)
+
+    def test_evict_keeps_size_limit(self) -> None:
+        self.cache.max_bytes = 250
+        for index, age in enumerate((30, 10, 40, 20)):
+            self.write_entry(f"entry{index}", 100, age)
+        self.cache.evict()
+        # The two least recently used entries go
+        self.assertEqual(self.entries(), ["entry1", "entry3"])
+
+    def test_fetch_marks_entry_used(self) -> None:
+        self.cache.max_bytes = 250
+        self.write_entry("old", 100, 30)
+        self.write_entry("new", 100, 10)
+        self.assertTrue(self.cache.fetch(
+            "old", os.path.join(self.directory, "Out.hack")))
+        self.write_entry("newest", 100, 0)
+        self.cache.evict()
+        self.assertEqual(self.entries(), ["newest", "old"])
+        self.assertFalse(self.cache.fetch(
+            "new", os.path.join(self.directory, "Out.hack")))
+
+    def test_store_evicts(self) -> None:
+        output_path = assemble_path(self.input_path)[0]
+        size = os.path.getsize(output_path)
+        self.cache.max_bytes = 2 * size
+        for age in range(3):
+            self.write_entry(f"entry{age}", size, age + 1)
+        self.cache.store("stored", output_path)
+        self.assertEqual(self.entries(), ["entry0", "stored"])
+        self.assertLessEqual(
+            sum(os.path.getsize(os.path.join(self.cache.cache_dir, name))
+                for name in self.entries()), self.cache.max_bytes)
@@ -0,0 +1,41 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import unittest
+from Disassembler import Disassembler
+from Main import assemble
+from tests import SAMPLE_PROGRAMS, sample_path
+
+
+class DisassemblerTest(unittest.TestCase):
+
+    def test_round_trip(self) -> None:
+        for directory, name in SAMPLE_PROGRAMS:
+            with self.subTest(name):
+                with open(sample_path(directory, name), 'r') as source_file:
+                    words = assemble(source_file)[0]
+                lines = Disassembler().disassemble(words)
+                self.assertEqual(assemble(lines)[0], words)
+
+    def test_round_trip_with_symbols(self) -> None:
+        for directory, name in SAMPLE_PROGRAMS:
+            with self.subTest(name):
+                with open(sample_path(directory, name), 'r') as source_file:
+                    words, symbol_table = assemble(source_file)
+                lines = Disassembler(symbol_table).disassemble(words)
+                self.assertEqual(assemble(lines)[0], words)
+
+    def test_every_instruction(self) -> None:
+        # Every word that decodes at all must assemble back to itself
+        table = Disassembler().decode_table
+        words = [word for word, command in enumerate(table)
+                 if command is not None]
+        self.assertEqual(list(assemble(Disassembler().disassemble(words))[0]),
+                         words)
+
+    def test_invalid_word(self) -> None:
+        with self.assertRaisesRegex(ValueError, "at 1"):
+            Disassembler().disassemble([0, 0b1000000000000000])
@@ -0,0 +1,174 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import typing
+import unittest
+from BatchEmulator import BatchEmulator
+from BlockCompiler import BlockCompiler, HALTED
+from CPUEmulator import CPUEmulator, SIGN_BIT, load_program
+from FastForward import FastForward
+from Main import assemble
+from Workloads import MULT_PROGRAM, SORT_PROGRAM, mult_inputs, sort_inputs
+from tests import PROJECT_DIR
+
+# Looks for loops this often, so the short runs here skip some
+CHECK_INTERVAL = 100
+
+# Counts R0 down to 0 in R1 and then D to 0, for loops to skip
+COUNTDOWN = """
+    @R0
+    D=M
+    @R1
+    M=D
+(COUNT)
+    @R1
+    M=M-1
+    D=M
+    @COUNT
+    D;JGT
+    @3000
+    D=A
+(SPIN)
+    D=D-1
+    @SPIN
+    D;JGT
+(END)
+    @END
+    0;JMP
+"""
+
+
+def signed(word: int) -> int:
+    return word - (word & SIGN_BIT) * 2
+
+
+def final_state(emulator: CPUEmulator) -> typing.Tuple:
+    return (emulator.a, emulator.d, emulator.pc, emulator.cycles,
+            emulator.halted, emulator.ram.tobytes())
+
+
+class EmulatorTest(unittest.TestCase):
+    """Runs each program with the interpreter, the block compiler and
+    fast-forwarding, which must all end in the same state."""
+
+    def assert_engines_agree(self, words: typing.Sequence[int],
+                             inputs: typing.Dict[int, int],
+                             max_cycles: int) \
+            -> typing.Tuple[CPUEmulator, FastForward]:
+        """
+        Returns:
+            typing.Tuple[CPUEmulator, FastForward]: the interpreted machine,
+            and the fast-forwarding runner, to check what it skipped.
+        """
+        emulators = [CPUEmulator(words) for _ in range(3)]
+        for emulator in emulators:
+            for address, value in inputs.items():
+                emulator.ram[address] = value
+        runners = [emulators[0], BlockCompiler(emulators[1]),
+                   FastForward(emulators[2], CHECK_INTERVAL)]
+        for runner, emulator in zip(runners, emulators):
+            self.assertEqual(runner.run(max_cycles), emulator.cycles)
+        for emulator in emulators[1:]:
+            self.assertEqual(final_state(emulator),
+                             final_state(emulators[0]))
+        return emulators[0], runners[2]
+
+    def test_mult(self) -> None:
+        words = load_program(MULT_PROGRAM)[0]
+        for inputs in mult_inputs(20):
+            with self.subTest(**{f"R{key}": value
+                                 for key, value in inputs.items()}):
+                interpreted = self.assert_engines_agree(words, inputs,
+                                                        100_000)[0]
+                self.assertTrue(interpreted.halted)
+                self.assertEqual(interpreted.ram[2],
+                                 inputs[0] * inputs[1])
+
+    def test_sort(self) -> None:
+        words = load_program(SORT_PROGRAM)[0]
+        for index, inputs in enumerate(sort_inputs(10)):
+            with self.subTest(index):
+                # Sort has no end loop and runs on into the empty ROM
+                ram = self.assert_engines_agree(words, inputs,
+                                                30_000)[0].ram
+                values = [signed(inputs[address]) for address in
+                          range(2048, 2048 + inputs[15])]
+                self.assertEqual([signed(word) for word in
+                                  ram[2048:2048 + inputs[15]]],
+                                 sorted(values, reverse=True))
+
+    def test_budget_ends_mid_block(self) -> None:
+        words = load_program(MULT_PROGRAM)[0]
+        for max_cycles in (1, 5, 17, 250):
+            with self.subTest(max_cycles):
+                self.assert_engines_agree(words, {0: 300, 1: 7}, max_cycles)
+
+    def test_countdown(self) -> None:
+        words = assemble(COUNTDOWN)[0]
+        for count in (1, 7, 1000):
+            with self.subTest(count):
+                interpreted, fast_forward = self.assert_engines_agree(
+                    words, {0: count}, 1_000_000)
+                self.assertTrue(interpreted.halted)
+                if count > CHECK_INTERVAL:
+                    self.assertGreater(fast_forward.skips, 0)
+
+    def test_budget_inside_loop(self) -> None:
+        # Runs that stop partway through a skippable loop end mid-loop
+        words = assemble(COUNTDOWN)[0]
+        for max_cycles in (1, 17, 2_500, 9_999):
+            with self.subTest(max_cycles):
+                self.assert_engines_agree(words, {0: 1000}, max_cycles)
+
+    def test_stop_at(self) -> None:
+        words = load_program(MULT_PROGRAM)[0]
+        # Inside the loop's block, which no label or jump marks without the
+        # symbol table
+        stop_at = 8
+        for max_cycles in (3, 9, 12, 100, 10_000):
+            with self.subTest(max_cycles):
+                interpreted, compiled = CPUEmulator(words), CPUEmulator(words)
+                for emulator in (interpreted, compiled):
+                    emulator.ram[0], emulator.ram[1] = 6, 7
+                while interpreted.cycles < max_cycles and \
+                        interpreted.pc != stop_at:
+                    interpreted.step()
+                compiler = BlockCompiler(compiled)
+                self.assertEqual(compiler.run(max_cycles, stop_at),
+                                 interpreted.cycles)
+                self.assertEqual(final_state(compiled),
+                                 final_state(interpreted))
+                if compiled.pc == stop_at:
+                    self.assertEqual(compiler.run(max_cycles, stop_at), 0)
+                compiler.run(10_000, HALTED)
+                self.assertEqual(compiled.ram[2], 42)
+
+    def test_pong(self) -> None:
+        words = load_program(os.path.join(PROJECT_DIR, "pong",
+                                          "Pong.asm"))[0]
+        self.assert_engines_agree(words, {}, 300_000)
+
+    def test_batch_lanes_agree(self) -> None:
+        words = load_program(MULT_PROGRAM)[0]
+        inputs = mult_inputs(40) + [{0: 12, 1: 34}] * 40
+        # A min_group of 1 keeps the lanes in lockstep as long as half of
+        # them share a PC, the default runs the diverged lanes alone
+        for min_group in (1, 128):
+            with self.subTest(min_group=min_group):
+                batch = BatchEmulator(words, len(inputs),
+                                      min_group=min_group)
+                for lane, values in enumerate(inputs):
+                    for address, value in values.items():
+                        batch.ram[lane, address] = value
+                batch.run(5_000)
+                for lane, values in enumerate(inputs):
+                    emulator = CPUEmulator(words)
+                    for address, value in values.items():
+                        emulator.ram[address] = value
+                    emulator.run(5_000)
+                    self.assertEqual(final_state(batch.lane(lane)),
+                                     final_state(emulator))
@@ -0,0 +1,147 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import random
+import shutil
+import struct
+import tempfile
+import typing
+import unittest
+import numpy
+from Framebuffer import INK_THRESHOLD, MAX_LZW_BITS, compare_to_reference, \
+    lzw_decode, read_gif
+from tests import PROJECT_DIR
+
+# The smallest common GIF: one white pixel, with a transparency extension
+ONE_PIXEL_GIF = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00"
+                 b"\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01"
+                 b"\x00\x01\x00\x00\x02\x02D\x01\x00;")
+# Black, white, dark gray and light gray
+PALETTE = bytes([0, 0, 0, 255, 255, 255, 64, 64, 64, 192, 192, 192])
+GRAYS = [0, 255, 64, 192]
+SCREENSHOT = os.path.join(os.path.dirname(PROJECT_DIR), "12", "ScreenTest",
+                          "ScreenTestOutput.gif")
+
+
+def lzw_encode(indices: typing.Sequence[int], minimum_size: int) -> bytes:
+    """
+    Args:
+        indices (typing.Sequence[int]): color indices.
+        minimum_size (int): the minimum code size.
+
+    Returns:
+        bytes: the indices compressed as GIF image data, with codes growing
+        a bit whenever the decoder's table will need one more.
+    """
+    clear = 1 << minimum_size
+    codes = {bytes([index]): index for index in range(clear)}
+    next_code = clear + 2
+    size = minimum_size + 1
+    buffer = bits = 0
+    output = bytearray()
+
+    def emit(code: int) -> None:
+        nonlocal buffer, bits
+        buffer |= code << bits
+        bits += size
+        while bits >= 8:
+            output.append(buffer & 0xFF)
+            buffer >>= 8
+            bits -= 8
+
+    emit(clear)
+    current = b""
+    for index in indices:
+        extended = current + bytes([index])
+        if extended in codes:
+            current = extended
+            continue
+        emit(codes[current])
+        if next_code < 1 << MAX_LZW_BITS:
+            codes[extended] = next_code
+            next_code += 1
+            if next_code > 1 << size and size < MAX_LZW_BITS:
+                size += 1
+        current = bytes([index])
+    emit(codes[current])
+    emit(clear + 1)
+    if bits:
+        output.append(buffer & 0xFF)
+    return bytes(output)
+
+
+def gif_file(indices: numpy.ndarray, interlaced: bool = False) -> bytes:
+    """
+    Args:
+        indices (numpy.ndarray): the image, as indices into PALETTE.
+        interlaced (bool): store the rows in interlaced order.
+
+    Returns:
+        bytes: a GIF89a file holding the image.
+    """
+    rows, columns = indices.shape
+    if interlaced:
+        indices = indices[numpy.concatenate([
+            numpy.arange(start, rows, step)
+            for start, step in ((0, 8), (4, 8), (2, 4), (1, 2))])]
+    compressed = lzw_encode(indices.ravel().tolist(), 2)
+    blocks = b"".join(bytes([len(compressed[start:start + 255])]) +
+                      compressed[start:start + 255]
+                      for start in range(0, len(compressed), 255))
+    return b"GIF89a" + struct.pack("<HHBBB", columns, rows, 0x81, 0, 0) + \
+        PALETTE + b"\x2c" + \
+        struct.pack("<HHHHB", 0, 0, columns, rows,
+                    0x40 if interlaced else 0) + \
+        b"\x02" + blocks + b"\x00\x3b"
+
+
+class FramebufferTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def read(self, data: bytes) -> numpy.ndarray:
+        path = os.path.join(self.directory, "image.gif")
+        with open(path, 'wb') as image_file:
+            image_file.write(data)
+        return read_gif(path)
+
+    def test_one_pixel(self) -> None:
+        self.assertEqual(self.read(ONE_PIXEL_GIF).tolist(), [[255]])
+
+    def test_lzw_round_trip(self) -> None:
+        generator = random.Random(0)
+        # Long runs build long table entries, noise adds many short ones and
+        # makes the codes grow
+        runs = [0] * 300 + [1, 2] * 200 + [3] * 50
+        noise = [generator.randrange(4) for _ in range(3000)]
+        for name, indices in (("runs", runs), ("noise", noise)):
+            with self.subTest(name):
+                self.assertEqual(
+                    list(lzw_decode(lzw_encode(indices, 2), 2,
+                                    len(indices))), indices)
+
+    def test_gif_round_trip(self) -> None:
+        generator = numpy.random.default_rng(0)
+        indices = generator.integers(0, 4, (30, 40), dtype=numpy.uint8)
+        for interlaced in (False, True):
+            with self.subTest(interlaced=interlaced):
+                image = self.read(gif_file(indices, interlaced))
+                self.assertEqual(image.tolist(),
+                                 numpy.take(GRAYS, indices).tolist())
+
+    def test_not_a_gif(self) -> None:
+        with self.assertRaisesRegex(ValueError, "isn't a GIF"):
+            self.read(b"\x89PNG\r\n\x1a\n")
+
+    def test_screenshot_matches_itself(self) -> None:
+        bits = read_gif(SCREENSHOT) < INK_THRESHOLD
+        self.assertTrue(bits.any())
+        self.assertEqual(compare_to_reference(bits, SCREENSHOT), 0.0)
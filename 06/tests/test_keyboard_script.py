@@ -0,0 +1,98 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from CPUEmulator import CPUEmulator, KBD
+from KeyboardScript import KEY_CODES, KeyboardRecorder, KeyboardReplay, \
+    key_text, load_script, parse_key, save_script
+from Main import assemble
+
+# Waits for a key and copies it to R0, then waits for its release
+WAIT_FOR_KEY = """
+(PRESS)
+    @KBD
+    D=M
+    @PRESS
+    D;JEQ
+    @R0
+    M=D
+(RELEASE)
+    @KBD
+    D=M
+    @RELEASE
+    D;JNE
+(END)
+    @END
+    0;JMP
+"""
+
+
+class KeyboardScriptTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "session.keys")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_key_round_trip(self) -> None:
+        # Script words can't hold spaces or start a comment
+        for key in range(256):
+            text = key_text(key)
+            self.assertFalse(any(character.isspace() or character == "#"
+                                 for character in text), key)
+            self.assertEqual(parse_key(text), key)
+
+    def test_parse_key(self) -> None:
+        self.assertEqual(parse_key("a"), ord("a"))
+        self.assertEqual(parse_key("7"), 7)
+        self.assertEqual(parse_key("Newline"), 128)
+        self.assertEqual(parse_key("F12"), KEY_CODES["f12"])
+        with self.assertRaisesRegex(ValueError, "unknown key"):
+            parse_key("shift")
+
+    def test_script_round_trip(self) -> None:
+        events = [(0, ord("q")), (10, 0), (10, KEY_CODES["up"]),
+                  (2_500, ord("#")), (99_999, ord("5")), (100_000, 0)]
+        save_script(self.path, events)
+        self.assertEqual(load_script(self.path), events)
+
+    def test_load_script(self) -> None:
+        with open(self.path, 'w') as script_file:
+            script_file.write("# a comment\n\n300 left  # held\n"
+                              "100 x\n400 0\n")
+        self.assertEqual(load_script(self.path),
+                         [(100, ord("x")), (300, 130), (400, 0)])
+        with open(self.path, 'w') as script_file:
+            script_file.write("100 x\nsoon y\n")
+        with self.assertRaisesRegex(ValueError, "session.keys:2"):
+            load_script(self.path)
+
+    def test_record_and_replay(self) -> None:
+        words = assemble(WAIT_FOR_KEY)[0]
+        recorded = CPUEmulator(words)
+        recorder = KeyboardRecorder(recorded)
+        recorded.run(5_000)
+        recorder.set_key(ord("k"))
+        recorder.set_key(ord("k"))
+        recorded.run(3_000)
+        recorder.set_key(0)
+        recorded.run(1_000)
+        self.assertTrue(recorded.halted)
+        self.assertEqual(recorder.events, [(5_000, ord("k")), (8_000, 0)])
+
+        save_script(self.path, recorder.events)
+        replayed = CPUEmulator(words)
+        KeyboardReplay(replayed, load_script(self.path)).run(100_000)
+        self.assertTrue(replayed.halted)
+        self.assertEqual(replayed.ram[0], ord("k"))
+        self.assertEqual(replayed.ram[KBD], 0)
+        self.assertEqual((replayed.cycles, replayed.pc),
+                         (recorded.cycles, recorded.pc))
@@ -0,0 +1,126 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from CPUEmulator import CPUEmulator
+from Main import assemble
+from Optimizer import Optimizer
+from Parser import Parser
+from tests import REPOSITORY_DIR, translate_vm
+
+# The VM programs of projects 07 and 08, with the RAM their tests set
+VM_PROGRAMS = {
+    "07/StackArithmetic/SimpleAdd": {0: 256},
+    "07/StackArithmetic/StackTest": {0: 256},
+    "07/MemoryAccess/BasicTest":
+        {0: 256, 1: 300, 2: 400, 3: 3000, 4: 3010},
+    "07/MemoryAccess/PointerTest": {0: 256},
+    "07/MemoryAccess/StaticTest": {0: 256},
+    "08/ProgramFlow/BasicLoop": {0: 256, 1: 300, 2: 400, 400: 3},
+    "08/ProgramFlow/FibonacciSeries":
+        {0: 256, 1: 300, 2: 400, 400: 6, 401: 3000},
+    "08/FunctionCalls/SimpleFunction": {
+        0: 317, 1: 317, 2: 310, 3: 3000, 4: 4000, 310: 1234, 311: 37,
+        312: 1000, 313: 305, 314: 300, 315: 3010, 316: 4010},
+    "08/FunctionCalls/FibonacciElement": {},
+    "08/FunctionCalls/StaticsTest": {},
+    "08/FunctionCalls/NestedCall": {
+        0: 261, 1: 261, 2: 256, 3: -3, 4: -4, 5: -1, 6: -1, 256: 1234,
+        257: -1, 258: -2, 259: -3, 260: -4},
+}
+# R13 to R15, which the translators use for scratch
+SCRATCH_START = 13
+SCRATCH_END = 16
+
+
+class OptimizerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def run_program(source: str, ram: dict, max_cycles: int,
+                    optimizer: Optimizer = None) -> CPUEmulator:
+        emulator = CPUEmulator(assemble(source, optimizer)[0])
+        for address, value in ram.items():
+            emulator.ram[address] = value & 0xFFFF
+        emulator.run(max_cycles)
+        return emulator
+
+    def test_translated_programs_agree(self) -> None:
+        for program, ram in VM_PROGRAMS.items():
+            with self.subTest(program):
+                source = translate_vm(program, self.directory)
+                name = os.path.basename(program)
+                with open(os.path.join(REPOSITORY_DIR, program,
+                                       name + ".tst"), 'r') as test_file:
+                    script = test_file.read()
+                # As many cycles as the test runs; SimpleFunction returns
+                # to an empty ROM address, where the machine idles
+                max_cycles = int(re.search(r"repeat (\d+)", script)[1])
+                optimizer = Optimizer()
+                plain = self.run_program(source, ram, max_cycles)
+                optimized = self.run_program(source, ram, max_cycles,
+                                             optimizer)
+                self.assertGreater(optimizer.removed, 0)
+                self.assertLessEqual(optimized.cycles, plain.cycles)
+                # Slots above the stack pointer may differ, since popped
+                # slots are no longer cleared, and so may the translator's
+                # scratch registers, which hold return addresses
+                stack_pointer = plain.ram[0]
+                self.assertEqual(optimized.ram[:SCRATCH_START],
+                                 plain.ram[:SCRATCH_START])
+                self.assertEqual(optimized.ram[SCRATCH_END:stack_pointer],
+                                 plain.ram[SCRATCH_END:stack_pointer])
+                # Both hold the values the test expects
+                with open(os.path.join(REPOSITORY_DIR, program,
+                                       name + ".cmp"), 'r') as cmp_file:
+                    addresses = re.findall(r"RAM\[(\d+)",
+                                           cmp_file.readline())
+                    values = re.findall(r"-?\d+", cmp_file.readline())
+                for address, value in zip(map(int, addresses),
+                                          map(int, values)):
+                    self.assertEqual(plain.ram[address], value & 0xFFFF)
+                    self.assertEqual(optimized.ram[address], value & 0xFFFF)
+
+    def optimize(self, source: str) -> Optimizer:
+        optimizer = Optimizer()
+        optimizer.optimize(Parser(source.splitlines()).lines)
+        return optimizer
+
+    def test_rules_fire(self) -> None:
+        push_d = "@SP\nAM=M+1\nA=A-1\nM=D\n"
+        pop_d = "@SP\nAM=M-1\nD=M\n"
+        sources = {
+            "reload": "@x\nM=0\n@x\nM=M+1\n",
+            "dead-load": "@x\nM=0\n@5\n@7\nD=A\n",
+            "spill-reload": "@x\nM=D\nD=M\n",
+            "push-pop": push_d + pop_d + "M=0\n",
+            "pop-clear": pop_d + "M=0\n",
+        }
+        for rule, source in sources.items():
+            with self.subTest(rule):
+                self.assertGreater(
+                    self.optimize(source).removed_by_rule[rule], 0)
+
+    def test_keeps_first_reference(self) -> None:
+        commands = Parser("@x\n@y\nD=A\n@x\nD=M\n".splitlines()).lines
+        self.assertEqual(Optimizer().optimize(commands), commands)
+
+    def test_numeric_jumps_left_alone(self) -> None:
+        commands = Parser(
+            "@x\nM=0\n@x\nM=M+1\n@0\n0;JMP\n".splitlines()).lines
+        self.assertTrue(Optimizer.jumps_to_numbers(commands))
+        optimizer = Optimizer()
+        self.assertEqual(optimizer.optimize(commands), commands)
+        self.assertEqual(optimizer.removed, 0)
@@ -0,0 +1,99 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from CPUEmulator import CPUEmulator
+from Main import assemble
+from Profiler import Profiler, TOP_LEVEL, is_function_label
+from tests import translate_vm
+
+COLLAPSED_LINE = re.compile(r"^\(top level\)(;[\w.]+)* \d+$")
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        # The assembled programs, by their VM directory
+        self.programs = dict()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def profiler(self, program: str) -> Profiler:
+        if program not in self.programs:
+            directory = os.path.join(self.directory,
+                                     os.path.basename(program))
+            os.mkdir(directory)
+            self.programs[program] = assemble(translate_vm(program,
+                                                           directory))
+        words, symbol_table = self.programs[program]
+        emulator = CPUEmulator(words)
+        emulator.symbol_table = symbol_table
+        return Profiler(emulator)
+
+    def test_function_labels(self) -> None:
+        for label in ("Main.fibonacci", "Sys.init", "Class1.get"):
+            self.assertTrue(is_function_label(label), label)
+        for label in ("LOOP", "Main.fibonacci$IF_TRUE", "TRUE.0",
+                      "Sys$ret.2", "RET_ADDRESS_CALL3", "a.b.c"):
+            self.assertFalse(is_function_label(label), label)
+
+    def test_needs_labels(self) -> None:
+        with self.assertRaises(ValueError):
+            Profiler(CPUEmulator([0]))
+
+    def test_calls_found_by_return_label(self) -> None:
+        profiler = self.profiler("08/FunctionCalls/NestedCall")
+        self.assertEqual(set(profiler.calls_at.values()),
+                         {"Sys.init", "Sys.main", "Sys.add12"})
+        cycles = profiler.run(100_000)
+        self.assertTrue(profiler.emulator.halted)
+        self.assertEqual(profiler.calls, {"Sys.init": 1, "Sys.main": 1,
+                                          "Sys.add12": 1})
+        self.assertEqual(sum(profiler.self_cycles.values()), cycles)
+        self.assertEqual(set(profiler.stacks), {
+            TOP_LEVEL, f"{TOP_LEVEL};Sys.init",
+            f"{TOP_LEVEL};Sys.init;Sys.main",
+            f"{TOP_LEVEL};Sys.init;Sys.main;Sys.add12"})
+
+    def test_recursive_calls(self) -> None:
+        profiler = self.profiler("08/FunctionCalls/FibonacciElement")
+        cycles = profiler.run(100_000)
+        # Sys.init computes fibonacci(4), which takes nine calls
+        self.assertEqual(profiler.emulator.ram[261], 3)
+        self.assertEqual(profiler.calls, {"Sys.init": 1,
+                                          "Main.fibonacci": 9})
+        self.assertEqual(sum(profiler.stacks.values()), cycles)
+        self.assertEqual(max(stack.count("Main.fibonacci")
+                             for stack in profiler.stacks), 4)
+
+    def test_budget_ends_mid_block(self) -> None:
+        for max_cycles in (1, 50, 777):
+            with self.subTest(max_cycles):
+                profiler = self.profiler("08/FunctionCalls/FibonacciElement")
+                self.assertEqual(profiler.run(max_cycles), max_cycles)
+                self.assertEqual(profiler.emulator.cycles, max_cycles)
+                self.assertEqual(sum(profiler.address_counts()),
+                                 max_cycles)
+                self.assertEqual(sum(profiler.stacks.values()), max_cycles)
+
+    def test_collapsed_format(self) -> None:
+        profiler = self.profiler("08/FunctionCalls/FibonacciElement")
+        cycles = profiler.run(100_000)
+        path = os.path.join(self.directory, "stacks.txt")
+        profiler.write_collapsed(path)
+        with open(path, 'r') as stacks_file:
+            lines = stacks_file.read().splitlines()
+        self.assertEqual(lines, sorted(lines))
+        for line in lines:
+            self.assertRegex(line, COLLAPSED_LINE)
+        self.assertEqual(sum(int(line.rpartition(" ")[2])
+                             for line in lines), cycles)
@@ -0,0 +1,87 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from BlockCompiler import BlockCompiler
+from CPUEmulator import CPUEmulator, load_program
+from Main import assemble
+from Snapshot import HEADER, restore_snapshot, run_until, save_snapshot
+from tests import PROJECT_DIR, translate_vm
+from tests.test_emulators import final_state
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "Pong.hacksnap")
+        self.words = load_program(os.path.join(PROJECT_DIR, "pong",
+                                               "Pong.asm"))[0]
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self) -> None:
+        emulator = CPUEmulator(self.words)
+        BlockCompiler(emulator).run(200_000)
+        save_snapshot(emulator, self.path)
+        restored = CPUEmulator(self.words)
+        restore_snapshot(restored, self.path)
+        self.assertEqual(final_state(restored), final_state(emulator))
+        self.assertEqual(os.listdir(self.directory), ["Pong.hacksnap"])
+        # Both go on the same way
+        for machine in (emulator, restored):
+            machine.run(10_000)
+        self.assertEqual(final_state(restored), final_state(emulator))
+
+    def test_bad_files(self) -> None:
+        emulator = CPUEmulator(self.words)
+        emulator.run(1_000)
+        save_snapshot(emulator, self.path)
+        with open(self.path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+        corruptions = {
+            "not a snapshot": data[:-2],
+            "not a version": b"NOTSNAPS" + data[8:],
+            "different program": data[:HEADER.size - 1] +
+            bytes([data[HEADER.size - 1] ^ 1]) + data[HEADER.size:],
+        }
+        for message, corrupted in corruptions.items():
+            with self.subTest(message):
+                with open(self.path, 'wb') as snapshot_file:
+                    snapshot_file.write(corrupted)
+                restored = CPUEmulator(self.words)
+                with self.assertRaisesRegex(ValueError, message):
+                    restore_snapshot(restored, self.path)
+                self.assertEqual(restored.cycles, 0)
+
+    def test_other_machines_refused(self) -> None:
+        save_snapshot(CPUEmulator(self.words), self.path)
+        with self.assertRaisesRegex(ValueError, "different program"):
+            restore_snapshot(CPUEmulator(self.words[:-1]), self.path)
+        with self.assertRaisesRegex(ValueError, "extended"):
+            restore_snapshot(CPUEmulator(self.words, False), self.path)
+
+    def test_run_until(self) -> None:
+        words, symbol_table = assemble(translate_vm(
+            "08/FunctionCalls/FibonacciElement", self.directory))
+        emulator = CPUEmulator(words)
+        emulator.symbol_table = symbol_table
+        entry = symbol_table.labels["Main.fibonacci"]
+        cycles = run_until(emulator, "Main.fibonacci")
+        interpreted = CPUEmulator(words)
+        while interpreted.pc != entry:
+            interpreted.step()
+        self.assertEqual(cycles, interpreted.cycles)
+        self.assertEqual(final_state(emulator), final_state(interpreted))
+        with self.assertRaisesRegex(ValueError, "no label"):
+            run_until(emulator, "Main.main")
+        with self.assertRaisesRegex(ValueError, "wasn't reached"):
+            run_until(CPUEmulator.from_file(
+                os.path.join(PROJECT_DIR, "max", "Max.asm")), "OUTPUT_D", 3)
@@ -0,0 +1,349 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import typing
+import ProjectPaths
+from CPUEmulator import WORD_MASK, SIGN_BIT
+from ChipModels import ExtendAluChip, Machine
+from HDLParser import HDLError
+from HDLSimulator import HDLChip, Program, TRUE
+
+# Chips with at most this many input bits get every input combination
+MAX_EXHAUSTIVE_BITS = 16
+DEFAULT_VECTORS = 10_000
+# A test vector: a value for each input pin, or for each output pin
+Vector = typing.Dict[str, int]
+
+
+def multiplexer(names: str) -> typing.Callable[[Vector], Vector]:
+    return lambda pins: {"out": pins[names[pins["sel"]]]}
+
+
+def demultiplexer(names: str) -> typing.Callable[[Vector], Vector]:
+    return lambda pins: {name: pins["in"] if index == pins["sel"] else 0
+                         for index, name in enumerate(names)}
+
+
+def alu(pins: Vector) -> Vector:
+    x, y = pins["x"], pins["y"]
+    if pins["zx"]:
+        x = 0
+    if pins["nx"]:
+        x ^= WORD_MASK
+    if pins["zy"]:
+        y = 0
+    if pins["ny"]:
+        y ^= WORD_MASK
+    out = (x + y) & WORD_MASK if pins["f"] else x & y
+    if pins["no"]:
+        out ^= WORD_MASK
+    return {"out": out, "zr": int(out == 0), "ng": int(bool(out & SIGN_BIT))}
+
+
+# The model behind extend_alu, made once since each holds an emulator
+EXTEND_ALU = ExtendAluChip()
+
+
+def extend_alu(pins: Vector) -> Vector:
+    for name, value in pins.items():
+        EXTEND_ALU.set(name, value)
+    return {name: EXTEND_ALU.get(name) for name in ("out", "zr", "ng")}
+
+
+# What the combinational chips of projects 01, 02 and 05 compute, by chip
+REFERENCES = {
+    "Nand": lambda pins: {"out": 1 - (pins["a"] & pins["b"])},
+    "Not": lambda pins: {"out": 1 - pins["in"]},
+    "And": lambda pins: {"out": pins["a"] & pins["b"]},
+    "Or": lambda pins: {"out": pins["a"] | pins["b"]},
+    "Xor": lambda pins: {"out": pins["a"] ^ pins["b"]},
+    "Mux": multiplexer("ab"),
+    "DMux": demultiplexer("ab"),
+    "Not16": lambda pins: {"out": pins["in"] ^ WORD_MASK},
+    "And16": lambda pins: {"out": pins["a"] & pins["b"]},
+    "Or16": lambda pins: {"out": pins["a"] | pins["b"]},
+    "Mux16": multiplexer("ab"),
+    "Or8Way": lambda pins: {"out": int(pins["in"] != 0)},
+    "Mux4Way16": multiplexer("abcd"),
+    "Mux8Way16": multiplexer("abcdefgh"),
+    "DMux4Way": demultiplexer("abcd"),
+    "DMux8Way": demultiplexer("abcdefgh"),
+    "HalfAdder": lambda pins: {"sum": pins["a"] ^ pins["b"],
+                               "carry": pins["a"] & pins["b"]},
+    "FullAdder": lambda pins: {
+        "sum": (pins["a"] + pins["b"] + pins["c"]) & 1,
+        "carry": (pins["a"] + pins["b"] + pins["c"]) >> 1},
+    "Add16": lambda pins: {"out": (pins["a"] + pins["b"]) & WORD_MASK},
+    "Inc16": lambda pins: {"out": (pins["in"] + 1) & WORD_MASK},
+    "ALU": alu,
+    "ExtendAlu": extend_alu,
+}
+
+
+def pack_lanes(values: typing.List[int], width: int) -> typing.List[int]:
+    """
+    Args:
+        values (typing.List[int]): a pin's value in each test vector.
+        width (int): the pin's width.
+
+    Returns:
+        typing.List[int]: an int per bit of the pin, whose bit k is that
+        bit's value in test vector k.
+    """
+    return [int("".join("1" if value >> bit & 1 else "0"
+                        for value in reversed(values)) or "0", 2)
+            for bit in range(width)]
+
+
+def lane_value(bits: typing.List[int], lane: int) -> int:
+    """
+    Args:
+        bits (typing.List[int]): a pin's bits, packed by pack_lanes.
+        lane (int): a test vector.
+
+    Returns:
+        int: the pin's value in that test vector.
+    """
+    return sum((packed >> lane & 1) << bit for bit, packed in enumerate(bits))
+
+
+def exhaustive_vectors(inputs: typing.Dict[str, int]) -> typing.List[Vector]:
+    """
+    Args:
+        inputs (typing.Dict[str, int]): the width of each input pin.
+
+    Returns:
+        typing.List[Vector]: every combination of input values.
+    """
+    vectors = []
+    for combination in range(1 << sum(inputs.values())):
+        vector = dict()
+        for name, width in inputs.items():
+            vector[name] = combination & ((1 << width) - 1)
+            combination >>= width
+        vectors.append(vector)
+    return vectors
+
+
+def random_vectors(inputs: typing.Dict[str, int], count: int,
+                   rng: random.Random) -> typing.List[Vector]:
+    """
+    Args:
+        inputs (typing.Dict[str, int]): the width of each input pin.
+        count (int): how many vectors.
+        rng (random.Random): where the values come from.
+
+    Returns:
+        typing.List[Vector]: input values drawn uniformly.
+    """
+    return [{name: rng.getrandbits(width) for name, width in inputs.items()}
+            for _ in range(count)]
+
+
+def evaluate_vectors(program: Program, vectors: typing.List[Vector]) \
+        -> typing.Dict[str, typing.List[int]]:
+    """Evaluates a combinational chip on every test vector at once: each
+    wire holds an int with a bit per vector, so each Nand gate is one
+    bitwise operation over all of them.
+
+    Args:
+        program (Program): the compiled chip.
+        vectors (typing.List[Vector]): its inputs.
+
+    Returns:
+        typing.Dict[str, typing.List[int]]: the bits of each output pin,
+        packed like pack_lanes.
+    """
+    if not is_combinational(program):
+        raise HDLError("only combinational chips can be evaluated on many "
+                       "vectors at once")
+    w = [0] * program.wire_count
+    mask = (1 << len(vectors)) - 1
+    w[TRUE] = mask
+    for name, wires in program.inputs.items():
+        for wire, packed in zip(wires, pack_lanes(
+                [vector[name] for vector in vectors], len(wires))):
+            w[wire] = packed
+    program.evaluate(w, [], mask)
+    return {name: [w[wire] & mask for wire in wires]
+            for name, wires in program.outputs.items()}
+
+
+def is_combinational(program: Program) -> bool:
+    """
+    Returns:
+        bool: True if the chip has no DFFs or builtin chips, so it can be
+        evaluated on packed vectors.
+    """
+    return not program.dff_count and not program.builtins
+
+
+class PackedChip(Machine):
+    """A combinational chip for a test script, evaluated on all of the
+    script's test vectors at once. The script is run twice: while recording,
+    eval only notes the inputs, and after evaluate, each eval moves on to
+    the outputs of the next noted vector.
+    """
+
+    def __init__(self, program: Program) -> None:
+        """
+        Args:
+            program (Program): the compiled chip, which is_combinational.
+        """
+        self.program = program
+        self.widths = {pin: len(wires)
+                       for pin, wires in program.inputs.items()}
+        self.pins = dict.fromkeys(self.widths, 0)
+        # The inputs of every eval, after the all-zero inputs the chip
+        # starts with
+        self.vectors = [dict(self.pins)]
+        self.outputs = None
+        self.lane = 0
+
+    def evaluate(self) -> None:
+        """Evaluates the recorded vectors and starts replaying them."""
+        self.outputs = evaluate_vectors(self.program, self.vectors)
+        self.pins = dict(self.vectors[0])
+        self.lane = 0
+
+    def get(self, name: str) -> int:
+        if name in self.pins:
+            return self.pins[name]
+        if name not in self.program.outputs:
+            raise KeyError(name)
+        if self.outputs is None:
+            return 0
+        return lane_value(self.outputs[name], self.lane)
+
+    def set(self, name: str, value: int) -> None:
+        if name not in self.pins:
+            raise KeyError(name)
+        self.pins[name] = value & ((1 << self.widths[name]) - 1)
+
+    def eval(self) -> None:
+        if self.outputs is None:
+            self.vectors.append(dict(self.pins))
+        else:
+            self.lane += 1
+
+    def tick(self) -> None:
+        # An HDL chip settles on the clock too
+        self.eval()
+
+    def tock(self) -> None:
+        self.eval()
+
+
+def check_chip(path: str, count: int = DEFAULT_VECTORS, seed: int = 0) \
+        -> typing.Dict[str, typing.Any]:
+    """Compares a chip's HDL with its reference in REFERENCES, on every
+    input combination if it has at most MAX_EXHAUSTIVE_BITS input bits and
+    on random inputs otherwise.
+
+    Args:
+        path (str): the chip's .hdl file.
+        count (int): how many random vectors.
+        seed (int): the random seed, so runs are repeatable.
+
+    Returns:
+        typing.Dict[str, typing.Any]: whether it passed, how many vectors
+        it was checked on and whether they were all the combinations, the
+        time it took, and the first mismatching vector with the expected
+        and actual outputs.
+    """
+    start = time.perf_counter()
+    name = os.path.splitext(os.path.basename(path))[0]
+    result = {"chip": path, "passed": False, "error": None,
+              "mismatch": None, "vectors": 0, "exhaustive": False}
+    try:
+        if name not in REFERENCES:
+            raise HDLError(f"no reference for {name}")
+        program = HDLChip(path).program
+        widths = {pin: len(wires) for pin, wires in program.inputs.items()}
+        result["exhaustive"] = sum(widths.values()) <= MAX_EXHAUSTIVE_BITS
+        vectors = exhaustive_vectors(widths) if result["exhaustive"] \
+            else random_vectors(widths, count, random.Random(seed))
+        result["vectors"] = len(vectors)
+        actual = evaluate_vectors(program, vectors)
+        expected = [REFERENCES[name](vector) for vector in vectors]
+        difference = 0
+        for pin, bits in actual.items():
+            for packed, reference in zip(bits, pack_lanes(
+                    [outputs[pin] for outputs in expected], len(bits))):
+                difference |= packed ^ reference
+        if difference:
+            lane = (difference & -difference).bit_length() - 1
+            result["mismatch"] = (vectors[lane], expected[lane],
+                                  {pin: lane_value(bits, lane)
+                                   for pin, bits in actual.items()})
+        else:
+            result["passed"] = True
+    except (HDLError, OSError) as error:
+        result["error"] = str(error)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def find_chips(paths: typing.List[str]) -> typing.List[str]:
+    """
+    Args:
+        paths (typing.List[str]): .hdl files and directories holding them.
+
+    Returns:
+        typing.List[str]: every chip with a reference, with directories
+        searched recursively, and every file given explicitly.
+    """
+    chips = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                chips.extend(os.path.join(directory, name)
+                             for name in sorted(files)
+                             if name.endswith(".hdl") and
+                             name[:-len(".hdl")] in REFERENCES)
+        else:
+            chips.append(path)
+    return chips
+
+
+def describe(result: typing.Dict[str, typing.Any]) -> str:
+    name = os.path.relpath(result["chip"])
+    kind = "all" if result["exhaustive"] else "random"
+    if result["passed"]:
+        return f"PASS  {name} ({kind} {result['vectors']} vectors, " \
+               f"{result['seconds'] * 1e3:.0f}ms)"
+    if result["error"] is not None:
+        return f"ERROR {name}: {result['error']}"
+    inputs, expected, actual = result["mismatch"]
+    return f"FAIL  {name}: inputs {inputs}\n      expected {expected}\n" \
+           f"      got      {actual}"
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="BitParallel")
+    arg_parser.add_argument("paths", nargs="+",
+                            help=".hdl chips, or directories of them")
+    arg_parser.add_argument("--vectors", type=int, default=DEFAULT_VECTORS,
+                            help="random vectors for chips with more than "
+                            f"{MAX_EXHAUSTIVE_BITS} input bits")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    results = [check_chip(chip, args.vectors, args.seed)
+               for chip in find_chips(args.paths)]
+    for result in results:
+        print(describe(result))
+    passed = sum(result["passed"] for result in results)
+    print(f"{passed}/{len(results)} passed in "
+          f"{time.perf_counter() - start:.2f}s")
+    if passed < len(results):
+        sys.exit(1)
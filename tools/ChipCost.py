@@ -0,0 +1,292 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import collections
+import os
+import typing
+from HDLParser import ChipDefinition
+from HDLSimulator import ALIASES, HARDWARE_DIRECTORIES, PRIMITIVES, Builtin, \
+    ChipLibrary, Netlist, Program
+
+# The longest path to a wire from each input bit, by the bit's index
+Depths = typing.Dict[int, int]
+
+
+class ChipCost:
+    """What a chip costs in hardware: its gates, and the longest chains of
+    Nand gates through it. Paths start at the chip's inputs or at the
+    outputs of its DFFs and builtin chips, and end at its outputs or at the
+    inputs of its DFFs and builtin chips, so builtin chips such as the
+    Screen count as registers. Input and output bits are numbered in the
+    order of the chip's pins.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.nands = 0
+        self.dffs = 0
+        self.builtins = 0
+        # For each output bit, the longest path to it from each input bit
+        self.paths = []
+        # For each output bit, the longest path to it from inside the chip
+        self.arrivals = []
+        # For each input bit, the longest path from it into the chip
+        self.required = []
+        # The longest path from inside the chip back into it
+        self.internal = None
+        # The chip names of the parts, one per part
+        self.parts = []
+
+    def critical_path(self) -> typing.Tuple[int, str]:
+        """
+        Returns:
+            typing.Tuple[int, str]: the number of Nand gates on the longest
+            path through the chip, and where it starts and ends.
+        """
+        candidates = [(0, "none")]
+        candidates.extend((depth, "input to output")
+                          for depths in self.paths
+                          for depth in depths.values())
+        candidates.extend((depth, "input to register")
+                          for depth in self.required if depth is not None)
+        candidates.extend((depth, "register to output")
+                          for depth in self.arrivals if depth is not None)
+        if self.internal is not None:
+            candidates.append((self.internal, "register to register"))
+        return max(candidates, key=lambda candidate: candidate[0])
+
+
+def later(first: typing.Optional[int], second: typing.Optional[int]) \
+        -> typing.Optional[int]:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+def delayed(target: Depths, source: Depths, delay: int) -> None:
+    """
+    Args:
+        target (Depths): a wire's paths, extended in place.
+        source (Depths): the paths of a wire driving it.
+        delay (int): the gates between the two.
+    """
+    for index, depth in source.items():
+        if target.get(index, -1) < depth + delay:
+            target[index] = depth + delay
+
+
+class PartsLibrary(ChipLibrary):
+    """Resolves a chip as itself and its parts as builtin chips with the
+    same pins, so building it gives the connections of its parts without
+    flattening them.
+    """
+
+    def __init__(self, library: ChipLibrary, chip: str) -> None:
+        super().__init__(library.directories)
+        self.library = library
+        self.chip = chip
+
+    def resolve(self, name: str) -> ChipDefinition:
+        if name == self.chip or name in PRIMITIVES:
+            return self.library.resolve(name)
+        if name not in self.definitions:
+            definition = self.library.resolve(name)
+            part = ChipDefinition(name, definition.path)
+            part.inputs = dict(definition.inputs)
+            part.outputs = dict(definition.outputs)
+            part.builtin = name
+            self.builtins[name] = type(name, (Builtin,),
+                                       {"inputs": part.inputs,
+                                        "outputs": part.outputs})
+            self.definitions[name] = part
+        return self.definitions[name]
+
+
+class CostAnalyzer:
+    """Works out what chips cost, one level at a time: a chip's cost is
+    put together from the costs of its parts, which are kept, so chips used
+    in many places, like Mux16 in the ALU and the CPU, are analyzed once.
+    """
+
+    def __init__(self, directories: typing.List[str]) -> None:
+        """
+        Args:
+            directories (typing.List[str]): where chips are looked for.
+        """
+        self.library = ChipLibrary(directories)
+        self.costs = dict()
+
+    def analyze(self, name: str) -> ChipCost:
+        """
+        Args:
+            name (str): a chip.
+
+        Returns:
+            ChipCost: its cost.
+        """
+        name = ALIASES.get(name, name)
+        if name not in self.costs:
+            definition = self.library.resolve(name)
+            if definition.builtin is None:
+                self.costs[name] = self.compose(name)
+            else:
+                self.costs[name] = self.leaf(definition)
+        return self.costs[name]
+
+    @staticmethod
+    def leaf(definition: ChipDefinition) -> ChipCost:
+        """
+        Args:
+            definition (ChipDefinition): a Nand gate, DFF or builtin chip.
+
+        Returns:
+            ChipCost: its cost.
+        """
+        cost = ChipCost(definition.name)
+        if definition.builtin == "Nand":
+            cost.nands = 1
+            cost.paths = [{0: 1, 1: 1}]
+            cost.arrivals = [None]
+            cost.required = [None, None]
+            return cost
+        if definition.builtin == "DFF":
+            cost.dffs = 1
+        else:
+            cost.builtins = 1
+        cost.paths = [dict() for width in definition.outputs.values()
+                      for _ in range(width)]
+        cost.arrivals = [0] * len(cost.paths)
+        cost.required = [0] * sum(definition.inputs.values())
+        return cost
+
+    def compose(self, name: str) -> ChipCost:
+        """
+        Args:
+            name (str): a chip built of parts.
+
+        Returns:
+            ChipCost: its cost, from its parts' costs.
+        """
+        netlist = Netlist(PartsLibrary(self.library, name))
+        netlist.build(name)
+        cost = ChipCost(name)
+        cost.nands = len(netlist.nands)
+        cost.dffs = len(netlist.dffs)
+        cost.parts = ["Nand"] * len(netlist.nands) + \
+            ["DFF"] * len(netlist.dffs)
+        depths = collections.defaultdict(dict)
+        arrivals = dict()
+        inputs = [wire for bus in netlist.inputs.values() for wire in bus]
+        for index, wire in enumerate(inputs):
+            depths[wire][index] = 0
+        for _, out in netlist.dffs:
+            arrivals[out] = 0
+        # The parts with their costs and flattened input and output bits
+        parts = []
+        for builtin, input_buses, output_buses in netlist.builtins:
+            part = self.analyze(builtin.__name__)
+            parts.append((part, [wire for bus in input_buses
+                                 for wire in bus],
+                          [wire for bus in output_buses for wire in bus]))
+            cost.parts.append(part.name)
+            cost.nands += part.nands
+            cost.dffs += part.dffs
+            cost.builtins += part.builtins
+            cost.internal = later(cost.internal, part.internal)
+        # Each Nand gate is a node, and so is each output bit of a part,
+        # named by its wire, so parts feeding each other aren't a loop
+        producers = {out: gate for gate in netlist.nands
+                     for out in gate[2:]}
+        node_inputs = {gate: gate[:2] for gate in netlist.nands}
+        part_bits = dict()
+        for part, part_inputs, part_outputs in parts:
+            for bit, out in enumerate(part_outputs):
+                producers[out] = out
+                part_bits[out] = (part, part_inputs, bit)
+                node_inputs[out] = [part_inputs[source]
+                                    for source in part.paths[bit]]
+        for node in Program.topological_order(set(node_inputs), node_inputs,
+                                              producers):
+            if isinstance(node, tuple):
+                a, b, out = node
+                delayed(depths[out], depths[a], 1)
+                delayed(depths[out], depths[b], 1)
+                arrival = later(arrivals[a] + 1 if a in arrivals else None,
+                                arrivals[b] + 1 if b in arrivals else None)
+            else:
+                out = node
+                part, part_inputs, bit = part_bits[out]
+                arrival = part.arrivals[bit]
+                for source, delay in part.paths[bit].items():
+                    wire = part_inputs[source]
+                    delayed(depths[out], depths[wire], delay)
+                    if wire in arrivals:
+                        arrival = later(arrival, arrivals[wire] + delay)
+            if arrival is not None:
+                arrivals[out] = arrival
+        # Paths ending inside DFFs and parts
+        endpoints = [(wire, 0) for wire, _ in netlist.dffs]
+        endpoints.extend((part_inputs[bit], required)
+                         for part, part_inputs, _ in parts
+                         for bit, required in enumerate(part.required)
+                         if required is not None)
+        cost.required = [None] * len(inputs)
+        for wire, required in endpoints:
+            for index, depth in depths[wire].items():
+                cost.required[index] = later(cost.required[index],
+                                             depth + required)
+            if wire in arrivals:
+                cost.internal = later(cost.internal,
+                                      arrivals[wire] + required)
+        for bus in netlist.outputs.values():
+            for wire in bus:
+                cost.paths.append(dict(depths.get(wire, dict())))
+                cost.arrivals.append(arrivals.get(wire))
+        return cost
+
+
+def describe(cost: ChipCost, analyzer: CostAnalyzer) -> str:
+    """
+    Args:
+        cost (ChipCost): a chip's cost.
+        analyzer (CostAnalyzer): what worked it out, for its parts' costs.
+
+    Returns:
+        str: the totals and a line per kind of part, costliest first.
+    """
+    depth, kind = cost.critical_path()
+    lines = [f"{cost.name}: {cost.nands} Nand gates, {cost.dffs} DFFs, "
+             f"{cost.builtins} builtin chips, critical path {depth} gates "
+             f"({kind})",
+             f"  {'part':<16}{'count':>6}{'gates':>9}{'DFFs':>7}{'depth':>7}"]
+    counts = collections.Counter(cost.parts)
+    rows = []
+    for name, count in counts.items():
+        part = analyzer.analyze(name)
+        rows.append((part.nands * count, name, count, part.dffs * count,
+                     part.critical_path()[0]))
+    for nands, name, count, dffs, part_depth in sorted(rows, reverse=True):
+        lines.append(f"  {name:<16}{count:>6}{nands:>9}{dffs:>7}"
+                     f"{part_depth:>7}")
+    return "\n".join(lines)
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="ChipCost")
+    arg_parser.add_argument("chips", nargs="+", help=".hdl files")
+    args = arg_parser.parse_args()
+
+    analyzers = dict()
+    for path in args.chips:
+        path = os.path.abspath(path)
+        directories = [os.path.dirname(path)] + HARDWARE_DIRECTORIES
+        analyzer = analyzers.setdefault(tuple(directories),
+                                        CostAnalyzer(directories))
+        name = os.path.splitext(os.path.basename(path))[0]
+        print(describe(analyzer.analyze(name), analyzer))
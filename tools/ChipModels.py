@@ -0,0 +1,357 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+import ProjectPaths
+from CPUEmulator import CPUEmulator, RAM_SIZE, KBD, WORD_MASK, \
+    ADDRESS_MASK, SIGN_BIT, C_BIT, DEST_A, DEST_D, DEST_M, JUMP_NEGATIVE, \
+    JUMP_ZERO, JUMP_POSITIVE, load_program
+from BlockCompiler import BlockCompiler
+
+# A variable of a test script, such as RAM[14], PC or DRegister[]
+VARIABLE = re.compile(r"^([A-Za-z0-9]+)(?:\[(\d*)\])?$")
+# The ExtendAlu instruction is bits 6 to 14 of a C-instruction
+EXTEND_ALU_SHIFT = 6
+
+
+def split_variable(name: str) -> typing.Tuple[str, typing.Optional[int]]:
+    """
+    Args:
+        name (str): a variable, such as RAM[14] or PC.
+
+    Returns:
+        typing.Tuple[str, typing.Optional[int]]: its name and its index, if
+        it has one.
+    """
+    match = VARIABLE.match(name)
+    if match is None:
+        raise KeyError(name)
+    index = match.group(2)
+    return match.group(1), int(index) if index else None
+
+
+class Machine:
+    """What a test script drives: a chip or a program with named variables,
+    clocked by tick and tock. Chips without a clock only need eval.
+    """
+
+    def get(self, name: str) -> int:
+        """
+        Args:
+            name (str): a variable.
+
+        Returns:
+            int: its value, as an unsigned number of its width.
+        """
+        raise KeyError(name)
+
+    def set(self, name: str, value: int) -> None:
+        """
+        Args:
+            name (str): a variable.
+            value (int): its new value, as an unsigned 16-bit number.
+        """
+        raise KeyError(name)
+
+    def load(self, path: str) -> None:
+        """Loads a program, for machines with a ROM.
+
+        Args:
+            path (str): the program.
+        """
+        raise ValueError(f"{type(self).__name__} can't load {path}")
+
+    def set_key(self, key: int) -> None:
+        """Presses a key, for machines with a keyboard.
+
+        Args:
+            key (int): the code of the pressed key, or 0 for none.
+        """
+        raise ValueError(f"{type(self).__name__} has no keyboard")
+
+    def eval(self) -> None:
+        """Recomputes the outputs from the inputs."""
+
+    def tick(self) -> None:
+        """The first half of a clock cycle."""
+
+    def tock(self) -> None:
+        """The second half of a clock cycle."""
+
+    def run(self, cycles: int) -> None:
+        """Runs whole clock cycles. Machines that can skip ahead faster than
+        one tick and tock at a time override this.
+
+        Args:
+            cycles (int): how many cycles to run.
+        """
+        for _ in range(cycles):
+            self.tick()
+            self.tock()
+
+
+class ProgramMachine(Machine):
+    """The CPU emulator's view of the computer, as in 04's test scripts:
+    a program loaded into ROM, with RAM[n], A, D and PC as variables and
+    one instruction executed per clock cycle.
+    """
+
+    def __init__(self) -> None:
+        self.emulator = CPUEmulator()
+        self.compiler = BlockCompiler(self.emulator)
+
+    def load(self, path: str) -> None:
+        words, symbol_table = load_program(path)
+        ram = self.emulator.ram
+        self.emulator = CPUEmulator(words)
+        self.emulator.symbol_table = symbol_table
+        self.emulator.ram = ram
+        self.compiler = BlockCompiler(self.emulator)
+
+    def get(self, name: str) -> int:
+        base, index = split_variable(name)
+        if base == "RAM" and index is not None:
+            return self.emulator.ram[index]
+        if base in ("A", "D", "PC"):
+            return getattr(self.emulator, base.lower())
+        raise KeyError(name)
+
+    def set(self, name: str, value: int) -> None:
+        base, index = split_variable(name)
+        if base == "RAM" and index is not None:
+            self.emulator.ram[index] = value
+        elif base in ("A", "D"):
+            setattr(self.emulator, base.lower(), value)
+        elif base == "PC":
+            self.emulator.pc = value & ADDRESS_MASK
+            self.emulator.halted = False
+        else:
+            raise KeyError(name)
+
+    def set_key(self, key: int) -> None:
+        self.emulator.set_key(key)
+
+    def tock(self) -> None:
+        self.run(1)
+
+    def run(self, cycles: int) -> None:
+        emulator = self.emulator
+        done = self.compiler.run(cycles)
+        if emulator.halted:
+            # The program ends in an `(END) @END 0;JMP` loop, which keeps
+            # running on the real CPU: the jump just taken leads back to
+            # @END, and the loop alternates between them from there
+            emulator.halted = False
+            remaining = cycles - done
+            emulator.pc = emulator.pc - 1 if remaining % 2 == 0 \
+                else emulator.pc
+            emulator.cycles += remaining
+
+
+class ComputerChip(ProgramMachine):
+    """Computer.hdl, as in 05's test scripts: the ROM is loaded with
+    `ROM32K load`, and the registers and RAM are read through the parts'
+    names. Each tock executes an instruction, or restarts the program while
+    reset is set.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reset = 0
+
+    def get(self, name: str) -> int:
+        base, index = split_variable(name)
+        if base == "ARegister":
+            return self.emulator.a
+        if base == "DRegister":
+            return self.emulator.d
+        if base == "PC":
+            return self.emulator.pc
+        if base == "RAM16K" and index is not None:
+            return self.emulator.ram[index]
+        if base == "reset":
+            return self.reset
+        raise KeyError(name)
+
+    def set(self, name: str, value: int) -> None:
+        base, index = split_variable(name)
+        if base == "RAM16K" and index is not None:
+            self.emulator.ram[index] = value
+        elif base == "reset":
+            self.reset = value & 1
+        else:
+            raise KeyError(name)
+
+    def tock(self) -> None:
+        self.run(1)
+
+    def run(self, cycles: int) -> None:
+        if not self.reset:
+            super().run(cycles)
+            return
+        for _ in range(cycles):
+            super().run(1)
+            self.emulator.pc = 0
+
+
+class CPUChip(Machine):
+    """CPU.hdl, or CpuMul.hdl when extended, on its own: the instruction and
+    inM are inputs, and outM, writeM, addressM and pc are recomputed from
+    them whenever they are read. As with the builtin registers, a tick
+    computes the registers' next values, which ARegister[] and DRegister[]
+    show right away, and the tock moves them to the outputs.
+    """
+
+    def __init__(self, extended: bool = False) -> None:
+        # Only used for its ALU functions
+        self.decoder = CPUEmulator(extended=extended)
+        self.instruction = 0
+        self.in_m = 0
+        self.reset = 0
+        self.a = self.d = self.pc = 0
+        self.next_a = self.next_d = self.next_pc = 0
+
+    def out(self) -> int:
+        return self.decoder.alu(self.instruction | C_BIT)(
+            self.d, self.a, self.in_m)
+
+    def write_m(self) -> int:
+        return int(bool(self.instruction & C_BIT and
+                        (self.instruction >> 3) & DEST_M))
+
+    def get(self, name: str) -> int:
+        base, _ = split_variable(name)
+        values = {"instruction": lambda: self.instruction,
+                  "inM": lambda: self.in_m, "reset": lambda: self.reset,
+                  "outM": self.out, "writeM": self.write_m,
+                  "addressM": lambda: self.a & ADDRESS_MASK,
+                  "pc": lambda: self.pc, "ARegister": lambda: self.next_a,
+                  "DRegister": lambda: self.next_d}
+        if base not in values:
+            raise KeyError(name)
+        return values[base]()
+
+    def set(self, name: str, value: int) -> None:
+        base, _ = split_variable(name)
+        if base == "instruction":
+            self.instruction = value
+        elif base == "inM":
+            self.in_m = value
+        elif base == "reset":
+            self.reset = value & 1
+        else:
+            raise KeyError(name)
+
+    def tick(self) -> None:
+        instruction = self.instruction
+        self.next_a, self.next_d = self.a, self.d
+        self.next_pc = (self.pc + 1) & ADDRESS_MASK
+        if not instruction & C_BIT:
+            self.next_a = instruction
+        else:
+            out = self.out()
+            dest = (instruction >> 3) & 0b111
+            if dest & DEST_A:
+                self.next_a = out
+            if dest & DEST_D:
+                self.next_d = out
+            if instruction & (JUMP_ZERO if out == 0 else JUMP_NEGATIVE
+                              if out & SIGN_BIT else JUMP_POSITIVE):
+                self.next_pc = self.a & ADDRESS_MASK
+        if self.reset:
+            self.next_pc = 0
+
+    def tock(self) -> None:
+        self.a, self.d, self.pc = self.next_a, self.next_d, self.next_pc
+
+
+class MemoryChip(Machine):
+    """Memory.hdl: 16K of RAM, the screen and the keyboard behind one
+    address input. Writes are latched on the tick and seen after the tock;
+    the keyboard and addresses above it can't be written.
+    """
+
+    def __init__(self) -> None:
+        self.ram = [0] * RAM_SIZE
+        self.input = 0
+        self.load_bit = 0
+        self.address = 0
+        self.pending = None
+
+    def get(self, name: str) -> int:
+        base, _ = split_variable(name)
+        if base == "out":
+            return self.ram[self.address] if self.address <= KBD else 0
+        if base == "in":
+            return self.input
+        if base == "load":
+            return self.load_bit
+        if base == "address":
+            return self.address
+        raise KeyError(name)
+
+    def set(self, name: str, value: int) -> None:
+        base, _ = split_variable(name)
+        if base == "in":
+            self.input = value
+        elif base == "load":
+            self.load_bit = value & 1
+        elif base == "address":
+            self.address = value & ADDRESS_MASK
+        else:
+            raise KeyError(name)
+
+    def set_key(self, key: int) -> None:
+        self.ram[KBD] = key
+
+    def tick(self) -> None:
+        if self.load_bit and self.address < KBD:
+            self.pending = (self.address, self.input)
+
+    def tock(self) -> None:
+        if self.pending is not None:
+            address, value = self.pending
+            self.ram[address] = value
+            self.pending = None
+
+
+class ExtendAluChip(Machine):
+    """ExtendAlu.hdl, whose 9 instruction bits are bits 6 to 14 of a CpuMul
+    C-instruction: the regular ALU when bits 7 and 8 are set, a shift of x
+    or y when bit 8 is clear.
+    """
+
+    def __init__(self) -> None:
+        self.decoder = CPUEmulator(extended=True)
+        self.inputs = {"x": 0, "y": 0, "instruction": 0}
+
+    def get(self, name: str) -> int:
+        base, _ = split_variable(name)
+        if base in self.inputs:
+            return self.inputs[base]
+        word = C_BIT | (self.inputs["instruction"] << EXTEND_ALU_SHIFT)
+        y = self.inputs["y"]
+        out = self.decoder.alu(word)(self.inputs["x"], y, y)
+        if base == "out":
+            return out
+        if base == "zr":
+            return int(out == 0)
+        if base == "ng":
+            return int(bool(out & SIGN_BIT))
+        raise KeyError(name)
+
+    def set(self, name: str, value: int) -> None:
+        base, _ = split_variable(name)
+        if base not in self.inputs:
+            raise KeyError(name)
+        self.inputs[base] = value & WORD_MASK
+
+
+# The models standing in for chips loaded by a test script, by chip name
+CHIP_MODELS = {"CPU": CPUChip, "CpuMul": lambda: CPUChip(extended=True),
+               "Computer": ComputerChip, "Memory": MemoryChip,
+               "ExtendAlu": ExtendAluChip}
@@ -0,0 +1,204 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+
+# Comments, names, numbers, the .. of bus ranges and punctuation
+TOKEN = re.compile(r"//[^\n]*|/\*.*?\*/|[A-Za-z_]\w*|\d+|\.\.|\S",
+                   re.DOTALL)
+NAME = re.compile(r"^[A-Za-z_]\w*$")
+# A range of bits of a bus, first and last inclusive
+Bits = typing.Optional[typing.Tuple[int, int]]
+
+
+class HDLError(Exception):
+    """A chip that can't be parsed or built, with the line it failed on."""
+
+    def __init__(self, message: str, line: int = 0) -> None:
+        super().__init__(f"line {line}: {message}" if line else message)
+        self.line = line
+
+
+class Connection:
+    """A `pin[bits]=wire[bits]` argument of a part."""
+
+    def __init__(self, pin: str, pin_bits: Bits, wire: str,
+                 wire_bits: Bits) -> None:
+        self.pin = pin
+        self.pin_bits = pin_bits
+        self.wire = wire
+        self.wire_bits = wire_bits
+
+
+class Part:
+    """A chip used inside another, with its connections."""
+
+    def __init__(self, name: str, connections: typing.List[Connection],
+                 line: int) -> None:
+        self.name = name
+        self.connections = connections
+        self.line = line
+
+
+class ChipDefinition:
+    """A parsed .hdl file: the chip's pins, and either its parts or the
+    name of the builtin chip implementing it.
+    """
+
+    def __init__(self, name: str, path: str = "") -> None:
+        self.name = name
+        self.path = path
+        self.inputs = dict()
+        self.outputs = dict()
+        self.parts = []
+        self.builtin = None
+        self.clocked = []
+
+    def pin_width(self, name: str) -> typing.Optional[int]:
+        """
+        Args:
+            name (str): a pin.
+
+        Returns:
+            typing.Optional[int]: its width, or None if the chip has no such
+            input or output.
+        """
+        if name in self.inputs:
+            return self.inputs[name]
+        return self.outputs.get(name)
+
+
+def parse_hdl(text: str, path: str = "") -> ChipDefinition:
+    """
+    Args:
+        text (str): the contents of an .hdl file.
+        path (str): where it was read from, kept for error messages.
+
+    Returns:
+        ChipDefinition: the chip it defines.
+    """
+    tokens = []
+    for match in TOKEN.finditer(text):
+        token = match.group()
+        if not token.startswith("//") and not token.startswith("/*"):
+            tokens.append((token, text.count("\n", 0, match.start()) + 1))
+    tokens.append(("", tokens[-1][1] if tokens else 0))
+    position = 0
+
+    def peek() -> str:
+        return tokens[position][0]
+
+    def line() -> int:
+        return tokens[position][1]
+
+    def take(expected: typing.Optional[str] = None) -> str:
+        nonlocal position
+        token = tokens[position][0]
+        if expected is not None and token != expected:
+            raise HDLError(f"expected {expected}, found {token or 'the end'}",
+                           line())
+        if not token:
+            raise HDLError("unexpected end of file", line())
+        position += 1
+        return token
+
+    def take_name() -> str:
+        token = take()
+        if not NAME.match(token):
+            raise HDLError(f"expected a name, found {token}", line())
+        return token
+
+    def take_number() -> int:
+        token = take()
+        if not token.isdigit():
+            raise HDLError(f"expected a number, found {token}", line())
+        return int(token)
+
+    def take_bits() -> Bits:
+        if peek() != "[":
+            return None
+        take("[")
+        first = last = take_number()
+        if peek() == "..":
+            take("..")
+            last = take_number()
+        take("]")
+        if last < first:
+            raise HDLError(f"bits [{first}..{last}] are reversed", line())
+        return first, last
+
+    def take_pins() -> typing.Dict[str, int]:
+        pins = dict()
+        while True:
+            name = take_name()
+            width = 1
+            if peek() == "[":
+                take("[")
+                width = take_number()
+                take("]")
+            pins[name] = width
+            separator = take()
+            if separator == ";":
+                return pins
+            if separator != ",":
+                raise HDLError(f"expected , or ;, found {separator}", line())
+
+    take("CHIP")
+    chip = ChipDefinition(take_name(), path)
+    take("{")
+    while peek() in ("IN", "OUT"):
+        if take() == "IN":
+            chip.inputs.update(take_pins())
+        else:
+            chip.outputs.update(take_pins())
+    if peek() == "BUILTIN":
+        take("BUILTIN")
+        chip.builtin = take_name()
+        take(";")
+        if peek() == "CLOCKED":
+            take("CLOCKED")
+            chip.clocked = list(take_pins())
+    else:
+        take("PARTS")
+        take(":")
+        while peek() != "}":
+            part_line = line()
+            name = take_name()
+            take("(")
+            connections = []
+            while True:
+                pin = take_name()
+                pin_bits = take_bits()
+                take("=")
+                wire = take_name()
+                connections.append(Connection(pin, pin_bits, wire,
+                                              take_bits()))
+                separator = take()
+                if separator == ")":
+                    break
+                if separator != ",":
+                    raise HDLError(f"expected , or ), found {separator}",
+                                   line())
+            take(";")
+            chip.parts.append(Part(name, connections, part_line))
+    take("}")
+    return chip
+
+
+def read_hdl(path: str) -> ChipDefinition:
+    """
+    Args:
+        path (str): an .hdl file.
+
+    Returns:
+        ChipDefinition: the chip it defines.
+    """
+    with open(path, 'r') as hdl_file:
+        try:
+            return parse_hdl(hdl_file.read(), path)
+        except HDLError as error:
+            raise HDLError(f"{path}: {error}") from error
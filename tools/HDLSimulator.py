@@ -0,0 +1,982 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import abc
+import argparse
+import collections
+import os
+import typing
+import ProjectPaths
+from CPUEmulator import ROM_SIZE, SCREEN, KBD, WORD_MASK, load_program
+from ChipModels import Machine, split_variable
+from HDLParser import HDLError, ChipDefinition, read_hdl
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Where the chips built in the hardware projects are, searched in order
+# after the directory of the chip being simulated
+HARDWARE_DIRECTORIES = [os.path.join(os.path.dirname(PROJECT_DIR), *path)
+                        for path in (("01",), ("02",), ("03", "a"),
+                                     ("03", "b"), ("05",))]
+# The constant wires
+FALSE = 0
+TRUE = 1
+# Chips the simulator has no HDL for that are the same as another chip
+ALIASES = {"ARegister": "Register", "DRegister": "Register"}
+# Gates inlined into one expression before a wire is stored, kept well
+# below the nesting Python's parser allows
+MAX_DEPTH = 32
+# More gates than this take too long to flatten and simulate one by one.
+# Chips are counted before they are flattened, so these are refused at
+# once. Every part is flattened on its own, with no code shared between
+# copies of a part, so from HDL alone RAM4K (1.3M gates), RAM16K and the
+# Memory and Computer built of them are refused, and RAM512 (166K gates)
+# runs its test in about a minute. Those need native chips for their RAMs
+MAX_NANDS = 1_000_000
+# Statements per block of the event-driven scheduler: smaller blocks skip
+# more unchanged gates, larger ones cost less to schedule
+BLOCK_STATEMENTS = 16
+# The wires a statement assigns with their Python expressions (or None for
+# a line of its own), the wires it writes and reads, and the builtin chip it
+# evaluates if it does
+Statement = typing.Tuple[typing.List[typing.Tuple[typing.Optional[int], str]],
+                         typing.List[int], typing.Set[int],
+                         typing.Optional[int]]
+
+
+class ChipTooLarge(HDLError):
+    """A chip with more than MAX_NANDS gates."""
+
+
+class Builtin(abc.ABC):
+    """A chip implemented in Python rather than HDL. Its outputs are
+    computed by evaluate from its combinational inputs, which are those
+    not listed as clocked; clocked inputs are only read by tick.
+    """
+    inputs = dict()
+    outputs = dict()
+    clocked = ()
+
+    @abc.abstractmethod
+    def evaluate(self, *inputs: int) -> typing.Tuple[int, ...]:
+        """
+        Args:
+            inputs (int): the combinational inputs, in the order of the
+                inputs dict.
+
+        Returns:
+            typing.Tuple[int, ...]: the outputs, in the order of the
+            outputs dict.
+        """
+
+    def tick(self, *inputs: int) -> None:
+        """Samples every input, in the order of the inputs dict."""
+
+    def tock(self) -> None:
+        """Commits what tick sampled."""
+
+    def get(self, index: typing.Optional[int]) -> int:
+        """
+        Args:
+            index (typing.Optional[int]): a memory address, for Part[n].
+
+        Returns:
+            int: the chip's contents, as shown by test scripts.
+        """
+        raise KeyError(index)
+
+    def set(self, index: typing.Optional[int], value: int) -> None:
+        """
+        Args:
+            index (typing.Optional[int]): a memory address, for Part[n].
+            value (int): the new contents.
+        """
+        raise KeyError(index)
+
+
+class MemoryBuiltin(Builtin):
+    """Words read at address and written on the clock when load is set."""
+    clocked = ("in", "load")
+    size = 0
+
+    def __init__(self) -> None:
+        self.memory = [0] * self.size
+        self.pending = None
+
+    def evaluate(self, address: int) -> typing.Tuple[int]:
+        return self.memory[address],
+
+    def tick(self, value: int, load: int, address: int) -> None:
+        self.pending = (address, value) if load else None
+
+    def tock(self) -> None:
+        if self.pending is not None:
+            address, value = self.pending
+            self.memory[address] = value
+            self.pending = None
+
+    def get(self, index: typing.Optional[int]) -> int:
+        # Like a DFF's, a word's contents change on the tick
+        if self.pending is not None and self.pending[0] == (index or 0):
+            return self.pending[1]
+        return self.memory[index or 0]
+
+    def set(self, index: typing.Optional[int], value: int) -> None:
+        self.memory[index or 0] = value & WORD_MASK
+
+
+class Screen(MemoryBuiltin):
+    inputs = {"in": 16, "load": 1, "address": 13}
+    outputs = {"out": 16}
+    size = KBD - SCREEN
+
+
+class Keyboard(Builtin):
+    inputs = dict()
+    outputs = {"out": 16}
+
+    def __init__(self) -> None:
+        self.key = 0
+
+    def evaluate(self) -> typing.Tuple[int]:
+        return self.key,
+
+    def get(self, index: typing.Optional[int]) -> int:
+        return self.key
+
+    def set(self, index: typing.Optional[int], value: int) -> None:
+        self.key = value & WORD_MASK
+
+
+class ROM32K(Builtin):
+    """The instruction memory, loaded with `ROM32K load <program>`."""
+    inputs = {"address": 15}
+    outputs = {"out": 16}
+
+    def __init__(self) -> None:
+        self.memory = [0] * ROM_SIZE
+
+    def load(self, path: str) -> None:
+        words, _ = load_program(path)
+        self.memory = list(words) + [0] * (ROM_SIZE - len(words))
+
+    def evaluate(self, address: int) -> typing.Tuple[int]:
+        return self.memory[address],
+
+    def get(self, index: typing.Optional[int]) -> int:
+        return self.memory[index or 0]
+
+    def set(self, index: typing.Optional[int], value: int) -> None:
+        self.memory[index or 0] = value & WORD_MASK
+
+
+# The chips implemented in Python, for chips no HDL file is found for or
+# whose HDL names them as BUILTIN
+BUILTINS = {"Screen": Screen, "Keyboard": Keyboard, "ROM32K": ROM32K}
+# The gates everything is built of
+PRIMITIVES = {"Nand": ({"a": 1, "b": 1}, {"out": 1}),
+              "DFF": ({"in": 1}, {"out": 1})}
+
+
+class ChipLibrary:
+    """Finds the definitions of chips by name: .hdl files in the search
+    directories, in order, then the builtin chips.
+    """
+
+    def __init__(self, directories: typing.List[str]) -> None:
+        """
+        Args:
+            directories (typing.List[str]): where to look for .hdl files.
+        """
+        self.directories = directories
+        self.definitions = dict()
+        self.builtins = dict(BUILTINS)
+        # The Nand gates of each chip counted so far, None while counting
+        self.nand_counts = dict()
+
+    def find(self, name: str) -> typing.Optional[str]:
+        """
+        Args:
+            name (str): a chip.
+
+        Returns:
+            typing.Optional[str]: the first .hdl file defining it in the
+            search directories, if any.
+        """
+        for directory in self.directories:
+            path = os.path.join(directory, f"{ALIASES.get(name, name)}.hdl")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def resolve(self, name: str) -> ChipDefinition:
+        """
+        Args:
+            name (str): a chip.
+
+        Returns:
+            ChipDefinition: its definition. Primitives and builtin chips
+            get a definition with builtin set to their name.
+        """
+        if name in self.definitions:
+            return self.definitions[name]
+        definition = None
+        if name in PRIMITIVES:
+            definition = ChipDefinition(name)
+            definition.inputs, definition.outputs = PRIMITIVES[name]
+            definition.builtin = name
+        elif self.find(name) is not None:
+            definition = read_hdl(self.find(name))
+        if definition is None and name in self.builtins:
+            definition = ChipDefinition(name)
+            definition.builtin = name
+        if definition is None:
+            raise HDLError(f"no HDL or builtin chip for {name}")
+        if definition.builtin is not None and \
+                definition.builtin not in PRIMITIVES:
+            if definition.builtin not in self.builtins:
+                raise HDLError(f"no builtin chip {definition.builtin}")
+            builtin = self.builtins[definition.builtin]
+            definition.inputs = dict(builtin.inputs)
+            definition.outputs = dict(builtin.outputs)
+        self.definitions[name] = definition
+        return definition
+
+    def nand_count(self, name: str) -> int:
+        """
+        Args:
+            name (str): a chip.
+
+        Returns:
+            int: the Nand gates it flattens to, added up from its parts'
+            counts without flattening it.
+        """
+        if name in self.nand_counts:
+            if self.nand_counts[name] is None:
+                raise HDLError(f"{name} is a part of itself")
+            return self.nand_counts[name]
+        definition = self.resolve(name)
+        if definition.builtin is not None:
+            self.nand_counts[name] = int(definition.builtin == "Nand")
+            return self.nand_counts[name]
+        self.nand_counts[name] = None
+        try:
+            count = sum(self.nand_count(part.name)
+                        for part in definition.parts)
+        except HDLError:
+            del self.nand_counts[name]
+            raise
+        self.nand_counts[name] = count
+        return count
+
+    def stamps(self) -> typing.Tuple[typing.Tuple[str, int], ...]:
+        """
+        Returns:
+            typing.Tuple[typing.Tuple[str, int], ...]: the path and
+            modification time of every .hdl file resolved so far.
+        """
+        return tuple(sorted((definition.path,
+                             os.stat(definition.path).st_mtime_ns)
+                            for definition in self.definitions.values()
+                            if definition.path))
+
+
+class Netlist:
+    """A chip flattened to Nand gates, DFFs and builtin chips. Every wire is
+    a single bit numbered from 2, after the constants FALSE and TRUE.
+
+    While a chip is being flattened, the names used in it are given
+    placeholder wires, which are joined to the outputs of the parts that
+    drive them once those parts are built. Placeholders that nothing
+    drives read as FALSE.
+    """
+
+    def __init__(self, library: ChipLibrary) -> None:
+        self.library = library
+        self.wire_count = 2
+        self.nands = []
+        self.dffs = []
+        # Builtin chip classes with their input and output buses
+        self.builtins = []
+        self.drivers = dict()
+        self.placeholders = set()
+        # The out bus, or the builtin, of the first part with each name
+        self.parts = dict()
+        self.inputs = dict()
+        self.outputs = dict()
+
+    def new_wire(self) -> int:
+        self.wire_count += 1
+        return self.wire_count - 1
+
+    def new_placeholders(self, width: int) -> typing.List[int]:
+        wires = [self.new_wire() for _ in range(width)]
+        self.placeholders.update(wires)
+        return wires
+
+    def find(self, wire: int) -> int:
+        """
+        Args:
+            wire (int): a wire or placeholder.
+
+        Returns:
+            int: the wire that drives it.
+        """
+        root = wire
+        while root in self.drivers:
+            root = self.drivers[root]
+        while wire in self.drivers:
+            self.drivers[wire], wire = root, self.drivers[wire]
+        return FALSE if root in self.placeholders else root
+
+    def build(self, name: str) -> None:
+        """Flattens a chip, giving it fresh input wires.
+
+        Args:
+            name (str): the chip.
+        """
+        definition = self.library.resolve(name)
+        try:
+            count = self.library.nand_count(name)
+        except HDLError:
+            # Flattening reports it, with the part it's in
+            count = 0
+        if count > MAX_NANDS:
+            raise ChipTooLarge(f"{count} Nand gates, more than the "
+                               f"{MAX_NANDS} that can be simulated")
+        self.inputs = {pin: [self.new_wire() for _ in range(width)]
+                       for pin, width in definition.inputs.items()}
+        outputs = self.add_chip(definition, self.inputs)
+        self.outputs = {pin: [self.find(wire) for wire in wires]
+                        for pin, wires in outputs.items()}
+        self.nands = [(self.find(a), self.find(b), out)
+                      for a, b, out in self.nands]
+        self.dffs = [(self.find(wire), out) for wire, out in self.dffs]
+        self.builtins = [(builtin, [[self.find(wire) for wire in bus]
+                                    for bus in inputs], outputs)
+                         for builtin, inputs, outputs in self.builtins]
+        self.parts = {part: [self.find(wire) for wire in value]
+                      if isinstance(value, list) else value
+                      for part, value in self.parts.items()}
+
+    def add_chip(self, definition: ChipDefinition,
+                 inputs: typing.Dict[str, typing.List[int]]) \
+            -> typing.Dict[str, typing.List[int]]:
+        """
+        Args:
+            definition (ChipDefinition): the chip to add.
+            inputs (typing.Dict[str, typing.List[int]]): the wires of its
+                input pins.
+
+        Returns:
+            typing.Dict[str, typing.List[int]]: the wires of its output pins.
+        """
+        if definition.builtin == "Nand":
+            out = self.new_wire()
+            self.nands.append((inputs["a"][0], inputs["b"][0], out))
+            return {"out": [out]}
+        if definition.builtin == "DFF":
+            out = self.new_wire()
+            self.dffs.append((inputs["in"][0], out))
+            return {"out": [out]}
+        if definition.builtin is not None:
+            outputs = {pin: [self.new_wire() for _ in range(width)]
+                       for pin, width in definition.outputs.items()}
+            self.builtins.append((self.library.builtins[definition.builtin],
+                                  [inputs[pin] for pin in definition.inputs],
+                                  [outputs[pin]
+                                   for pin in definition.outputs]))
+            return outputs
+        names = dict(inputs)
+        outputs = {pin: self.new_placeholders(width)
+                   for pin, width in definition.outputs.items()}
+        names.update(outputs)
+        for part in definition.parts:
+            try:
+                self.add_part(definition, part, names)
+            except HDLError as error:
+                if error.line:
+                    raise
+                raise HDLError(f"{definition.path or definition.name}: "
+                               f"{part.name}: {error}", part.line) from error
+        return outputs
+
+    def add_part(self, definition: ChipDefinition, part,
+                 names: typing.Dict[str, typing.List[int]]) -> None:
+        """Adds a part of a chip, connecting it to the chip's names.
+
+        Args:
+            definition (ChipDefinition): the chip.
+            part (Part): the part.
+            names (typing.Dict[str, typing.List[int]]): the wires of the
+                chip's pins and internal names, extended with new names.
+        """
+        part_definition = self.library.resolve(part.name)
+        inputs = {pin: [FALSE] * width
+                  for pin, width in part_definition.inputs.items()}
+        driven = []
+        for connection in part.connections:
+            width = part_definition.pin_width(connection.pin)
+            if width is None:
+                raise HDLError(f"{part.name} has no pin {connection.pin}")
+            first, last = connection.pin_bits or (0, width - 1)
+            if last >= width:
+                raise HDLError(f"{connection.pin}[{last}] is out of range")
+            if connection.pin in part_definition.inputs:
+                inputs[connection.pin][first:last + 1] = self.wires(
+                    definition, names, connection, last - first + 1, False)
+            else:
+                driven.append((connection, first, last))
+        outputs = self.add_chip(part_definition, inputs)
+        for connection, first, last in driven:
+            targets = self.wires(definition, names, connection,
+                                 last - first + 1, True)
+            for target, wire in zip(targets,
+                                    outputs[connection.pin][first:last + 1]):
+                if target not in self.placeholders or \
+                        target in self.drivers:
+                    raise HDLError(f"{connection.wire} has more than one "
+                                   f"source")
+                self.drivers[target] = wire
+        if part.name not in self.parts:
+            if part_definition.builtin in self.library.builtins:
+                self.parts[part.name] = len(self.builtins) - 1
+            elif "out" in outputs:
+                self.parts[part.name] = outputs["out"]
+
+    def wires(self, definition: ChipDefinition,
+              names: typing.Dict[str, typing.List[int]], connection,
+              width: int, driven: bool) -> typing.List[int]:
+        """
+        Args:
+            definition (ChipDefinition): the chip a part is connected in.
+            names (typing.Dict[str, typing.List[int]]): its names' wires.
+            connection (Connection): the part's connection.
+            width (int): the number of the part's pin bits it connects.
+            driven (bool): whether the part's pin is an output.
+
+        Returns:
+            typing.List[int]: the wires of the chip the pin bits connect to.
+        """
+        name = connection.wire
+        if name in ("true", "false"):
+            if driven or connection.wire_bits is not None:
+                raise HDLError(f"{name} can only be an input")
+            return [TRUE if name == "true" else FALSE] * width
+        if driven and name in definition.inputs:
+            raise HDLError(f"{name} is an input of {definition.name}")
+        if not driven and name in definition.outputs:
+            raise HDLError(f"{name} is an output of {definition.name}, it "
+                           f"can't be read")
+        if name not in names:
+            if connection.wire_bits is not None:
+                raise HDLError(f"sub-bus of the internal pin {name}")
+            names[name] = self.new_placeholders(width)
+        wires = names[name]
+        if connection.wire_bits is not None:
+            first, last = connection.wire_bits
+            if last >= len(wires):
+                raise HDLError(f"{name}[{last}] is out of range")
+            wires = wires[first:last + 1]
+        if len(wires) != width:
+            raise HDLError(f"{connection.pin} has {width} bits and {name} "
+                           f"has {len(wires)}")
+        return wires
+
+
+class Program:
+    """A flattened chip compiled to Python. evaluate(w, parts, m) computes
+    every wire in w from the inputs and the DFFs, in topological order, with
+    m as the value of TRUE; tick(w, parts, state) samples the DFFs into
+    state and clocks the builtin chips; tock(w, parts, state) moves state
+    to the DFFs' outputs and returns the outputs that changed.
+
+    The same statements are also cut into blocks, in the same order, for
+    running only what changed: blocks[k](w, parts, scheduled) runs a block,
+    and when it changes a wire that later blocks read it sets their flags in
+    the scheduled bytearray. wire_readers lists the blocks reading each wire
+    the blocks don't write themselves, such as the inputs and the DFFs.
+    """
+
+    def __init__(self, netlist: Netlist) -> None:
+        self.wire_count = netlist.wire_count
+        self.inputs = netlist.inputs
+        self.outputs = netlist.outputs
+        self.parts = netlist.parts
+        self.builtins = [builtin for builtin, _, _ in netlist.builtins]
+        self.dff_index = {out: index
+                          for index, (_, out) in enumerate(netlist.dffs)}
+        self.dff_count = len(netlist.dffs)
+        self.nand_count = len(netlist.nands)
+        # The files the chip was built from, with their modification times
+        self.stamps = ()
+        units = self.statements(netlist)
+        # Every block reading each wire written outside of it
+        self.wire_readers = collections.defaultdict(list)
+        # The block evaluating each builtin chip, if anything reads it
+        self.builtin_blocks = [None] * len(self.builtins)
+        # Compiled on first use, as HDLChip only runs the blocks
+        self.evaluate_source = ["def evaluate(w, parts, m):"]
+        self.evaluate_source.extend(
+            f"    w[{wire}] = {value}" if wire is not None else f"    {value}"
+            for lines, _, _, _ in units for wire, value in lines)
+        self.evaluate_source.append("    pass")
+        self.evaluate_function = None
+        source = self.clock_source(netlist)
+        blocks = [units[first:first + BLOCK_STATEMENTS]
+                  for first in range(0, len(units), BLOCK_STATEMENTS)]
+        for index, block in enumerate(blocks):
+            written = {wire for _, writes, _, _ in block for wire in writes}
+            for wire in set().union(*(reads for _, _, reads, _ in block)) - \
+                    written:
+                self.wire_readers[wire].append(index)
+            for _, _, _, builtin in block:
+                if builtin is not None:
+                    self.builtin_blocks[builtin] = index
+        for index, block in enumerate(blocks):
+            source.append(f"def block_{index}(w, parts, s, m=1):")
+            for lines, _, _, _ in block:
+                for wire, value in lines:
+                    if wire is None:
+                        source.append(f"    {value}")
+                    elif wire in self.wire_readers:
+                        flags = " = ".join(f"s[{reader}]" for reader in
+                                           self.wire_readers[wire])
+                        source.extend([f"    v = {value}",
+                                       f"    if v != w[{wire}]:",
+                                       f"        w[{wire}] = v",
+                                       f"        {flags} = 1"])
+                    else:
+                        source.append(f"    w[{wire}] = {value}")
+            source.append("    pass")
+        self.wire_readers = dict(self.wire_readers)
+        # The blocks whose builtin chips can change on the tock
+        self.clocked_blocks = sorted({
+            self.builtin_blocks[index]
+            for index, builtin in enumerate(self.builtins)
+            if builtin.clocked and self.builtin_blocks[index] is not None})
+        namespace = dict()
+        exec(compile("\n".join(source) + "\n", "<chip>", "exec"),
+             namespace)
+        self.tick = namespace["tick"]
+        self.tock = namespace["tock"]
+        self.blocks = [namespace[f"block_{index}"]
+                       for index in range(len(blocks))]
+
+    def evaluate(self, w: typing.List[int], parts: typing.List[Builtin],
+                 m: int) -> None:
+        """
+        Args:
+            w (typing.List[int]): the wires, with the inputs and DFFs set.
+            parts (typing.List[Builtin]): the builtin chips.
+            m (int): the value of TRUE, with a bit per test vector.
+        """
+        if self.evaluate_function is None:
+            namespace = dict()
+            exec(compile("\n".join(self.evaluate_source) + "\n", "<chip>",
+                         "exec"), namespace)
+            self.evaluate_function = namespace["evaluate"]
+            self.evaluate_source = None
+        self.evaluate_function(w, parts, m)
+
+    @staticmethod
+    def pack(wires: typing.List[int]) -> str:
+        return " | ".join(f"w[{wire}] << {bit}" if bit else f"w[{wire}]"
+                          for bit, wire in enumerate(wires)) or "0"
+
+    def statements(self, netlist: Netlist) -> typing.List[Statement]:
+        """
+        Args:
+            netlist (Netlist): the flattened chip.
+
+        Returns:
+            typing.List[Statement]: the statements of evaluate in
+            topological order, each with its lines, the wires it writes, the
+            wires it reads and the builtin chip it evaluates, if any. Gates
+            whose output feeds a single other gate are inlined into that
+            gate's expression; the others are stored in w.
+        """
+        # Each node is a gate (a, b, out) or a builtin's index
+        producers = {out: gate for gate in netlist.nands
+                     for out in gate[2:]}
+        for index, (builtin, _, outputs) in enumerate(netlist.builtins):
+            for bus in outputs:
+                for wire in bus:
+                    producers[wire] = index
+        node_inputs = dict()
+        for gate in netlist.nands:
+            node_inputs[gate] = gate[:2]
+        for index, (builtin, inputs, _) in enumerate(netlist.builtins):
+            node_inputs[index] = [wire for pin, bus in
+                                  zip(builtin.inputs, inputs)
+                                  if pin not in builtin.clocked
+                                  for wire in bus]
+        # Keep the gates that something outside the gates reads
+        stored = {wire for bus in self.outputs.values() for wire in bus}
+        stored.update(wire for wire, _ in netlist.dffs)
+        stored.update(wire for _, inputs, _ in netlist.builtins
+                      for bus in inputs for wire in bus)
+        stored.update(wire for value in self.parts.values()
+                      if isinstance(value, list) for wire in value)
+        live = set()
+        pending = [producers[wire] for wire in stored if wire in producers]
+        while pending:
+            node = pending.pop()
+            if node in live:
+                continue
+            live.add(node)
+            pending.extend(producers[wire] for wire in node_inputs[node]
+                           if wire in producers)
+        readers = collections.Counter(wire for node in live
+                                      for wire in node_inputs[node])
+        order = self.topological_order(live, node_inputs, producers)
+        units = []
+        expressions = dict()
+
+        def operand(wire: int) -> typing.Tuple[str, int, typing.Set[int]]:
+            if wire == FALSE:
+                return "0", 0, set()
+            if wire == TRUE:
+                return "m", 0, set()
+            return expressions.get(wire, (f"w[{wire}]", 0, {wire}))
+
+        for node in order:
+            if not isinstance(node, tuple):
+                builtin, inputs, outputs = netlist.builtins[node]
+                buses = [bus for pin, bus in zip(builtin.inputs, inputs)
+                         if pin not in builtin.clocked]
+                arguments = ", ".join(self.pack(bus) for bus in buses)
+                lines = [(None, f"o = parts[{node}].evaluate({arguments})")]
+                for index, bus in enumerate(outputs):
+                    for bit, wire in enumerate(bus):
+                        lines.append((wire, f"o[{index}] >> {bit} & 1"))
+                units.append((lines, [wire for bus in outputs
+                                      for wire in bus],
+                              {wire for bus in buses for wire in bus}, node))
+                continue
+            a, b, out = node
+            (left, left_depth, left_reads), \
+                (right, right_depth, right_reads) = operand(a), operand(b)
+            if left == "0" or right == "0":
+                expression, depth, reads = "m", 0, set()
+            elif left == "m" or a == b:
+                expression, depth = self.negate(right), right_depth
+                reads = right_reads
+            elif right == "m":
+                expression, depth = self.negate(left), left_depth
+                reads = left_reads
+            else:
+                expression = self.negate(f"({left} & {right})")
+                depth = max(left_depth, right_depth) + 1
+                reads = left_reads | right_reads
+            if out in stored or readers[out] != 1 or depth >= MAX_DEPTH:
+                units.append(([(out, expression)], [out], reads, None))
+            else:
+                expressions[out] = (expression, depth, reads)
+        return units
+
+    def clock_source(self, netlist: Netlist) -> typing.List[str]:
+        """
+        Args:
+            netlist (Netlist): the flattened chip.
+
+        Returns:
+            typing.List[str]: the lines of tick and tock.
+        """
+        lines = ["def tick(w, parts, state):"]
+        for index, (wire, _) in enumerate(netlist.dffs):
+            lines.append(f"    state[{index}] = w[{wire}]")
+        for index, (builtin, inputs, _) in enumerate(netlist.builtins):
+            if builtin.clocked:
+                arguments = ", ".join(self.pack(bus) for bus in inputs)
+                lines.append(f"    parts[{index}].tick({arguments})")
+        lines.append("    pass")
+        lines.append("def tock(w, parts, state):")
+        lines.append("    changed = []")
+        for index, (_, out) in enumerate(netlist.dffs):
+            lines.append(f"    if w[{out}] != state[{index}]:")
+            lines.append(f"        w[{out}] = state[{index}]")
+            lines.append(f"        changed.append({out})")
+        for index, (builtin, _, _) in enumerate(netlist.builtins):
+            if builtin.clocked:
+                lines.append(f"    parts[{index}].tock()")
+        lines.append("    return changed")
+        return lines
+
+    @staticmethod
+    def negate(expression: str) -> str:
+        """
+        Args:
+            expression (str): a wire's expression, 0 or m.
+
+        Returns:
+            str: its negation, removing a double negation.
+        """
+        if expression == "0":
+            return "m"
+        if expression == "m":
+            return "0"
+        if expression.startswith("(m ^ ") and expression.endswith(")") and \
+                Program.balanced(expression[5:-1]):
+            return expression[5:-1]
+        return f"(m ^ {expression})"
+
+    @staticmethod
+    def balanced(expression: str) -> bool:
+        depth = 0
+        for character in expression:
+            depth += {"(": 1, ")": -1}.get(character, 0)
+            if depth < 0:
+                return False
+        return depth == 0
+
+    @staticmethod
+    def topological_order(nodes: typing.Set, node_inputs: typing.Dict,
+                          producers: typing.Dict[int, typing.Any]) \
+            -> typing.List:
+        """
+        Returns:
+            typing.List: the nodes ordered so each comes after the nodes
+            producing its inputs. The order is a depth-first one from the
+            nodes nothing else reads, so each one's cone is mostly together
+            and changes touch few blocks.
+        """
+        consumed = {producers[wire] for node in nodes
+                    for wire in node_inputs[node] if wire in producers}
+        starts = sorted(nodes, key=lambda node: (
+            node in consumed, node if isinstance(node, int) else node[2]))
+        visiting, done = set(), set()
+        order = []
+        for start in starts:
+            stack = [(start, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    visiting.discard(node)
+                    done.add(node)
+                    order.append(node)
+                    continue
+                if node in done:
+                    continue
+                visiting.add(node)
+                stack.append((node, True))
+                for wire in reversed(node_inputs[node]):
+                    source = producers.get(wire)
+                    if source in visiting:
+                        raise HDLError("the chip has a loop that doesn't go "
+                                       "through a DFF")
+                    if source is not None and source not in done:
+                        stack.append((source, False))
+        return order
+
+
+class HDLChip(Machine):
+    """A chip simulated from its HDL, for test scripts: the chip's pins are
+    its variables, and a part's name with brackets shows the part's
+    contents, as with ARegister[] or RAM16K[2].
+
+    Chips are flattened to Nand gates and DFFs, with Screen, Keyboard and
+    ROM32K as builtin chips, and compiled to straight-line Python. The
+    compiled program of each chip is kept until one of its .hdl files
+    changes.
+
+    Only what changed is recomputed: setting an input, or a DFF or builtin
+    chip changing on the tock, schedules the blocks reading it, and a block
+    whose outputs changed schedules their readers in turn. Blocks run in
+    topological order, so each runs at most once per settle.
+    """
+    program_cache = dict()
+
+    def __init__(self, path: str,
+                 directories: typing.Optional[typing.List[str]] = None,
+                 native: bool = False) -> None:
+        """
+        Args:
+            path (str): the chip's .hdl file.
+            directories (typing.Optional[typing.List[str]]): where its parts
+                are looked for, by default its own directory and then
+                HARDWARE_DIRECTORIES.
+            native (bool): use the chips of NativeChips for its parts, once
+                each has been checked against its HDL.
+        """
+        path = os.path.abspath(path)
+        if directories is None:
+            directories = [os.path.dirname(path)] + HARDWARE_DIRECTORIES
+        self.program = self.compile(path, directories, native)
+        program = self.program
+        self.parts = [builtin() for builtin in program.builtins]
+        self.w = [0] * program.wire_count
+        self.w[TRUE] = 1
+        self.state = [0] * program.dff_count
+        self.scheduled = bytearray(b"\1" * len(program.blocks))
+        self.settle()
+
+    def schedule(self, blocks: typing.Iterable[int]) -> None:
+        """
+        Args:
+            blocks (typing.Iterable[int]): blocks to run on the next settle.
+        """
+        scheduled = self.scheduled
+        for block in blocks:
+            scheduled[block] = 1
+
+    def schedule_readers(self, wires: typing.Iterable[int]) -> None:
+        """
+        Args:
+            wires (typing.Iterable[int]): wires that changed.
+        """
+        wire_readers = self.program.wire_readers
+        for wire in wires:
+            if wire in wire_readers:
+                self.schedule(wire_readers[wire])
+
+    def schedule_part(self, index: int) -> None:
+        """
+        Args:
+            index (int): a builtin chip whose contents changed.
+        """
+        block = self.program.builtin_blocks[index]
+        if block is not None:
+            self.schedule((block,))
+
+    def settle(self) -> None:
+        """Runs the scheduled blocks, and those they change, in order. A
+        block's readers come after it, so one pass over the blocks is enough.
+        """
+        scheduled, blocks = self.scheduled, self.program.blocks
+        w, parts = self.w, self.parts
+        block = scheduled.find(1)
+        while block != -1:
+            scheduled[block] = 0
+            blocks[block](w, parts, scheduled)
+            block = scheduled.find(1, block + 1)
+
+    @staticmethod
+    def compile(path: str, directories: typing.List[str],
+                native: bool = False) -> Program:
+        """
+        Args:
+            path (str): a chip's .hdl file.
+            directories (typing.List[str]): where its parts are looked for.
+            native (bool): use the chips of NativeChips for its parts.
+
+        Returns:
+            Program: the chip compiled, from the cache if its files haven't
+            changed since.
+        """
+        key = (path, tuple(directories), native)
+        if key in HDLChip.program_cache:
+            program = HDLChip.program_cache[key]
+            try:
+                if all(os.stat(file).st_mtime_ns == stamp
+                       for file, stamp in program.stamps):
+                    return program
+            except OSError:
+                pass
+        if native:
+            from NativeChips import NativeLibrary
+            library = NativeLibrary(directories)
+        else:
+            library = ChipLibrary(directories)
+        name = os.path.splitext(os.path.basename(path))[0]
+        definition = read_hdl(path)
+        if definition.name != name:
+            raise HDLError(f"{path} defines {definition.name}, not {name}")
+        library.definitions[name] = definition
+        netlist = Netlist(library)
+        try:
+            netlist.build(name)
+        except ChipTooLarge as error:
+            hint = "" if native else ", simulate its RAMs with native chips"
+            raise ChipTooLarge(f"{name} has {error}{hint}") from error
+        program = Program(netlist)
+        program.stamps = library.stamps()
+        HDLChip.program_cache[key] = program
+        return program
+
+    def bus_value(self, wires: typing.List[int]) -> int:
+        w = self.w
+        value = 0
+        for bit, wire in enumerate(wires):
+            # A register's contents change on the tick, its out on the tock
+            index = self.program.dff_index.get(wire)
+            value |= (self.state[index] if index is not None
+                      else w[wire]) << bit
+        return value
+
+    def get(self, name: str) -> int:
+        base, index = split_variable(name)
+        program = self.program
+        if "[" not in name:
+            wires = program.inputs.get(base, program.outputs.get(base))
+            if wires is None:
+                raise KeyError(name)
+            return sum(self.w[wire] << bit for bit, wire in enumerate(wires))
+        part = program.parts.get(base)
+        if part is None:
+            raise KeyError(name)
+        if isinstance(part, list):
+            return self.bus_value(part)
+        return self.parts[part].get(index)
+
+    def set(self, name: str, value: int) -> None:
+        base, index = split_variable(name)
+        program = self.program
+        if "[" not in name and base in program.inputs:
+            w = self.w
+            for bit, wire in enumerate(program.inputs[base]):
+                if w[wire] != (value >> bit) & 1:
+                    w[wire] = (value >> bit) & 1
+                    self.schedule_readers((wire,))
+            return
+        part = program.parts.get(base)
+        if "[" in name and part is not None and not isinstance(part, list):
+            self.parts[part].set(index, value)
+            self.schedule_part(part)
+            return
+        raise KeyError(name)
+
+    def load(self, path: str) -> None:
+        roms = [index for index, part in enumerate(self.parts)
+                if isinstance(part, ROM32K)]
+        if not roms:
+            raise ValueError(f"the chip has no ROM32K to load {path} into")
+        for index in roms:
+            self.parts[index].load(path)
+            self.schedule_part(index)
+        self.eval()
+
+    def set_key(self, key: int) -> None:
+        keyboards = [index for index, part in enumerate(self.parts)
+                     if isinstance(part, Keyboard)]
+        if not keyboards:
+            raise ValueError("the chip has no keyboard")
+        for index in keyboards:
+            self.parts[index].key = key
+            self.schedule_part(index)
+
+    def eval(self) -> None:
+        self.settle()
+
+    def tick(self) -> None:
+        self.settle()
+        self.program.tick(self.w, self.parts, self.state)
+
+    def tock(self) -> None:
+        program = self.program
+        self.schedule_readers(program.tock(self.w, self.parts, self.state))
+        self.schedule(program.clocked_blocks)
+        self.settle()
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="HDLSimulator")
+    arg_parser.add_argument("chip", help="an .hdl file")
+    args = arg_parser.parse_args()
+
+    chip = HDLChip(args.chip)
+    program = chip.program
+    print(f"{program.nand_count} Nand gates, {program.dff_count} DFFs, "
+          f"{len(program.builtins)} builtin chips")
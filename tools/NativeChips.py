@@ -0,0 +1,332 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import typing
+import ProjectPaths
+from CPUEmulator import WORD_MASK, ADDRESS_MASK, SIGN_BIT
+from ChipModels import Machine
+from HDLParser import HDLError, ChipDefinition
+from HDLSimulator import ALIASES, HARDWARE_DIRECTORIES, Builtin, \
+    MemoryBuiltin, ChipLibrary, HDLChip
+
+# Clock cycles of random inputs a native chip is checked against its HDL on
+CHECK_STEPS = 1000
+# Random addresses a memory is checked on, on top of covering_addresses
+CHECK_ADDRESSES = 8
+# Memories with at most this many address bits are checked on every address
+MAX_EXHAUSTIVE_ADDRESS_BITS = 9
+# The bits a RAM chip selects one of its eight parts with
+BANK_BITS = 3
+CHECK_SEED = 0
+# The files a check read, with their modification times
+Stamps = typing.Tuple[typing.Tuple[str, int], ...]
+
+
+class Register(Builtin):
+    inputs = {"in": 16, "load": 1}
+    outputs = {"out": 16}
+    clocked = ("in", "load")
+
+    def __init__(self) -> None:
+        self.value = 0
+        self.next = 0
+
+    def evaluate(self) -> typing.Tuple[int]:
+        return self.value,
+
+    def tick(self, value: int, load: int) -> None:
+        self.next = value if load else self.value
+
+    def tock(self) -> None:
+        self.value = self.next
+
+    def get(self, index: typing.Optional[int]) -> int:
+        # Like a DFF's, the contents change on the tick
+        return self.next
+
+    def set(self, index: typing.Optional[int], value: int) -> None:
+        self.value = self.next = value & WORD_MASK
+
+
+class PC(Register):
+    inputs = {"in": 16, "load": 1, "inc": 1, "reset": 1}
+    clocked = ("in", "load", "inc", "reset")
+
+    def tick(self, value: int, load: int, inc: int, reset: int) -> None:
+        if reset:
+            self.next = 0
+        elif load:
+            self.next = value
+        elif inc:
+            self.next = (self.value + 1) & WORD_MASK
+        else:
+            self.next = self.value
+
+
+def memory(name: str, address_width: int) -> typing.Type[MemoryBuiltin]:
+    """
+    Args:
+        name (str): a RAM chip.
+        address_width (int): the width of its address pin.
+
+    Returns:
+        typing.Type[MemoryBuiltin]: its native class.
+    """
+    return type(name, (MemoryBuiltin,),
+                {"inputs": {"in": 16, "load": 1, "address": address_width},
+                 "outputs": {"out": 16}, "size": 1 << address_width})
+
+
+class ALU(Builtin):
+    inputs = {"x": 16, "y": 16, "zx": 1, "nx": 1, "zy": 1, "ny": 1, "f": 1,
+              "no": 1}
+    outputs = {"out": 16, "zr": 1, "ng": 1}
+
+    def evaluate(self, x: int, y: int, zx: int, nx: int, zy: int, ny: int,
+                 f: int, no: int) -> typing.Tuple[int, int, int]:
+        if zx:
+            x = 0
+        if nx:
+            x ^= WORD_MASK
+        if zy:
+            y = 0
+        if ny:
+            y ^= WORD_MASK
+        out = (x + y) & WORD_MASK if f else x & y
+        if no:
+            out ^= WORD_MASK
+        return out, int(out == 0), out >> 15
+
+
+class ShiftLeft(Builtin):
+    """Shifts left, keeping the sign bit, as CpuMul's << does."""
+    inputs = {"in": 16}
+    outputs = {"out": 16}
+
+    def evaluate(self, value: int) -> typing.Tuple[int]:
+        return ((value << 1) & ADDRESS_MASK) | (value & SIGN_BIT),
+
+
+class ShiftRight(Builtin):
+    """Shifts right, keeping the sign bit, as CpuMul's >> does."""
+    inputs = {"in": 16}
+    outputs = {"out": 16}
+
+    def evaluate(self, value: int) -> typing.Tuple[int]:
+        return (value >> 1) | (value & SIGN_BIT),
+
+
+# The chips simulated in Python when HDLChip's native is set, by chip name
+NATIVE_CHIPS = {"Register": Register, "PC": PC,
+                **{name: memory(name, width) for name, width in
+                   (("RAM8", 3), ("RAM64", 6), ("RAM512", 9), ("RAM4K", 12),
+                    ("RAM16K", 14))},
+                "ALU": ALU, "ShiftLeft": ShiftLeft, "ShiftRight": ShiftRight}
+# The stamps of the files each .hdl file was last checked with
+checked = dict()
+
+
+class NativeChip(Machine):
+    """A native chip on its own, driven by pin names like an HDLChip."""
+
+    def __init__(self, builtin: typing.Type[Builtin]) -> None:
+        self.builtin = builtin
+        self.chip = builtin()
+        self.pins = {pin: 0 for pin in builtin.inputs}
+        self.eval()
+
+    def get(self, name: str) -> int:
+        if name in self.pins:
+            return self.pins[name]
+        return self.outputs[name]
+
+    def set(self, name: str, value: int) -> None:
+        if name not in self.pins:
+            raise KeyError(name)
+        self.pins[name] = value
+
+    def eval(self) -> None:
+        values = self.chip.evaluate(*[self.pins[pin] for pin in self.pins
+                                      if pin not in self.builtin.clocked])
+        self.outputs = dict(zip(self.builtin.outputs, values))
+
+    def tick(self) -> None:
+        self.eval()
+        self.chip.tick(*self.pins.values())
+
+    def tock(self) -> None:
+        self.chip.tock()
+        self.eval()
+
+
+def covering_addresses(width: int) -> typing.List[int]:
+    """
+    Args:
+        width (int): the width of a memory's address pin.
+
+    Returns:
+        typing.List[int]: every address, if there are few enough. Otherwise
+        every pattern of the low bits with every pattern of the high bits,
+        each with the middle bits clear, set, and set one at a time. Every
+        bank is selected at every level whichever bits the HDL selects with,
+        and addresses differing in any one bit are both written, so parts
+        that ignore an address bit are caught.
+    """
+    if width <= MAX_EXHAUSTIVE_ADDRESS_BITS:
+        return list(range(1 << width))
+    high_bits = width % BANK_BITS or BANK_BITS
+    middle_bits = width - BANK_BITS - high_bits
+    middles = [0, (1 << middle_bits) - 1]
+    middles.extend(1 << bit for bit in range(middle_bits))
+    return [low | middle << BANK_BITS | high << (width - high_bits)
+            for high in range(1 << high_bits) for middle in middles
+            for low in range(1 << BANK_BITS)]
+
+
+def check_native(name: str, path: str, directories: typing.List[str]) \
+        -> Stamps:
+    """Runs a native chip and its HDL side by side on random inputs,
+    comparing their outputs before and after every clock cycle. The HDL is
+    simulated with native parts, each checked the same way first, so even
+    RAM16K is only ever simulated one level deep. A memory is first written
+    and then read on every one of its covering_addresses, before the random
+    cycles.
+
+    Args:
+        name (str): the native chip.
+        path (str): its .hdl file.
+        directories (typing.List[str]): where the HDL's parts are looked for.
+
+    Returns:
+        Stamps: the files the check read, so it isn't repeated until one of
+        them changes.
+    """
+    if path in checked and all(os.path.exists(file) and
+                               os.stat(file).st_mtime_ns == stamp
+                               for file, stamp in checked[path]):
+        return checked[path]
+    builtin = NATIVE_CHIPS[name]
+    hdl = HDLChip(path, directories, native=True)
+    native = NativeChip(builtin)
+    program = hdl.program
+    widths = {pin: len(wires) for pins in (program.inputs, program.outputs)
+              for pin, wires in pins.items()}
+    if widths != {**builtin.inputs, **builtin.outputs}:
+        raise HDLError(f"{path} doesn't have the pins of {name}")
+    rng = random.Random(CHECK_SEED)
+    width = builtin.inputs.get("address", 0)
+    covering = covering_addresses(width) if width else []
+    addresses = covering + [rng.getrandbits(width)
+                            for _ in range(CHECK_ADDRESSES)]
+
+    def compare(step: int) -> None:
+        for pin in builtin.outputs:
+            if hdl.get(pin) != native.get(pin):
+                raise HDLError(f"{path} doesn't match the native {name}: "
+                               f"at cycle {step} {pin} is "
+                               f"{hdl.get(pin)}, not {native.get(pin)}")
+
+    def cycle(step: int) -> None:
+        hdl.eval()
+        native.eval()
+        compare(step)
+        hdl.tick()
+        native.tick()
+        hdl.tock()
+        native.tock()
+        compare(step + 1)
+
+    for load in (1, 0):
+        for step, address in enumerate(covering):
+            for pin, value in (("address", address), ("load", load),
+                               ("in", rng.getrandbits(16))):
+                hdl.set(pin, value)
+                native.set(pin, value)
+            cycle(step)
+    for step in range(CHECK_STEPS):
+        for pin, width in builtin.inputs.items():
+            value = rng.choice(addresses) if pin == "address" \
+                else rng.getrandbits(width)
+            hdl.set(pin, value)
+            native.set(pin, value)
+        if builtin.clocked:
+            cycle(step)
+        else:
+            hdl.eval()
+            native.eval()
+            compare(step)
+    checked[path] = program.stamps
+    return program.stamps
+
+
+def share_checks(results: typing.Dict[str, Stamps]) -> None:
+    """Records checks made by another process, such as the one that started
+    a pool of workers, so they aren't repeated.
+
+    Args:
+        results (typing.Dict[str, Stamps]): its checked.
+    """
+    checked.update(results)
+
+
+class NativeLibrary(ChipLibrary):
+    """A chip library that gives the chips of NATIVE_CHIPS as builtin chips,
+    once each has been checked against its HDL, if it has any.
+    """
+
+    def __init__(self, directories: typing.List[str]) -> None:
+        super().__init__(directories)
+        self.builtins.update(NATIVE_CHIPS)
+        self.checked = []
+
+    def resolve(self, name: str) -> ChipDefinition:
+        native = ALIASES.get(name, name)
+        if name in self.definitions or native not in NATIVE_CHIPS:
+            return super().resolve(name)
+        path = self.find(name)
+        if path is not None:
+            self.checked.extend(check_native(native, path, self.directories))
+        definition = ChipDefinition(name, path or "")
+        definition.builtin = native
+        definition.inputs = dict(NATIVE_CHIPS[native].inputs)
+        definition.outputs = dict(NATIVE_CHIPS[native].outputs)
+        self.definitions[name] = definition
+        return definition
+
+    def stamps(self) -> Stamps:
+        return tuple(sorted(set(super().stamps()) | set(self.checked)))
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="NativeChips")
+    arg_parser.add_argument("directories", nargs="*",
+                            default=HARDWARE_DIRECTORIES,
+                            help="where the chips' HDL is looked for")
+    args = arg_parser.parse_args()
+
+    directories = [os.path.abspath(path) for path in args.directories]
+    library = ChipLibrary(directories)
+    failed = 0
+    for name in NATIVE_CHIPS:
+        path = library.find(name)
+        if path is None:
+            print(f"SKIP  {name}: no HDL")
+            continue
+        start = time.perf_counter()
+        try:
+            check_native(name, path, directories)
+            print(f"OK    {name} ({os.path.relpath(path)}, "
+                  f"{(time.perf_counter() - start) * 1e3:.0f}ms)")
+        except HDLError as error:
+            print(f"FAIL  {name}: {error}")
+            failed += 1
+    if failed:
+        sys.exit(1)
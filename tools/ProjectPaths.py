@@ -0,0 +1,15 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import sys
+
+# The assembler's project, whose emulator runs the programs of chips like
+# CPU and Computer. Importing this module lets the tools import from it.
+ASSEMBLER_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "06")
+if ASSEMBLER_DIR not in sys.path:
+    sys.path.append(ASSEMBLER_DIR)
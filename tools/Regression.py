@@ -0,0 +1,207 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import platform
+import sys
+import time
+import typing
+import xml.etree.ElementTree as ElementTree
+from HDLParser import HDLError
+from HDLSimulator import HARDWARE_DIRECTORIES, PROJECT_DIR, ChipLibrary
+from NativeChips import NATIVE_CHIPS, check_native, checked, share_checks
+from ScriptRunner import run_script, find_scripts, describe
+
+# The hardware projects, whose .tst scripts make up the regression
+TEST_DIRECTORIES = [os.path.join(os.path.dirname(PROJECT_DIR), project)
+                    for project in ("01", "02", "03", "04", "05")]
+Result = typing.Dict[str, typing.Any]
+
+
+def run_scripts(scripts: typing.List[str], jobs: int, hdl: bool = True,
+                native: bool = True, packed: bool = True,
+                report: typing.Optional[typing.Callable[[Result], None]]
+                = None) -> typing.List[Result]:
+    """Runs scripts on a pool of worker processes, each script on its own.
+
+    Args:
+        scripts (typing.List[str]): .tst files.
+        jobs (int): the number of worker processes.
+        hdl (bool): simulate every chip from its HDL.
+        native (bool): simulate parts with NativeChips where it can.
+        packed (bool): evaluate combinational chips on packed vectors.
+        report (typing.Optional[typing.Callable[[Result], None]]): called
+            with each result as soon as its script finishes.
+
+    Returns:
+        typing.List[Result]: the results of run_script, in the order of
+        the scripts.
+    """
+    if hdl and native:
+        check_natives()
+    results = dict()
+    # Workers started with spawn rather than fork import NativeChips afresh,
+    # so they are handed the checks made here
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=share_checks,
+            initargs=(dict(checked),)) as pool:
+        futures = {pool.submit(run_script, script, False, hdl, native,
+                               packed): script for script in scripts}
+        for future in concurrent.futures.as_completed(futures):
+            script = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                # A script that crashed its worker fails alone
+                result = {"script": script, "passed": False,
+                          "error": f"{type(error).__name__}: {error}",
+                          "mismatch": None, "lines": 0, "seconds": 0.0}
+            results[script] = result
+            if report is not None:
+                report(result)
+    return [results[script] for script in scripts]
+
+
+def check_natives() -> None:
+    """Checks the native chips against the projects' HDL up front, so the
+    workers are given the checks instead of each repeating them. A
+    chip that fails is left for the scripts using it to report.
+    """
+    library = ChipLibrary(HARDWARE_DIRECTORIES)
+    for name in NATIVE_CHIPS:
+        path = library.find(name)
+        if path is not None:
+            try:
+                check_native(name, path, HARDWARE_DIRECTORIES)
+            except HDLError:
+                pass
+
+
+def test_name(script: str) -> typing.Tuple[str, str]:
+    """
+    Args:
+        script (str): a .tst file.
+
+    Returns:
+        typing.Tuple[str, str]: its project directory relative to the
+        projects, like 03/a, and its file name without the extension.
+    """
+    directory, name = os.path.split(os.path.abspath(script))
+    classname = os.path.relpath(directory, os.path.dirname(PROJECT_DIR))
+    if classname.startswith(os.pardir):
+        classname = directory
+    return classname.replace(os.sep, "/"), os.path.splitext(name)[0]
+
+
+def write_junit(results: typing.List[Result], wall_time: float,
+                path: str) -> None:
+    """
+    Args:
+        results (typing.List[Result]): the results of run_scripts.
+        wall_time (float): the seconds the whole run took.
+        path (str): where to write them as a JUnit XML report.
+    """
+    suite = ElementTree.Element(
+        "testsuite", name="hardware", tests=str(len(results)),
+        failures=str(sum(not result["passed"] and result["error"] is None
+                         for result in results)),
+        errors=str(sum(result["error"] is not None for result in results)),
+        time=f"{wall_time:.3f}", hostname=platform.node())
+    for result in results:
+        classname, name = test_name(result["script"])
+        case = ElementTree.SubElement(suite, "testcase", classname=classname,
+                                      name=name,
+                                      time=f"{result['seconds']:.3f}")
+        if result["error"] is not None:
+            ElementTree.SubElement(case, "error",
+                                   message=result["error"]).text = \
+                result["error"]
+        elif not result["passed"]:
+            number, expected, actual, script_line = result["mismatch"]
+            ElementTree.SubElement(
+                case, "failure",
+                message=f"output line {number} (script line {script_line})"
+            ).text = f"expected {expected}\ngot      {actual}"
+    root = ElementTree.Element("testsuites", tests=suite.get("tests"),
+                               failures=suite.get("failures"),
+                               errors=suite.get("errors"),
+                               time=suite.get("time"))
+    root.append(suite)
+    ElementTree.ElementTree(root).write(path, encoding="utf-8",
+                                        xml_declaration=True)
+
+
+def write_json(results: typing.List[Result], wall_time: float,
+               path: str) -> None:
+    """
+    Args:
+        results (typing.List[Result]): the results of run_scripts.
+        wall_time (float): the seconds the whole run took.
+        path (str): where to write them, with totals, as JSON.
+    """
+    tests = []
+    for result in results:
+        classname, name = test_name(result["script"])
+        tests.append({"project": classname, "name": name,
+                      "script": result["script"],
+                      "passed": result["passed"], "error": result["error"],
+                      "mismatch": result["mismatch"],
+                      "lines": result["lines"],
+                      "seconds": result["seconds"]})
+    with open(path, 'w') as output_file:
+        json.dump({"time": time.time(),
+                   "python": platform.python_version(),
+                   "tests": len(results),
+                   "passed": sum(result["passed"] for result in results),
+                   "wall_seconds": wall_time,
+                   "results": tests}, output_file, indent=2)
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="Regression")
+    arg_parser.add_argument("paths", nargs="*", default=TEST_DIRECTORIES,
+                            help=".tst scripts, or directories of them "
+                            "(default: projects 01 to 05)")
+    arg_parser.add_argument("--jobs", type=int, metavar="N",
+                            help="run on N worker processes (default: one "
+                            "per CPU)")
+    arg_parser.add_argument("--models", action="store_true",
+                            help="simulate chips with their models instead "
+                            "of their HDL")
+    arg_parser.add_argument("--no-native", action="store_true",
+                            help="simulate every part from its HDL, even "
+                            "memories, registers and the ALU; RAM4K and "
+                            "the chips built of it are then too large")
+    arg_parser.add_argument("--unpacked", action="store_true",
+                            help="evaluate combinational chips one test "
+                            "vector at a time")
+    arg_parser.add_argument("--junit", metavar="PATH",
+                            help="write a JUnit XML report")
+    arg_parser.add_argument("--json", metavar="PATH",
+                            help="write a JSON summary")
+    args = arg_parser.parse_args()
+    jobs = args.jobs if args.jobs is not None else os.cpu_count() or 1
+    if jobs < 1:
+        sys.exit("Invalid usage, --jobs must be at least 1")
+
+    start = time.perf_counter()
+    results = run_scripts(find_scripts(args.paths), jobs, not args.models,
+                          not args.no_native, not args.unpacked,
+                          lambda result: print(describe(result), flush=True))
+    wall_time = time.perf_counter() - start
+    if args.junit:
+        write_junit(results, wall_time, args.junit)
+    if args.json:
+        write_json(results, wall_time, args.json)
+    passed = sum(result["passed"] for result in results)
+    cpu_time = sum(result["seconds"] for result in results)
+    print(f"{passed}/{len(results)} passed, {wall_time:.2f}s wall, "
+          f"{cpu_time:.2f}s summed over {jobs} jobs")
+    if passed < len(results):
+        sys.exit(1)
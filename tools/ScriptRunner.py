@@ -0,0 +1,522 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import typing
+import ProjectPaths
+from BitParallel import PackedChip, is_combinational
+from ChipModels import ProgramMachine, CHIP_MODELS
+from HDLParser import HDLError
+from HDLSimulator import HDLChip
+from KeyboardScript import KEYS_EXTENSION, Events, load_script
+
+# Comments, strings, punctuation and words, in that order of precedence
+TOKEN = re.compile(r'//[^\n]*|/\*.*?\*/|"[^"]*"|[,;{}]|[^\s,;{}"]+',
+                   re.DOTALL)
+OUTPUT_FORMAT = re.compile(r"^(.+)%([BDXS])(\d+)\.(\d+)\.(\d+)$")
+# Conditions of while loops
+COMPARISONS = {"=": int.__eq__, "<>": int.__ne__, "<": int.__lt__,
+               ">": int.__gt__, "<=": int.__le__, ">=": int.__ge__}
+# A while loop that runs this long is waiting for input that won't come
+MAX_WHILE_ITERATIONS = 100_000
+WORD_MASK = 0xFFFF
+
+
+class ScriptError(Exception):
+    """A test script that can't be run, with the line it failed on."""
+
+    def __init__(self, message: str, line: int = 0) -> None:
+        super().__init__(f"line {line}: {message}" if line else message)
+        self.line = line
+
+
+class ScriptMismatch(Exception):
+    """Raised when an output line differs from the .cmp file."""
+
+
+class Command:
+    """A single script command, or a repeat or while block of commands."""
+
+    def __init__(self, words: typing.List[str], line: int,
+                 body: typing.Optional[typing.List["Command"]] = None) \
+            -> None:
+        self.words = words
+        self.line = line
+        self.body = body
+
+
+def parse_script(text: str) -> typing.List[Command]:
+    """
+    Args:
+        text (str): a .tst script.
+
+    Returns:
+        typing.List[Command]: its commands. The separators , and ; both end
+        a command here, since nothing is shown between steps.
+    """
+    tokens = []
+    for match in TOKEN.finditer(text):
+        token = match.group()
+        if not token.startswith("//") and not token.startswith("/*"):
+            tokens.append((token, text.count("\n", 0, match.start()) + 1))
+    position = 0
+
+    def parse_block(closed: bool) -> typing.List[Command]:
+        nonlocal position
+        commands = []
+        words = []
+        line = 0
+        while position < len(tokens):
+            token, token_line = tokens[position]
+            position += 1
+            if token in (",", ";"):
+                if words:
+                    commands.append(Command(words, line))
+                words = []
+            elif token == "{":
+                if not words or words[0] not in ("repeat", "while"):
+                    raise ScriptError("a block must follow repeat or while",
+                                      token_line)
+                commands.append(Command(words, line, parse_block(True)))
+                words = []
+            elif token == "}":
+                if not closed:
+                    raise ScriptError("unmatched }", token_line)
+                if words:
+                    commands.append(Command(words, line))
+                return commands
+            else:
+                if not words:
+                    line = token_line
+                words.append(token)
+        if closed:
+            raise ScriptError("missing }", line)
+        if words:
+            commands.append(Command(words, line))
+        return commands
+
+    return parse_block(False)
+
+
+def parse_value(text: str) -> int:
+    """
+    Args:
+        text (str): a number, in decimal or as %B, %X or %D.
+
+    Returns:
+        int: its value as an unsigned 16-bit number.
+    """
+    if text.startswith("%"):
+        base = {"B": 2, "X": 16, "D": 10}.get(text[1:2].upper())
+        if base is None:
+            raise ValueError(text)
+        return int(text[2:], base) & WORD_MASK
+    return int(text) & WORD_MASK
+
+
+class OutputColumn:
+    """An entry of an output-list: a variable and how to print it."""
+
+    def __init__(self, text: str) -> None:
+        """
+        Args:
+            text (str): the entry, such as RAM[0]%D2.6.2.
+        """
+        match = OUTPUT_FORMAT.match(text)
+        if match is None:
+            # The default format
+            match = OUTPUT_FORMAT.match(f"{text}%B1.16.1")
+        self.name = match.group(1)
+        self.kind = match.group(2)
+        self.left, self.width, self.right = (int(match.group(group))
+                                             for group in (3, 4, 5))
+
+    def header(self) -> str:
+        total = self.left + self.width + self.right
+        name = self.name[:total]
+        padding = total - len(name)
+        return " " * (padding // 2) + name + " " * (padding - padding // 2)
+
+    def cell(self, value: typing.Union[int, str]) -> str:
+        width = self.width
+        if self.kind == "S":
+            text = str(value).ljust(width)[:width]
+        elif self.kind == "D":
+            if value & 0x8000:
+                value -= 0x10000
+            text = str(value).rjust(width)[-width:]
+        elif self.kind == "B":
+            text = format(value, f"0{width}b")[-width:]
+        else:
+            text = format(value, f"0{width}X")[-width:]
+        return " " * self.left + text + " " * self.right
+
+
+def lines_match(expected: str, actual: str) -> bool:
+    """
+    Returns:
+        bool: True if the lines are the same, where every * in the expected
+        line matches any character.
+    """
+    expected, actual = expected.rstrip(), actual.rstrip()
+    return len(expected) == len(actual) and \
+        all(wanted == "*" or wanted == got
+            for wanted, got in zip(expected, actual))
+
+
+class ScriptRunner:
+    """Runs a .tst script from projects 01 to 05 without the Java tools.
+    Chips are simulated from their HDL, programs are run by the CPU
+    emulator, and every output line is compared to the script's .cmp file
+    as soon as it's written, stopping at the first mismatch.
+    With hdl unset, chips that have a model in ChipModels are stood in for
+    by it instead, which is faster but doesn't test their HDL.
+    Scripts that wait for the keyboard, like Memory.tst, get their keys
+    from a keyboard script keyed by the script's time.
+    Combinational chips simulated from their HDL are evaluated on all of
+    the script's inputs at once, by a PackedChip.
+    """
+
+    def __init__(self, script_path: str,
+                 keys: typing.Optional[Events] = None,
+                 hdl: bool = True, native: bool = False,
+                 packed: bool = True) -> None:
+        """
+        Args:
+            script_path (str): the .tst file.
+            keys (typing.Optional[Events]): the keys to press, by the time
+                in clock cycles. By default, the keyboard script with the
+                .tst file's name and KEYS_EXTENSION, if there is one.
+            hdl (bool): simulate chips from their HDL even when ChipModels
+                has a model of them. Unset, the models are used.
+            native (bool): simulate the parts NativeChips implements in
+                Python, such as the RAM chips, with those implementations.
+            packed (bool): evaluate combinational chips on packed vectors.
+        """
+        self.script_path = os.path.abspath(script_path)
+        self.directory = os.path.dirname(self.script_path)
+        with open(self.script_path, 'r') as script_file:
+            self.commands = parse_script(script_file.read())
+        if keys is None:
+            keys_path = os.path.splitext(self.script_path)[0] + \
+                KEYS_EXTENSION
+            keys = load_script(keys_path) if os.path.exists(keys_path) \
+                else []
+        self.keys = keys
+        self.hdl = hdl
+        self.native = native
+        # The packed chips loaded while recording, replayed in order
+        self.packed_chips = [] if packed else None
+        self.recording = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Goes back to the state before the script's first command."""
+        self.next_key = 0
+        self.machine = ProgramMachine()
+        self.columns = []
+        self.expected = None
+        self.output = []
+        self.output_path = None
+        self.mismatch = None
+        self.time = 0
+        self.ticked = False
+
+    def run(self) -> bool:
+        """Runs the script.
+
+        Returns:
+            bool: True if every output line matched the .cmp file.
+        """
+        if self.packed_chips is not None:
+            self.record()
+        try:
+            self.execute(self.commands)
+        except ScriptMismatch:
+            return False
+        return True
+
+    def record(self) -> None:
+        """Runs the script without output, noting the inputs of each eval
+        of the combinational chips it loads, and evaluates them all. Scripts
+        with while loops, which may wait on an output, and scripts loading
+        anything else run unpacked, as do scripts that fail while recording.
+        """
+        if has_while(self.commands):
+            self.packed_chips = None
+            return
+        self.recording = True
+        try:
+            self.execute(self.commands)
+        except ScriptError:
+            self.packed_chips = None
+        finally:
+            self.recording = False
+            self.reset()
+        for chip in self.packed_chips or []:
+            chip.evaluate()
+
+    def write_output(self) -> None:
+        """Writes the output lines to the script's output-file."""
+        if self.output_path is not None:
+            with open(self.output_path, 'w') as output_file:
+                output_file.write("".join(line + "\n"
+                                          for line in self.output))
+
+    def value(self, name: str) -> typing.Union[int, str]:
+        if name == "time":
+            return f"{self.time}+" if self.ticked else str(self.time)
+        return self.machine.get(name)
+
+    def emit(self, line: str, script_line: int) -> None:
+        if self.recording:
+            return
+        self.output.append(line)
+        if self.expected is None:
+            return
+        number = len(self.output)
+        expected = self.expected[number - 1] \
+            if number <= len(self.expected) else ""
+        if not lines_match(expected, line):
+            self.mismatch = (number, expected, line, script_line)
+            raise ScriptMismatch(number)
+
+    def press_keys(self) -> None:
+        while self.next_key < len(self.keys) and \
+                self.keys[self.next_key][0] <= self.time:
+            self.machine.set_key(self.keys[self.next_key][1])
+            self.next_key += 1
+
+    def advance(self, cycles: int) -> None:
+        """Runs whole clock cycles, stopping to press keys on time."""
+        while cycles:
+            count = cycles
+            if self.next_key < len(self.keys):
+                count = min(count, max(self.keys[self.next_key][0] -
+                                       self.time, 1))
+            self.machine.run(count)
+            self.time += count
+            cycles -= count
+            self.press_keys()
+
+    def execute(self, commands: typing.List[Command]) -> None:
+        for command in commands:
+            try:
+                self.execute_command(command)
+            except (KeyError, ValueError, OSError, HDLError) as error:
+                raise ScriptError(f"{' '.join(command.words)}: {error}",
+                                  command.line) from error
+
+    def execute_command(self, command: Command) -> None:
+        words = command.words
+        name = words[0]
+        if command.body is not None:
+            if name == "while":
+                self.run_while(command)
+            else:
+                self.run_repeat(command)
+        elif name == "set":
+            self.machine.set(words[1], parse_value(words[2]))
+        elif name == "load" or (len(words) == 3 and words[1] == "load"):
+            # Either load <file>, or <part> load <file> such as ROM32K's
+            self.load(words[-1] if len(words) > 1 else "")
+        elif name == "output-file":
+            self.output_path = os.path.join(self.directory, words[1])
+        elif name == "compare-to":
+            with open(os.path.join(self.directory, words[1]), 'r') as \
+                    compare_file:
+                self.expected = compare_file.read().splitlines()
+        elif name == "output-list":
+            self.columns = [OutputColumn(text) for text in words[1:]]
+            self.emit("|" + "|".join(column.header()
+                                     for column in self.columns) + "|",
+                      command.line)
+        elif name == "output":
+            self.emit("|" + "|".join(column.cell(self.value(column.name))
+                                     for column in self.columns) + "|",
+                      command.line)
+        elif name == "eval":
+            self.machine.eval()
+        elif name == "tick":
+            self.machine.tick()
+            self.ticked = True
+        elif name == "tock":
+            self.machine.tock()
+            self.time += 1
+            self.ticked = False
+            self.press_keys()
+        elif name == "ticktock":
+            self.advance(1)
+        elif name in ("echo", "clear-echo", "breakpoint",
+                      "clear-breakpoints"):
+            pass
+        else:
+            raise ScriptError(f"unknown command {name}", command.line)
+
+    def load(self, file_name: str) -> None:
+        path = os.path.join(self.directory, file_name)
+        base, extension = os.path.splitext(file_name)
+        if extension == ".hdl":
+            if base in CHIP_MODELS and not self.hdl:
+                self.machine = CHIP_MODELS[base]()
+            elif self.recording:
+                program = HDLChip(path, native=self.native).program
+                if not is_combinational(program):
+                    raise ScriptError(f"{file_name} isn't combinational")
+                self.machine = PackedChip(program)
+                self.packed_chips.append(self.machine)
+            elif self.packed_chips:
+                self.machine = self.packed_chips.pop(0)
+            else:
+                self.machine = HDLChip(path, native=self.native)
+        else:
+            self.machine.load(path)
+        if self.recording and not isinstance(self.machine, PackedChip):
+            raise ScriptError(f"{file_name} can't be packed")
+
+    def run_repeat(self, command: Command) -> None:
+        if len(command.words) < 2:
+            raise ScriptError("repeat without a count runs forever, the "
+                              "script needs a person at the keyboard",
+                              command.line)
+        count = int(command.words[1])
+        body = [block.words for block in command.body]
+        if body in ([["ticktock"]], [["tick"], ["tock"]]):
+            # Nothing is looked at between cycles, so run them all at once
+            self.advance(count)
+            return
+        for _ in range(count):
+            self.execute(command.body)
+
+    def run_while(self, command: Command) -> None:
+        _, name, operator, text = command.words
+        compare = COMPARISONS[operator]
+        expected = parse_value(text)
+        for _ in range(MAX_WHILE_ITERATIONS):
+            self.press_keys()
+            if not compare(self.machine.get(name), expected):
+                return
+            self.execute(command.body)
+        raise ScriptError(f"while {name} {operator} {text} didn't finish, "
+                          f"the script needs a person at the keyboard",
+                          command.line)
+
+
+def has_while(commands: typing.List[Command]) -> bool:
+    """
+    Returns:
+        bool: True if any of the commands, or of the blocks in them, is a
+        while loop.
+    """
+    return any(command.words[0] == "while" or
+               (command.body is not None and has_while(command.body))
+               for command in commands)
+
+
+def run_script(script_path: str, write_output: bool = False,
+               hdl: bool = True, native: bool = False,
+               packed: bool = True) -> typing.Dict[str, typing.Any]:
+    """
+    Args:
+        script_path (str): a .tst file.
+        write_output (bool): also write the script's output-file.
+        hdl (bool): simulate every chip from its HDL, rather than the ones
+            ChipModels has with their models.
+        native (bool): simulate parts with NativeChips where it can.
+        packed (bool): evaluate combinational chips on packed vectors.
+
+    Returns:
+        typing.Dict[str, typing.Any]: whether it passed, the time it took,
+        the number of output lines, and the first mismatch or the error
+        that stopped it.
+    """
+    start = time.perf_counter()
+    result = {"script": script_path, "passed": False, "error": None,
+              "mismatch": None, "lines": 0}
+    try:
+        runner = ScriptRunner(script_path, hdl=hdl, native=native,
+                              packed=packed)
+        result["passed"] = runner.run()
+        result["lines"] = len(runner.output)
+        result["mismatch"] = runner.mismatch
+        if write_output:
+            runner.write_output()
+    except (ScriptError, OSError) as error:
+        result["error"] = str(error)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def find_scripts(paths: typing.List[str]) -> typing.List[str]:
+    """
+    Args:
+        paths (typing.List[str]): .tst files and directories holding them.
+
+    Returns:
+        typing.List[str]: every script, with directories searched
+        recursively.
+    """
+    scripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                scripts.extend(os.path.join(directory, name)
+                               for name in sorted(files)
+                               if name.endswith(".tst"))
+        else:
+            scripts.append(path)
+    return scripts
+
+
+def describe(result: typing.Dict[str, typing.Any]) -> str:
+    name = os.path.relpath(result["script"])
+    if result["passed"]:
+        return f"PASS  {name} ({result['lines']} lines, " \
+               f"{result['seconds'] * 1e3:.0f}ms)"
+    if result["error"] is not None:
+        return f"ERROR {name}: {result['error']}"
+    number, expected, actual, script_line = result["mismatch"]
+    return f"FAIL  {name}: output line {number} (script line " \
+           f"{script_line})\n      expected {expected}\n      got      " \
+           f"{actual}"
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(prog="ScriptRunner")
+    arg_parser.add_argument("paths", nargs="+",
+                            help=".tst scripts, or directories of them")
+    arg_parser.add_argument("--write-output", action="store_true",
+                            help="write each script's output-file")
+    arg_parser.add_argument("--models", action="store_true",
+                            help="simulate chips with their models instead "
+                            "of their HDL")
+    arg_parser.add_argument("--no-native", action="store_true",
+                            help="simulate every part from its HDL, even "
+                            "memories, registers and the ALU; RAM4K and "
+                            "the chips built of it are then too large")
+    arg_parser.add_argument("--unpacked", action="store_true",
+                            help="evaluate combinational chips one test "
+                            "vector at a time")
+    args = arg_parser.parse_args()
+
+    print("Simulating chips with their models" if args.models else
+          "Simulating chips from their HDL" + ("" if args.no_native else
+                                               ", with native parts"))
+    start = time.perf_counter()
+    results = [run_script(script, args.write_output, not args.models,
+                          not args.no_native, not args.unpacked)
+               for script in find_scripts(args.paths)]
+    for result in results:
+        print(describe(result))
+    passed = sum(result["passed"] for result in results)
+    print(f"{passed}/{len(results)} passed in "
+          f"{time.perf_counter() - start:.2f}s")
+    if passed < len(results):
+        sys.exit(1)
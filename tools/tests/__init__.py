@@ -0,0 +1,22 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPOSITORY_DIR = os.path.dirname(PROJECT_DIR)
+
+
+def hardware_path(*path: str) -> str:
+    """
+    Args:
+        path (str): a file's path under one of the hardware projects, such
+            as "01", "Mux.hdl".
+
+    Returns:
+        str: the file's full path.
+    """
+    return os.path.join(REPOSITORY_DIR, *path)
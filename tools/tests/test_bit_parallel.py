@@ -0,0 +1,103 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from BitParallel import MAX_EXHAUSTIVE_BITS, check_chip, evaluate_vectors, \
+    exhaustive_vectors, lane_value, pack_lanes, random_vectors
+from HDLSimulator import HDLChip
+from ScriptRunner import run_script
+from tests import hardware_path
+
+# Selects a when sel is 1, the opposite of Mux
+SWAPPED_MUX_HDL = """
+CHIP Mux {
+    IN a, b, sel;
+    OUT out;
+
+    PARTS:
+    Not(in=sel, out=nsel);
+    And(a=a, b=sel, out=c1);
+    And(a=b, b=nsel, out=c2);
+    Or(a=c1, b=c2, out=out);
+}
+"""
+
+
+class BitParallelTest(unittest.TestCase):
+
+    def test_pack_lanes(self) -> None:
+        values = [5, 0, 7, 2, 65535]
+        bits = pack_lanes(values, 16)
+        self.assertEqual(len(bits), 16)
+        self.assertEqual([lane_value(bits, lane)
+                          for lane in range(len(values))], values)
+        self.assertEqual(pack_lanes([], 2), [0, 0])
+
+    def test_packed_matches_single_vectors(self) -> None:
+        chips = [("01", "Mux8Way16.hdl"), ("01", "DMux8Way.hdl"),
+                 ("02", "ALU.hdl")]
+        for path in chips:
+            with self.subTest(path[1]):
+                chip = HDLChip(hardware_path(*path))
+                widths = {pin: len(wires)
+                          for pin, wires in chip.program.inputs.items()}
+                vectors = random_vectors(widths, 200, random.Random(1))
+                packed = evaluate_vectors(chip.program, vectors)
+                for lane, vector in enumerate(vectors):
+                    for pin, value in vector.items():
+                        chip.set(pin, value)
+                    chip.eval()
+                    for pin, bits in packed.items():
+                        self.assertEqual(lane_value(bits, lane),
+                                         chip.get(pin), (vector, pin))
+
+    def test_vector_choice(self) -> None:
+        self.assertEqual(len(exhaustive_vectors({"a": 3, "b": 2})), 32)
+        self.assertEqual(sorted((vector["a"], vector["b"]) for vector in
+                                exhaustive_vectors({"a": 1, "b": 1})),
+                         [(0, 0), (0, 1), (1, 0), (1, 1)])
+        # The chips' input bits
+        chips = {("01", "DMux8Way.hdl"): 4, ("01", "Or8Way.hdl"): 8,
+                 ("02", "Add16.hdl"): 32, ("01", "Mux8Way16.hdl"): 131}
+        for path, bits in chips.items():
+            with self.subTest(path[1]):
+                result = check_chip(hardware_path(*path), 300)
+                self.assertTrue(result["passed"], result)
+                exhaustive = bits <= MAX_EXHAUSTIVE_BITS
+                self.assertEqual((result["exhaustive"], result["vectors"]),
+                                 (exhaustive, 1 << bits if exhaustive
+                                  else 300))
+
+    def test_wrong_chip_reported(self) -> None:
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "Mux.hdl")
+            with open(path, 'w') as hdl_file:
+                hdl_file.write(SWAPPED_MUX_HDL)
+            result = check_chip(path)
+            self.assertFalse(result["passed"])
+            inputs, expected, actual = result["mismatch"]
+            self.assertNotEqual(inputs["a"], inputs["b"])
+            self.assertNotEqual(expected, actual)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_no_reference(self) -> None:
+        result = check_chip(hardware_path("03", "a", "Bit.hdl"))
+        self.assertFalse(result["passed"])
+        self.assertIn("no reference", result["error"])
+
+    def test_scripts_packed_and_unpacked(self) -> None:
+        for name in ("Mux8Way16", "DMux8Way"):
+            for packed in (True, False):
+                with self.subTest(name, packed=packed):
+                    result = run_script(hardware_path("01", f"{name}.tst"),
+                                        packed=packed)
+                    self.assertTrue(result["passed"], result)
@@ -0,0 +1,122 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import collections
+import os
+import shutil
+import tempfile
+import unittest
+from ChipCost import CostAnalyzer, describe
+from HDLSimulator import HARDWARE_DIRECTORIES, ChipLibrary
+
+# Paths of three, two and one gates from its inputs to its outputs
+CHAIN_HDL = """
+CHIP Chain {
+    IN a, b;
+    OUT out, c;
+
+    PARTS:
+    Not(in=a, out=na);
+    And(a=na, b=b, out=out);
+    Not(in=b, out=c);
+}
+"""
+# A DFF that flips every cycle, shown when in is set
+TOGGLE_HDL = """
+CHIP Toggle {
+    IN in;
+    OUT out;
+
+    PARTS:
+    DFF(in=nq, out=q);
+    Not(in=q, out=nq);
+    And(a=in, b=q, out=out);
+}
+"""
+
+
+class ChipCostTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.analyzer = CostAnalyzer(HARDWARE_DIRECTORIES)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def analyze_hdl(self, name: str, text: str) -> CostAnalyzer:
+        with open(os.path.join(self.directory, f"{name}.hdl"), 'w') \
+                as hdl_file:
+            hdl_file.write(text)
+        return CostAnalyzer([self.directory] + HARDWARE_DIRECTORIES)
+
+    def test_critical_paths(self) -> None:
+        paths = {"CPU": (181, "input to register"),
+                 "CpuMul": (187, "input to register"),
+                 "ALU": (134, "input to output"),
+                 "PC": (122, "register to register"),
+                 "Add16": (98, "input to output"),
+                 "Mux": (7, "input to output"),
+                 "Nand": (1, "input to output"), "DFF": (0, "none")}
+        for name, path in paths.items():
+            with self.subTest(name):
+                self.assertEqual(self.analyzer.analyze(name).critical_path(),
+                                 path)
+
+    def test_gate_counts(self) -> None:
+        library = ChipLibrary(HARDWARE_DIRECTORIES)
+        for name in ("Mux", "ALU", "PC", "RAM8", "CPU", "CpuMul"):
+            with self.subTest(name):
+                self.assertEqual(self.analyzer.analyze(name).nands,
+                                 library.nand_count(name))
+        cpu = self.analyzer.analyze("CPU")
+        self.assertEqual((cpu.dffs, cpu.builtins), (48, 0))
+        self.assertEqual(collections.Counter(cpu.parts),
+                         {"ALU": 1, "PC": 1, "Register": 2, "Mux16": 2,
+                          "Or": 3, "And": 7, "Not": 5})
+        self.assertEqual(sum(self.analyzer.analyze(part).nands
+                             for part in cpu.parts), cpu.nands)
+        alu = self.analyzer.analyze("ALU")
+        self.assertEqual(collections.Counter(alu.parts),
+                         {"Mux16": 6, "Add16": 1, "Or8Way": 2, "Not16": 3,
+                          "And16": 1, "Or": 1, "Not": 1})
+        # Parts are analyzed once, wherever they are used
+        self.assertIs(self.analyzer.analyze("Mux16"),
+                      self.analyzer.costs["Mux16"])
+
+    def test_builtin_chips_are_registers(self) -> None:
+        screen = self.analyzer.analyze("Screen")
+        self.assertEqual((screen.nands, screen.builtins), (0, 1))
+        self.assertEqual(screen.critical_path(), (0, "none"))
+        self.assertEqual(set(screen.arrivals), {0})
+        self.assertEqual(set(screen.required), {0})
+
+    def test_paths_by_bit(self) -> None:
+        cost = self.analyze_hdl("Chain", CHAIN_HDL).analyze("Chain")
+        self.assertEqual(cost.nands, 4)
+        self.assertEqual(cost.paths, [{0: 3, 1: 2}, {1: 1}])
+        self.assertEqual(cost.arrivals, [None, None])
+        self.assertEqual(cost.required, [None, None])
+        self.assertEqual(cost.critical_path(), (3, "input to output"))
+
+    def test_paths_through_registers(self) -> None:
+        cost = self.analyze_hdl("Toggle", TOGGLE_HDL).analyze("Toggle")
+        self.assertEqual((cost.nands, cost.dffs), (3, 1))
+        self.assertEqual(cost.paths, [{0: 2}])
+        self.assertEqual(cost.arrivals, [2])
+        self.assertEqual(cost.required, [None])
+        self.assertEqual(cost.internal, 1)
+
+    def test_describe(self) -> None:
+        lines = describe(self.analyzer.analyze("PC"),
+                         self.analyzer).splitlines()
+        self.assertEqual(lines[0], "PC: 1118 Nand gates, 16 DFFs, 0 builtin "
+                         "chips, critical path 122 gates (register to "
+                         "register)")
+        # Costliest parts first
+        self.assertEqual([line.split()[:3] for line in lines[2:]],
+                         [["Mux16", "3", "480"], ["Inc16", "1", "478"],
+                          ["Register", "1", "160"]])
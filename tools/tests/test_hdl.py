@@ -0,0 +1,134 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+from HDLParser import HDLError, parse_hdl, read_hdl
+from HDLSimulator import HARDWARE_DIRECTORIES, MAX_NANDS, ChipLibrary, \
+    ChipTooLarge, HDLChip
+from tests import hardware_path
+
+# A Not gate whose input is its own output
+LOOP_HDL = """
+CHIP Loop {
+    IN in;
+    OUT out;
+
+    PARTS:
+    Nand(a=in, b=feedback, out=feedback);
+    Not(in=feedback, out=out);
+}
+"""
+
+
+class HDLTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def write_chip(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory, f"{name}.hdl")
+        with open(path, 'w') as hdl_file:
+            hdl_file.write(text)
+        return path
+
+    def test_parse_chip(self) -> None:
+        definition = read_hdl(hardware_path("01", "Mux.hdl"))
+        self.assertEqual(definition.name, "Mux")
+        self.assertEqual(definition.inputs, {"a": 1, "b": 1, "sel": 1})
+        self.assertEqual(definition.outputs, {"out": 1})
+        self.assertIsNone(definition.builtin)
+        self.assertEqual([part.name for part in definition.parts],
+                         ["Not", "And", "And", "Or"])
+        self.assertEqual([(connection.pin, connection.wire) for connection
+                          in definition.parts[0].connections],
+                         [("in", "sel"), ("out", "nsel")])
+
+    def test_parse_buses_and_builtins(self) -> None:
+        definition = parse_hdl("CHIP Low { IN in[16]; OUT out[8], b; "
+                               "PARTS: Id(in=in[3..10], out=out[0..7]); }")
+        self.assertEqual(definition.inputs, {"in": 16})
+        self.assertEqual(definition.outputs, {"out": 8, "b": 1})
+        connection = definition.parts[0].connections[0]
+        self.assertEqual((connection.pin_bits, connection.wire_bits),
+                         (None, (3, 10)))
+        definition = parse_hdl("CHIP DFF { IN in; OUT out; BUILTIN DFF; "
+                               "CLOCKED in; }")
+        self.assertEqual((definition.builtin, definition.clocked),
+                         ("DFF", ["in"]))
+
+    def test_parse_errors(self) -> None:
+        errors = {"CHIP A { IN a; OUT b;\nPARTS:\nNot(in=a out=b); }": 3,
+                  "CHIP A { IN a[2]; OUT b;\nPARTS: X(in=a[1..0]); }": 2,
+                  "CHIP A { IN a; OUT b;\nPARTS:\n": 2}
+        for text, line in errors.items():
+            with self.subTest(text):
+                with self.assertRaises(HDLError) as context:
+                    parse_hdl(text)
+                self.assertEqual(context.exception.line, line)
+
+    def test_simulate_mux(self) -> None:
+        chip = HDLChip(hardware_path("01", "Mux.hdl"))
+        for a, b, sel in itertools.product((0, 1), repeat=3):
+            with self.subTest(a=a, b=b, sel=sel):
+                chip.set("a", a)
+                chip.set("b", b)
+                chip.set("sel", sel)
+                chip.eval()
+                self.assertEqual(chip.get("out"), b if sel else a)
+
+    def test_simulate_bit(self) -> None:
+        chip = HDLChip(hardware_path("03", "a", "Bit.hdl"))
+        for value, load, out in ((1, 0, 0), (1, 1, 1), (0, 0, 1),
+                                 (0, 1, 0)):
+            chip.set("in", value)
+            chip.set("load", load)
+            chip.tick()
+            chip.tock()
+            self.assertEqual(chip.get("out"), out)
+
+    def test_nand_counts(self) -> None:
+        library = ChipLibrary(HARDWARE_DIRECTORIES)
+        counts = {"Not": 1, "And": 2, "Mux": 10, "ALU": 1594, "CPU": 3386}
+        for name, count in counts.items():
+            with self.subTest(name):
+                self.assertEqual(library.nand_count(name), count)
+        self.assertEqual(HDLChip(hardware_path("02", "ALU.hdl"))
+                         .program.nand_count, counts["ALU"])
+
+    def test_combinational_loop(self) -> None:
+        path = self.write_chip("Loop", LOOP_HDL)
+        with self.assertRaisesRegex(HDLError, "loop"):
+            HDLChip(path, [self.directory] + HARDWARE_DIRECTORIES)
+
+    def test_part_of_itself(self) -> None:
+        self.write_chip("Self", "CHIP Self { IN in; OUT out; "
+                        "PARTS: Self(in=in, out=out); }")
+        with self.assertRaisesRegex(HDLError, "part of itself"):
+            ChipLibrary([self.directory]).nand_count("Self")
+
+    def test_too_large(self) -> None:
+        path = hardware_path("03", "b", "RAM4K.hdl")
+        self.assertGreater(ChipLibrary(HARDWARE_DIRECTORIES)
+                           .nand_count("RAM4K"), MAX_NANDS)
+        with self.assertRaisesRegex(ChipTooLarge, "RAM4K has .* native"):
+            HDLChip(path)
+        # Native RAMs stand in for its parts
+        chip = HDLChip(path, native=True)
+        chip.set("in", 1234)
+        chip.set("load", 1)
+        chip.set("address", 4000)
+        chip.tick()
+        chip.tock()
+        chip.set("load", 0)
+        chip.eval()
+        self.assertEqual(chip.get("out"), 1234)
@@ -0,0 +1,75 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+import unittest
+from unittest import mock
+from CPUEmulator import ADDRESS_MASK
+from HDLParser import HDLError
+from HDLSimulator import HARDWARE_DIRECTORIES, ChipLibrary
+from NativeChips import ALU, NATIVE_CHIPS, ShiftLeft, check_native, \
+    checked, covering_addresses
+
+
+class SignlessShiftLeft(ShiftLeft):
+    """Drops the sign bit, unlike CpuMul's <<."""
+
+    def evaluate(self, value: int) -> typing.Tuple[int]:
+        return (value << 1) & ADDRESS_MASK,
+
+
+class InvertedZeroALU(ALU):
+    """Gets zr backwards."""
+
+    def evaluate(self, *pins: int) -> typing.Tuple[int, int, int]:
+        out, zr, ng = super().evaluate(*pins)
+        return out, 1 - zr, ng
+
+
+class NativeChipsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.library = ChipLibrary(HARDWARE_DIRECTORIES)
+        # Every test checks from scratch, and leaves no checks behind
+        patcher = mock.patch.dict(checked, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def check(self, name: str, native: str = None) -> None:
+        check_native(native or name, self.library.find(name),
+                     HARDWARE_DIRECTORIES)
+
+    def test_models_match_hdl(self) -> None:
+        for name in NATIVE_CHIPS:
+            with self.subTest(name):
+                self.check(name)
+                self.assertIn(self.library.find(name), checked)
+
+    def test_covering_addresses(self) -> None:
+        self.assertEqual(covering_addresses(6), list(range(64)))
+        for width in (12, 14):
+            with self.subTest(width):
+                addresses = covering_addresses(width)
+                self.assertTrue(all(0 <= address < 1 << width
+                                    for address in addresses))
+                # Every bit is both clear and set somewhere
+                for bit in range(width):
+                    self.assertEqual({address >> bit & 1
+                                      for address in addresses}, {0, 1})
+
+    def test_wrong_models_rejected(self) -> None:
+        for name, model in (("ShiftLeft", SignlessShiftLeft),
+                            ("ALU", InvertedZeroALU)):
+            with self.subTest(name):
+                with mock.patch.dict(NATIVE_CHIPS, {name: model}):
+                    with self.assertRaisesRegex(HDLError,
+                                                "doesn't match the native"):
+                        self.check(name)
+                self.assertNotIn(self.library.find(name), checked)
+
+    def test_wrong_pins_rejected(self) -> None:
+        with self.assertRaisesRegex(HDLError, "doesn't have the pins"):
+            self.check("ShiftLeft", "ALU")
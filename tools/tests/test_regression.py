@@ -0,0 +1,136 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+import Regression
+from ScriptRunner import describe, find_scripts, run_script
+from tests import hardware_path
+
+# Checks Not on both inputs against compare-to
+NOT_SCRIPT = """
+load Not.hdl,
+output-file {name}.out,
+compare-to {name}.cmp,
+output-list in%B3.1.3 out%B3.1.3;
+
+set in 0,
+eval,
+output;
+
+set in 1,
+eval,
+output;
+"""
+PASSING_CMP = "|  in   |  out  |\n|   0   |   1   |\n|   1   |   0   |\n"
+# Its last line expects Not 1 to be 1
+FAILING_CMP = "|  in   |  out  |\n|   0   |   1   |\n|   1   |   1   |\n"
+
+
+class RegressionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(hardware_path("01", "Not.hdl"), self.directory)
+        self.write_script("Passing", PASSING_CMP)
+        self.write_script("Failing", FAILING_CMP)
+        # Compares to a file that isn't there
+        with open(self.path("Missing.tst"), 'w') as script_file:
+            script_file.write(NOT_SCRIPT.format(name="Missing"))
+        self.scripts = find_scripts([self.directory])
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def write_script(self, name: str, cmp: str) -> None:
+        with open(self.path(f"{name}.tst"), 'w') as script_file:
+            script_file.write(NOT_SCRIPT.format(name=name))
+        with open(self.path(f"{name}.cmp"), 'w') as cmp_file:
+            cmp_file.write(cmp)
+
+    def test_find_scripts(self) -> None:
+        self.assertEqual(self.scripts, [self.path("Failing.tst"),
+                                        self.path("Missing.tst"),
+                                        self.path("Passing.tst")])
+        self.assertEqual(
+            Regression.test_name(hardware_path("03", "a", "Bit.tst")),
+            ("03/a", "Bit"))
+        self.assertEqual(Regression.test_name(self.path("Passing.tst")),
+                         (self.directory, "Passing"))
+
+    def test_run_script(self) -> None:
+        result = run_script(self.path("Passing.tst"), write_output=True)
+        self.assertEqual((result["passed"], result["error"],
+                          result["mismatch"], result["lines"]),
+                         (True, None, None, 3))
+        with open(self.path("Passing.out"), 'r') as output_file:
+            self.assertEqual(output_file.read(), PASSING_CMP)
+        self.assertTrue(describe(result).startswith("PASS "))
+
+        result = run_script(self.path("Failing.tst"))
+        self.assertFalse(result["passed"])
+        self.assertIsNone(result["error"])
+        number, expected, actual, script_line = result["mismatch"]
+        self.assertEqual((number, script_line), (3, 13))
+        self.assertEqual((expected.rstrip(), actual.rstrip()),
+                         ("|   1   |   1   |", "|   1   |   0   |"))
+        self.assertTrue(describe(result).startswith("FAIL "))
+
+        result = run_script(self.path("Missing.tst"))
+        self.assertFalse(result["passed"])
+        self.assertIn("Missing.cmp", result["error"])
+        self.assertTrue(describe(result).startswith("ERROR "))
+
+    def test_reports(self) -> None:
+        reported = []
+        results = Regression.run_scripts(self.scripts, 2, native=False,
+                                         report=reported.append)
+        self.assertEqual([result["script"] for result in results],
+                         self.scripts)
+        self.assertEqual(sorted(result["script"] for result in reported),
+                         self.scripts)
+        self.assertEqual([result["passed"] for result in results],
+                         [False, False, True])
+
+        json_path, junit_path = self.path("report.json"), \
+            self.path("report.xml")
+        Regression.write_json(results, 1.5, json_path)
+        with open(json_path, 'r') as json_file:
+            summary = json.load(json_file)
+        self.assertEqual((summary["tests"], summary["passed"],
+                          summary["wall_seconds"]), (3, 1, 1.5))
+        self.assertEqual([(test["name"], test["passed"],
+                           test["error"] is None)
+                          for test in summary["results"]],
+                         [("Failing", False, True), ("Missing", False, False),
+                          ("Passing", True, True)])
+        failing = summary["results"][0]
+        self.assertEqual(failing["project"], self.directory)
+        self.assertEqual(len(failing["mismatch"]), 4)
+
+        Regression.write_junit(results, 1.5, junit_path)
+        root = ElementTree.parse(junit_path).getroot()
+        self.assertEqual(root.tag, "testsuites")
+        self.assertEqual((root.get("tests"), root.get("failures"),
+                          root.get("errors"), root.get("time")),
+                         ("3", "1", "1", "1.500"))
+        cases = {case.get("name"): case for case in root.iter("testcase")}
+        self.assertEqual(set(cases), {"Failing", "Missing", "Passing"})
+        self.assertEqual(cases["Failing"].get("classname"), self.directory)
+        self.assertEqual([child.tag for child in cases["Failing"]],
+                         ["failure"])
+        self.assertIn("script line 13",
+                      cases["Failing"].find("failure").get("message"))
+        self.assertEqual([child.tag for child in cases["Missing"]],
+                         ["error"])
+        self.assertEqual(list(cases["Passing"]), [])
@@ -0,0 +1,63 @@
+"""This file is part of nand2tetris, as taught in The Hebrew University,
+and was written by Aviv Yaish according to the specifications given in  
+https://www.nand2tetris.org (Shimon Schocken and Noam Nisan, 2017)
+and as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0 
+Unported License (https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import random
+import unittest
+from HDLSimulator import HDLChip
+from tests import hardware_path
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def assertSettled(self, chip: HDLChip) -> None:
+        """Checks the wires are what running every gate gives."""
+        self.assertFalse(any(chip.scheduled))
+        w = list(chip.w)
+        chip.program.evaluate(w, chip.parts, 1)
+        self.assertEqual(chip.w, w)
+
+    def randomize(self, chip: HDLChip, rng: random.Random) -> None:
+        for pin, wires in chip.program.inputs.items():
+            # Mostly small changes, so most blocks stay unscheduled
+            value = chip.get(pin) ^ (1 << rng.randrange(len(wires)))
+            chip.set(pin, value if rng.random() < 0.8
+                     else rng.getrandbits(len(wires)))
+
+    def test_combinational(self) -> None:
+        rng = random.Random(0)
+        for path in (("01", "Mux8Way16.hdl"), ("02", "ALU.hdl")):
+            with self.subTest(path[1]):
+                chip = HDLChip(hardware_path(*path))
+                self.assertSettled(chip)
+                for _ in range(200):
+                    self.randomize(chip, rng)
+                    chip.eval()
+                    self.assertSettled(chip)
+
+    def test_clocked(self) -> None:
+        rng = random.Random(0)
+        chip = HDLChip(hardware_path("05", "CPU.hdl"))
+        for _ in range(200):
+            self.randomize(chip, rng)
+            chip.tick()
+            self.assertSettled(chip)
+            chip.tock()
+            self.assertSettled(chip)
+
+    def test_only_changes_scheduled(self) -> None:
+        chip = HDLChip(hardware_path("02", "ALU.hdl"))
+        blocks = len(chip.program.blocks)
+        self.assertGreater(blocks, 1)
+        chip.set("x", chip.get("x"))
+        self.assertFalse(any(chip.scheduled))
+        chip.set("y", chip.get("y") ^ 1)
+        scheduled = sum(chip.scheduled)
+        self.assertTrue(0 < scheduled < blocks)
+        # Nothing changes on the tock of a chip without DFFs
+        chip.eval()
+        chip.tick()
+        chip.tock()
+        self.assertFalse(any(chip.scheduled))